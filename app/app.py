@@ -3,11 +3,18 @@
 # ============================================
 import streamlit as st
 import pandas as pd
-import joblib
+import math
+import sys
+import time
 from pathlib import Path
 
 # ============================================
 # Load trained artifacts
+# Artifacts come from a process-wide registry, so
+# the pickles are unpickled once per process (and
+# again only when a file actually changes) rather
+# than on every Streamlit rerun.
+#
 # Paths are anchored to this script's location
 # so they work regardless of where you run
 # `streamlit run` from.
@@ -22,14 +29,24 @@ from pathlib import Path
 #       └── columns.pkl
 # ============================================
 BASE_DIR     = Path(__file__).resolve().parent   # .../app/
-MODEL_DIR    = BASE_DIR.parent / "model"          # .../model/
-
-MODEL_PATH   = MODEL_DIR / "model.pkl"
-SCALER_PATH  = MODEL_DIR / "scaler.pkl"
-COLUMNS_PATH = MODEL_DIR / "columns.pkl"
+PROJECT_ROOT = BASE_DIR.parent                    # .../readmission-pred-ml/
+MODEL_DIR    = PROJECT_ROOT / "model"             # .../model/
+
+# Make the shared `readmission` package importable
+# when launched with `streamlit run app/app.py`.
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from readmission.artifacts import load_artifacts, missing_artifacts
+from readmission.cache import PREDICTION_CACHE
+from readmission.config import FORM_CHOICES, FORM_RANGES
+from readmission.explain import FIELD_LABELS, explainer_for
+from readmission.instrumentation import PROFILER, STAGES, maybe_start_profiler
+from readmission.results import predict_one
+from readmission.sensitivity import sweep, sweep_grid
 
 # Validate files exist before loading
-_missing = [str(p) for p in [MODEL_PATH, SCALER_PATH, COLUMNS_PATH] if not p.exists()]
+_missing = missing_artifacts(MODEL_DIR)
 if _missing:
     st.set_page_config(page_title="Hospital Readmission Predictor", page_icon="🏥", layout="centered")
     st.error(
@@ -40,13 +57,14 @@ if _missing:
     )
     st.stop()
 
-model            = joblib.load(MODEL_PATH)
-scaler           = joblib.load(SCALER_PATH)
-training_columns = joblib.load(COLUMNS_PATH)
-
-scaler_columns   = scaler.feature_names_in_
+with STAGES.time("load_artifacts"):
+    artifacts    = load_artifacts(MODEL_DIR)
+scorer           = artifacts.scorer
+maybe_start_profiler()              # READMISSION_PROFILE=1; once per process
 
-OPTIMAL_THRESHOLD = 0.31
+# Decision settings travel with the model (bundle header,
+# or the config defaults when loaded from the pickles)
+OPTIMAL_THRESHOLD = artifacts.threshold
 
 
 # ============================================
@@ -358,6 +376,14 @@ st.markdown("""
   .detail-lbl  { font-size: .67rem; font-weight: 700; color: var(--text-secondary); text-transform: uppercase; letter-spacing: .07em; }
   .detail-val  { font-size: .88rem; font-weight: 700; color: var(--text-primary); margin-top: 2px; font-family: 'DM Mono',monospace; }
 
+  /* risk drivers */
+  .drivers { padding-top: 14px; margin-top: 14px; border-top: 1px solid rgba(0,0,0,.07); }
+  .driver-row { display: flex; align-items: center; gap: 10px; padding: 6px 0; font-size: .8rem; }
+  .driver-name { flex: 1; color: var(--text-primary); font-weight: 600; }
+  .driver-val  { color: var(--text-secondary); font-family: 'DM Mono',monospace; font-size: .76rem; }
+  .driver-up   { color: var(--risk-red);   font-family: 'DM Mono',monospace; font-weight: 700; min-width: 64px; text-align: right; }
+  .driver-down { color: var(--safe-green); font-family: 'DM Mono',monospace; font-weight: 700; min-width: 64px; text-align: right; }
+
   /* disclaimer */
   .disclaimer {
     display: flex; align-items: flex-start; gap: 10px;
@@ -515,25 +541,25 @@ st.markdown("""
 col1, col2 = st.columns(2)
 
 with col1:
-    age = st.slider("Age (years)", 18, 100, 50)
+    age = st.slider("Age (years)", *FORM_RANGES["age"], 50)
 
 with col2:
-    time_in_hospital = st.slider("Time in Hospital (days)", 1, 30, 5)
+    time_in_hospital = st.slider("Time in Hospital (days)", *FORM_RANGES["time_in_hospital"], 5)
 
 st.markdown('<div class="form-section-lbl" style="margin:0 0 10px;">Clinical Data</div>', unsafe_allow_html=True)
 
 col3, col4 = st.columns(2)
 
 with col3:
-    num_lab_procedures = st.slider("Number of Lab Procedures", 1, 150, 40)
+    num_lab_procedures = st.slider("Number of Lab Procedures", *FORM_RANGES["num_lab_procedures"], 40)
 
 with col4:
-    num_medications = st.slider("Number of Medications", 1, 50, 10)
+    num_medications = st.slider("Number of Medications", *FORM_RANGES["num_medications"], 10)
 
 col5, col6 = st.columns(2)
 
 with col5:
-    num_prior_admissions = st.slider("Number of Prior Admissions", 0, 20, 1)
+    num_prior_admissions = st.slider("Number of Prior Admissions", *FORM_RANGES["num_prior_admissions"], 1)
 
 st.markdown('<div class="form-section-lbl" style="margin:12px 0 10px;">Admission Details</div>', unsafe_allow_html=True)
 
@@ -542,13 +568,13 @@ col7, col8 = st.columns(2)
 with col7:
     admission_type = st.selectbox(
         "Admission Type",
-        ["Emergency", "Urgent", "Elective"]
+        FORM_CHOICES["admission_type"]
     )
 
 with col8:
     discharge_disposition = st.selectbox(
         "Discharge Disposition",
-        ["Home", "Transfer", "Rehabilitation"]
+        FORM_CHOICES["discharge_disposition"]
     )
 
 st.markdown("</div>", unsafe_allow_html=True)   # close card-body
@@ -575,7 +601,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ============================================
-# Prediction Logic  (unchanged from original)
+# Prediction Logic
 # ============================================
 if predict_clicked:
     try:
@@ -589,32 +615,31 @@ if predict_clicked:
             "discharge_disposition": discharge_disposition,
         }
 
-        input_df = pd.DataFrame([input_data])
-        input_df = pd.get_dummies(input_df)
-
-        for col in training_columns:
-            if col not in input_df.columns:
-                input_df[col] = 0
-
-        input_df = input_df[training_columns]
-        input_df[scaler_columns] = scaler.transform(input_df[scaler_columns])
-
-        probability  = model.predict_proba(input_df)[0][1]
-        prediction   = 1 if probability >= OPTIMAL_THRESHOLD else 0
-        prob_pct     = round(probability * 100, 1)
-        thumb_pos    = round(probability * 100, 1)
+        # Encode + scale + closed-form logistic in one pass;
+        # repeated inputs are answered from the LRU cache.
+        # Stage timings (encode / model on a cache miss) feed the
+        # diagnostics panel: open the app with ?diagnostics=1
+        probability, result = predict_one(artifacts, input_data, PREDICTION_CACHE)
+        # Top factors behind the score: exact log-odds contributions
+        # vs. the average patient.  The fields the form does not
+        # collect are the same for every patient (their default
+        # level), so they are measured from there and contribute 0:
+        # the form inputs' contributions add up to the score.
+        drivers = []
+        if getattr(scorer, "coef", None) is not None:
+            with STAGES.time("explain"):
+                explainer = explainer_for(scorer, tuple(sorted(input_data)))
+                drivers   = explainer.explain(input_data).drivers(0, 3, fields=input_data)
+                base_pct  = 100 / (1 + math.exp(-explainer.base_logit))
+        render_start = time.perf_counter()
+        prediction   = result["prediction"]
+        prob_pct     = result["probability_pct"]
+        tier         = result["risk_tier"]
+        thumb_pos    = prob_pct
         conf_pct     = 85   # fixed display confidence for Logistic Regression
         adm_display  = admission_type
         disch_display = discharge_disposition
 
-        # ── Risk tier
-        if prediction == 1 and prob_pct >= 60:
-            tier = "high"
-        elif prediction == 1:
-            tier = "moderate"
-        else:
-            tier = "low"
-
         # ── Build result HTML
         if tier == "high":
             card_cls   = "result-card result-high"
@@ -641,6 +666,17 @@ if predict_clicked:
             sub_text   = "Patient demonstrates low readmission probability indicators"
             pn_cls     = "prob-num pn-low"
 
+        drivers_html = ""
+        if drivers:
+            rows = "".join(
+                f'<div class="driver-row"><span class="driver-name">{FIELD_LABELS.get(f, f)}</span>'
+                f'<span class="driver-val">{input_data[f]}</span>'
+                f'<span class="{"driver-up" if c > 0 else "driver-down"}">{"▲" if c > 0 else "▼"} {abs(c):.2f}</span></div>'
+                for f, c in drivers
+            )
+            drivers_html = (f'<div class="drivers"><div class="detail-lbl">Key Risk Drivers '
+                            f'(log-odds vs. average patient, {base_pct:.0f}%)</div>{rows}</div>')
+
         result_html = f"""
         <div class="{card_cls}">
           <div class="result-top">
@@ -692,6 +728,8 @@ if predict_clicked:
             </div>
           </div>
 
+          {drivers_html}
+
           <div class="threshold-note">
             <svg width="13" height="13" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><circle cx="12" cy="12" r="10"/><line x1="12" y1="8" x2="12" y2="12"/><line x1="12" y1="16" x2="12.01" y2="16"/></svg>
             Decision threshold: <span class="threshold-pill">{OPTIMAL_THRESHOLD}</span>
@@ -705,6 +743,7 @@ if predict_clicked:
         </div>
         """
         st.markdown(result_html, unsafe_allow_html=True)
+        STAGES.observe("render", time.perf_counter() - render_start)
 
     except Exception as e:
         st.markdown(f"""
@@ -728,6 +767,104 @@ else:
 # Close result card
 st.markdown("</div></div>", unsafe_allow_html=True)
 
+# ============================================
+# What-if sensitivity
+# Sweeps one or two inputs across their full
+# range, holding the rest at the form values.
+# The whole grid is scored in one vectorized call.
+# ============================================
+SWEEP_LABELS = {
+    "num_prior_admissions":  "Number of Prior Admissions",
+    "time_in_hospital":      "Time in Hospital (days)",
+    "age":                   "Age (years)",
+    "num_lab_procedures":    "Number of Lab Procedures",
+    "num_medications":       "Number of Medications",
+    "admission_type":        "Admission Type",
+    "discharge_disposition": "Discharge Disposition",
+}
+
+def _sweep_values(field):
+    if field in FORM_RANGES:
+        lo, hi = FORM_RANGES[field]
+        return list(range(lo, hi + 1))
+    return list(FORM_CHOICES[field])
+
+with st.expander("What-if sensitivity analysis"):
+    form_record = {
+        "age":                   age,
+        "num_lab_procedures":    num_lab_procedures,
+        "num_medications":       num_medications,
+        "time_in_hospital":      time_in_hospital,
+        "num_prior_admissions":  num_prior_admissions,
+        "admission_type":        admission_type,
+        "discharge_disposition": discharge_disposition,
+    }
+    sw1, sw2 = st.columns(2)
+    with sw1:
+        sweep_x = st.selectbox("Vary", list(SWEEP_LABELS), format_func=SWEEP_LABELS.get)
+    with sw2:
+        sweep_y = st.selectbox(
+            "Against (optional)",
+            [None] + [f for f in SWEEP_LABELS if f != sweep_x],
+            format_func=lambda f: "—" if f is None else SWEEP_LABELS[f],
+        )
+
+    t0 = time.perf_counter()
+    values_x = _sweep_values(sweep_x)
+    if sweep_y is None:
+        risk = sweep(scorer, form_record, sweep_x, values_x) * 100
+        curve = pd.DataFrame(
+            {"Risk probability (%)": risk, "Decision threshold (%)": OPTIMAL_THRESHOLD * 100},
+            index=pd.Index(values_x, name=SWEEP_LABELS[sweep_x]),
+        )
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        st.line_chart(curve)
+    else:
+        values_y = _sweep_values(sweep_y)
+        risk = sweep_grid(scorer, form_record, sweep_x, values_x, sweep_y, values_y) * 100
+        grid = pd.DataFrame(
+            risk,
+            index=pd.Index(values_y, name=SWEEP_LABELS[sweep_y]),
+            columns=pd.Index(values_x, name=SWEEP_LABELS[sweep_x]),
+        )
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        st.dataframe(grid.style.format("{:.0f}").background_gradient(cmap="RdYlGn_r", vmin=0, vmax=100))
+    st.caption(f"{risk.size:,} scenarios scored in {elapsed_ms:.1f} ms · values are risk probability (%)")
+
+# ============================================
+# Diagnostics (hidden)
+# Per-stage latency histograms for this process,
+# prediction cache stats and the sampling
+# profiler.  Only shown with ?diagnostics=1.
+# ============================================
+if st.query_params.get("diagnostics") == "1":
+    with st.expander("Diagnostics", expanded=True):
+        stages = pd.DataFrame.from_dict(STAGES.snapshot(), orient="index")
+        if stages.empty:
+            st.caption("No stage timings recorded yet.")
+        else:
+            st.dataframe(stages.drop(columns=["sum_s"]).style.format("{:.3f}", subset=stages.columns[2:]))
+        cache = PREDICTION_CACHE.stats()
+        st.caption(f"Model version {artifacts.version} · prediction cache {cache['size']:,}/"
+                   f"{cache['maxsize']:,} entries, hit rate {cache['hit_rate']:.0%}")
+
+        d1, d2 = st.columns(2)
+        with d1:
+            st.download_button("Prometheus metrics", STAGES.to_prometheus(), "metrics.txt", "text/plain")
+        with d2:
+            st.download_button("JSON metrics", pd.Series(STAGES.snapshot()).to_json(), "metrics.json",
+                               "application/json")
+
+        if PROFILER.running:
+            top = pd.DataFrame(PROFILER.top(20), columns=["function", "self samples", "total samples"])
+            st.caption(f"Sampling profiler: {PROFILER.samples:,} samples every "
+                       f"{PROFILER.interval * 1e3:g} ms")
+            st.dataframe(top, hide_index=True)
+            st.download_button("Collapsed stacks (flamegraph)", PROFILER.collapsed(), "profile.txt",
+                               "text/plain")
+        else:
+            st.caption("Sampling profiler off (start the app with READMISSION_PROFILE=1).")
+
 # ============================================
 # Footer
 # ============================================
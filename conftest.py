@@ -0,0 +1,2 @@
+# Makes the readmission package importable when running pytest from the
+# project root (python -m pytest).
@@ -0,0 +1,9 @@
+# ============================================
+# Hospital Readmission Prediction - core package
+#
+# Shared scoring / training code used by the
+# Streamlit app (app/app.py) and the command-line
+# tools.  Modules are imported explicitly, e.g.
+#
+#   from readmission.encoder import FeatureEncoder
+# ============================================
@@ -0,0 +1,216 @@
+# ============================================
+# Process-wide artifact registry
+#
+# Streamlit re-executes app.py on every widget
+# interaction, but imported modules stay in
+# sys.modules - so a registry living here is
+# loaded once per process and shared by every
+# session (and by non-Streamlit callers).
+#
+# Each file is stat()-ed on access; it is only
+# re-hashed when its (mtime, size) stamp moves,
+# and only re-unpickled when its SHA-256 digest
+# actually changed.
+#
+# A model.bundle (readmission.bundle) next to
+# the pickles is preferred - one memory-mapped
+# file, no unpickling - as long as the pickles
+# it was built from are unchanged.
+#
+# When model_dir/CURRENT exists (written by
+# readmission.online.publish) it names the
+# directory the live artifacts are read from,
+# so a publish switches every file at once.
+# ============================================
+import hashlib
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+import joblib
+
+from readmission import config
+
+
+Artifacts = namedtuple(
+    "Artifacts",
+    ["model", "scaler", "columns", "scorer", "version", "threshold", "risk_tiers", "negative_tier"],
+    defaults=[config.OPTIMAL_THRESHOLD, config.RISK_TIERS, config.NEGATIVE_TIER],
+)
+
+CURRENT_FILE = "CURRENT"
+
+ARTIFACT_FILES = {
+    "model":   "model.pkl",
+    "scaler":  "scaler.pkl",
+    "columns": "columns.pkl",
+}
+
+
+class _Entry:
+    __slots__ = ("stamp", "digest", "value")
+
+    def __init__(self, stamp, digest, value):
+        self.stamp  = stamp
+        self.digest = digest
+        self.value  = value
+
+
+class ArtifactRegistry:
+    """Load-once cache of on-disk artifacts, keyed by resolved path."""
+
+    def __init__(self):
+        self._lock    = threading.RLock()
+        self._entries = {}
+        self._derived = {}
+        self._hashes  = {}
+        self.loads    = 0
+
+    def get(self, path, loader=joblib.load):
+        """Return the loaded artifact at `path`, reloading only if it changed."""
+        path  = Path(path).resolve()
+        stat  = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.stamp == stamp:
+            return entry.value
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.stamp == stamp:
+                return entry.value
+            digest = file_digest(path)
+            if entry is not None and entry.digest == digest:
+                # Touched (e.g. copied over) but byte-for-byte the same
+                entry.stamp = stamp
+                return entry.value
+            value = loader(path)
+            self.loads += 1
+            self._entries[path] = _Entry(stamp, digest, value)
+            return value
+
+    def digest(self, path):
+        """SHA-256 of the currently cached version of `path` (loads it if needed)."""
+        self.get(path)
+        return self._entries[Path(path).resolve()].digest
+
+    def file_hash(self, path):
+        """SHA-256 of `path` without loading it; re-hashed only when its stamp moves."""
+        path  = Path(path).resolve()
+        stat  = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._hashes.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, file_digest(path))
+            self._hashes[path] = cached
+        return cached[1]
+
+    def derived(self, key, version, factory):
+        """Cache an object built from artifacts until `version` changes."""
+        cached = self._derived.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            cached = self._derived.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            value = factory()
+            self._derived[key] = (version, value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._derived.clear()
+            self._hashes.clear()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+REGISTRY = ArtifactRegistry()
+
+
+def artifact_paths(model_dir=config.MODEL_DIR):
+    model_dir = Path(model_dir)
+    return {name: model_dir / filename for name, filename in ARTIFACT_FILES.items()}
+
+
+def bundle_path(model_dir=config.MODEL_DIR):
+    return Path(model_dir) / config.BUNDLE_PATH.name
+
+
+def live_dir(model_dir=config.MODEL_DIR):
+    """The directory model_dir/CURRENT points at, else model_dir itself."""
+    model_dir = Path(model_dir)
+    try:
+        target = (model_dir / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return model_dir
+    return model_dir / target
+
+
+def missing_artifacts(model_dir=config.MODEL_DIR):
+    model_dir = live_dir(model_dir)
+    if bundle_path(model_dir).exists():
+        return []
+    return [str(p) for p in artifact_paths(model_dir).values() if not p.exists()]
+
+
+def _current_bundle(model_dir, registry):
+    """The directory's model.bundle, unless the pickles beside it have moved on."""
+    from readmission.bundle import read_bundle
+
+    path = bundle_path(model_dir)
+    if not path.exists():
+        return None
+    bundle = registry.get(path, loader=read_bundle)
+    for name, digest in bundle.sources.items():
+        source = Path(model_dir) / name
+        if source.exists() and registry.file_hash(source) != digest:
+            return None                          # stale: rebuilt pickles win
+    return bundle
+
+
+def load_artifacts(model_dir=config.MODEL_DIR, registry=REGISTRY):
+    """Model, scaler, columns and a ready scorer (see build_scorer) for `model_dir`.
+
+    `version` is a short digest over the artifact files; it changes whenever
+    any of them is replaced and can be used to key downstream caches.
+    Loaded from model.bundle when it is current (`model` is then None), and
+    from the published checkpoint when model_dir/CURRENT names one.
+    """
+    from readmission.scoring import build_scorer
+
+    key    = ("scorer", str(Path(model_dir).resolve()))
+    source = live_dir(model_dir)               # read once: every file from one version
+    bundle = _current_bundle(source, registry)
+    if bundle is not None:
+        scorer = registry.derived(
+            key,
+            bundle.version,
+            bundle.scorer,
+        )
+        return Artifacts(None, bundle.scaler, bundle.columns, scorer, bundle.version,
+                         bundle.threshold, bundle.risk_tiers, bundle.negative_tier)
+
+    paths   = artifact_paths(source)
+    model   = registry.get(paths["model"])
+    scaler  = registry.get(paths["scaler"])
+    columns = registry.get(paths["columns"])
+    version = hashlib.sha256(
+        "".join(registry.digest(p) for p in paths.values()).encode()
+    ).hexdigest()[:16]
+
+    scorer = registry.derived(
+        key,
+        version,
+        lambda: build_scorer(model, scaler, columns),
+    )
+    return Artifacts(model, scaler, columns, scorer, version)
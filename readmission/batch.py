@@ -0,0 +1,286 @@
+# ============================================
+# Batch scoring CLI
+#
+# Scores a whole discharge list (same schema as
+# dataset/readmission_dataset.csv) with the exact
+# encoding, scaling, threshold and risk tiers the
+# Streamlit app uses.  The input is streamed in
+# fixed-size chunks, so memory stays flat no
+# matter how large the file is.
+#
+# Usage:
+#   python -m readmission.batch discharges.csv scores.csv
+#   python -m readmission.batch discharges.parquet scores.parquet --chunksize 200000
+#   python -m readmission.batch backfill.csv scores.csv --workers 8
+#   python -m readmission.batch discharges.csv scores.csv --explain 3
+#   python -m readmission.batch discharges.csv scores.csv --monitor drift.json
+#   python -m readmission.batch discharges.csv scores.csv --per-hospital
+# ============================================
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from readmission import config
+from readmission.artifacts import load_artifacts
+from readmission.dataset import coerce_input, input_dtypes
+from readmission.explain import explainer_for
+from readmission.instrumentation import STAGES
+from readmission.results import DEFAULT_POLICY, Policy, assemble
+
+
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_ID_COLUMN = "patient_id"
+
+
+def _is_parquet(path, fmt=None):
+    if fmt:
+        return fmt == "parquet"
+    return Path(path).suffix.lower() in PARQUET_SUFFIXES
+
+
+# ============================================
+# Scoring
+# ============================================
+def score_frame(scorer, df, policy=DEFAULT_POLICY, id_column=DEFAULT_ID_COLUMN,
+                explain=0, monitor=None):
+    """Score one chunk of raw records; returns the output columns.
+
+    `policy` (results.Policy) is the threshold and tiers; score_file uses the
+    model's own (load_policy).  A None threshold takes each record's hospital
+    threshold from a HospitalRouter.
+    `explain` > 0 adds that many top risk drivers per row (readmission.explain).
+    A `monitor` (readmission.monitoring.StreamingMonitor) observes the chunk.
+    """
+    X         = None
+    threshold = policy.threshold
+    if (explain or monitor is not None) and hasattr(scorer, "score_matrix"):
+        # Encode once; the explanation and the monitor reuse the matrix
+        with STAGES.time("encode"):
+            X = scorer.encoder.transform(df)
+        with STAGES.time("model"):
+            probability = scorer.score_matrix(X)
+    elif threshold is None:
+        probability, threshold = scorer.score_with_thresholds(df)
+    else:
+        probability = scorer.score(df)
+    if monitor is not None:
+        if X is None:
+            # Routed scorers (readmission.hospitals) encode per hospital
+            X = scorer.encoder.transform(df)
+        with STAGES.time("monitor"):
+            monitor.observe(X, probability)
+    # Rows with a missing numeric feature cannot be scored
+    # (the app would raise); their outputs are left empty.
+    with STAGES.time("assemble"):
+        out = assemble(probability, threshold, policy.tiers, policy.negative_tier).to_frame(index=df.index)
+    if explain:
+        with STAGES.time("explain"):
+            out = out.join(explainer_for(scorer).explain_matrix(X).to_frame(explain, index=df.index))
+    if id_column and id_column in df.columns:
+        out.insert(0, id_column, df[id_column].to_numpy())
+    return out
+
+
+# ============================================
+# Chunked readers / writers
+# ============================================
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, columns=None, fmt=None):
+    """Input chunks as DataFrames, numerics cleaned by dataset.coerce_input."""
+    if _is_parquet(path, fmt):
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        if columns is not None:
+            columns = [c for c in columns if c in pf.schema_arrow.names]
+        for batch in pf.iter_batches(batch_size=chunksize, columns=columns):
+            yield coerce_input(batch.to_pandas())
+    else:
+        usecols = None if columns is None else (lambda c: c in columns)
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols, dtype=input_dtypes(columns)):
+            yield coerce_input(chunk)
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path, fmt=None):
+        self.path    = Path(path)
+        self.parquet = _is_parquet(path, fmt)
+        self._writer = None
+        self._first  = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self, failed=False):
+        if self._writer is not None:
+            self._writer.close()
+        elif self._first and not self.parquet and not failed:
+            # Empty input: still leave a file with just the header
+            pd.DataFrame(columns=["probability", "prediction", "risk_tier"]).to_csv(self.path, index=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        # A failed run must not look like an empty input
+        self.close(failed=exc_type is not None)
+
+
+def needed_columns(scorer, id_column=DEFAULT_ID_COLUMN):
+    cols = set(scorer.encoder.numeric) | set(scorer.encoder.categorical)
+    if getattr(scorer, "route_column", None):
+        cols.add(scorer.route_column)
+    if id_column:
+        cols.add(id_column)
+    return cols
+
+
+def load_scorer(model_dir=config.MODEL_DIR, per_hospital=False):
+    """The global scorer, or a HospitalRouter over the per-hospital models."""
+    if per_hospital:
+        from readmission.hospitals import router_for
+
+        return router_for(str(model_dir))
+    return load_artifacts(model_dir).scorer
+
+
+def load_policy(model_dir=config.MODEL_DIR, threshold=None, per_hospital=False):
+    """Threshold and tiers stored with the model; an explicit `threshold` overrides.
+
+    With `per_hospital` and no explicit threshold, the threshold is None:
+    each hospital model's own applies (score_frame).
+    """
+    policy = Policy.of(load_artifacts(model_dir), threshold)
+    if per_hospital and threshold is None:
+        policy = policy._replace(threshold=None)
+    return policy
+
+
+def score_file(input_path, output_path, model_dir=config.MODEL_DIR,
+               chunksize=DEFAULT_CHUNKSIZE, threshold=None,
+               id_column=DEFAULT_ID_COLUMN, input_format=None, output_format=None,
+               progress=None, explain=0, monitor=None, per_hospital=False):
+    """Stream `input_path` through the model into `output_path`.
+
+    `threshold` None applies the model's own. Returns (rows_scored, seconds).
+    """
+    scorer = load_scorer(model_dir, per_hospital)
+    policy = load_policy(model_dir, threshold, per_hospital)
+    cols   = needed_columns(scorer, id_column)
+
+    rows  = 0
+    start = time.perf_counter()
+    chunks = iter_chunks(input_path, chunksize, cols, input_format)
+    with ChunkWriter(output_path, output_format) as writer:
+        while True:
+            with STAGES.time("read"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            out = score_frame(scorer, chunk, policy, id_column, explain, monitor)
+            with STAGES.time("write"):
+                writer.write(out)
+            rows += len(chunk)
+            if progress:
+                progress(rows, time.perf_counter() - start)
+    return rows, time.perf_counter() - start
+
+
+# ============================================
+# CLI
+# ============================================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch-score a discharge list (CSV or Parquet).")
+    parser.add_argument("input", help="input file with the readmission_dataset.csv schema")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--model-dir", default=str(config.MODEL_DIR))
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--threshold", type=float,
+                        help="decision threshold (default: the one stored with the model)")
+    parser.add_argument("--id-column", default=DEFAULT_ID_COLUMN,
+                        help="input column copied to the output (empty to disable)")
+    parser.add_argument("--input-format", choices=["csv", "parquet"])
+    parser.add_argument("--output-format", choices=["csv", "parquet"])
+    parser.add_argument("--workers", type=int, default=1,
+                        help="score shards in N processes (0 = one per CPU)")
+    parser.add_argument("--explain", type=int, default=0, metavar="K",
+                        help="add the top K risk drivers per patient (linear models)")
+    parser.add_argument("--per-hospital", action="store_true",
+                        help="score with each record's hospital model (readmission.hospitals)")
+    parser.add_argument("--monitor", metavar="PATH",
+                        help="write a drift report (JSON) for the input to PATH")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary")
+    parser.add_argument("--timings", action="store_true",
+                        help="print per-stage timings at the end (single process only)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args   = parser.parse_args(argv)
+    if args.per_hospital and args.explain:
+        parser.error("--explain needs the global linear model; drop --per-hospital")
+
+    def progress(rows, seconds):
+        print(f"  {rows:>12,} rows  {rows / max(seconds, 1e-9):>12,.0f} rows/s", file=sys.stderr)
+
+    kwargs  = {}
+    monitor = None
+    if args.monitor:
+        from readmission.monitoring import monitor_for
+
+        monitor = monitor_for(load_scorer(args.model_dir, args.per_hospital),
+                              threshold=load_policy(args.model_dir, args.threshold).threshold)
+    if args.workers == 1:
+        run = score_file
+    else:
+        from readmission.parallel import score_file_parallel
+
+        run = score_file_parallel
+        kwargs["workers"] = args.workers or None
+
+    rows, seconds = run(
+        args.input, args.output,
+        model_dir=args.model_dir,
+        chunksize=args.chunksize,
+        threshold=args.threshold,
+        id_column=args.id_column or None,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        progress=None if args.quiet else progress,
+        explain=args.explain,
+        monitor=monitor,
+        per_hospital=args.per_hospital,
+        **kwargs,
+    )
+    print(f"Scored {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s) -> {args.output}",
+          file=sys.stderr)
+    if args.timings:
+        print(STAGES.format_table(), file=sys.stderr)
+    if monitor is not None:
+        from readmission.monitoring import format_report
+
+        report = monitor.report()
+        Path(args.monitor).write_text(json.dumps(report, indent=2))
+        print(format_report(report), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+# ============================================
+# Performance benchmark suite
+#
+# Measures, on synthetic data with the dataset
+# schema (readmission.synthetic):
+#
+#   artifact_load  cold start of load_artifacts()
+#                  in a fresh interpreter, and
+#                  the warm (registry) lookup
+#   single_row     the app's predict click: encode
+#                  + score one record + assemble,
+#                  and a prediction-cache hit
+#   batch          batch CLI rows/s on a synthetic
+#                  file, and in-memory rows/s
+#   training       clean / scale / encode / split
+#                  / SMOTE and the fit of each of
+#                  the five notebook models
+#
+# Each section runs in its own process.  Its
+# peak RSS is the kernel high-water mark (VmHWM),
+# reset when the section starts: ru_maxrss would
+# carry over the parent's peak.  Linux only;
+# elsewhere it is reported as null.  Results go
+# to a JSON file (default
+# results/benchmarks/<commit>.json) and `compare`
+# flags regressions between runs.
+#
+# Usage:
+#   python -m readmission.benchmark run
+#   python -m readmission.benchmark run --rows 10000000 --sections batch
+#   python -m readmission.benchmark compare results/benchmarks/a1b2c3d.json new.json
+# ============================================
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from readmission import config
+
+
+SECTIONS       = ("artifact_load", "single_row", "batch", "training")
+RESULTS_DIR    = config.PROJECT_ROOT / "results" / "benchmarks"
+TRAIN_MODELS   = ("logistic_regression", "decision_tree", "knn", "random_forest", "gradient_boosting")
+IN_MEMORY_ROWS = 1_000_000
+
+# Raw fields the app form collects
+APP_FIELDS = ("age", "num_lab_procedures", "num_medications", "time_in_hospital",
+              "num_prior_admissions", "admission_type", "discharge_disposition")
+
+
+def _latency(samples_ns):
+    us = np.asarray(samples_ns, dtype=np.float64) / 1e3
+    return {"mean_us": float(us.mean()), "p50_us": float(np.percentile(us, 50)),
+            "p99_us": float(np.percentile(us, 99))}
+
+
+def _reset_peak_rss():
+    """Restart this process's RSS high-water mark; False where that is unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    """Peak RSS (MiB) since the last _reset_peak_rss()."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024                  # kB
+    return None
+
+
+# ============================================
+# Sections
+# ============================================
+_COLD_LOAD = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from readmission.artifacts import load_artifacts
+load_artifacts({model_dir!r})
+print(time.perf_counter() - start)
+"""
+
+
+def bench_artifact_load(model_dir=config.MODEL_DIR, repeat=5, **_):
+    from readmission.artifacts import load_artifacts
+
+    code = _COLD_LOAD.format(root=str(config.PROJECT_ROOT), model_dir=str(model_dir))
+    cold = [float(subprocess.check_output([sys.executable, "-W", "ignore", "-c", code]))
+            for _ in range(repeat)]
+
+    load_artifacts(model_dir)
+    warm = []
+    for _ in range(1000):
+        t0 = time.perf_counter_ns()
+        load_artifacts(model_dir)
+        warm.append(time.perf_counter_ns() - t0)
+    return {"cold_s": min(cold), "warm_us": _latency(warm)["p50_us"]}
+
+
+def bench_single_row(model_dir=config.MODEL_DIR, n_records=2000, random_state=0, **_):
+    from readmission.artifacts import load_artifacts
+    from readmission.cache import PredictionCache
+    from readmission.results import predict_one
+    from readmission.synthetic import generate
+
+    artifacts = load_artifacts(model_dir)
+    df        = generate(n_records, random_state).dropna(subset=list(APP_FIELDS))
+    records   = [{f: (v if isinstance(v, str) else int(v)) for f, v in zip(APP_FIELDS, row)}
+                 for row in df[list(APP_FIELDS)].astype(object).itertuples(index=False)]
+
+    def click(record, cache):
+        return predict_one(artifacts, record, cache)        # what the app's button runs
+
+    for record in records[:50]:                                # warm-up
+        click(record, PredictionCache(0))
+
+    miss, hit = [], []
+    cache = PredictionCache(len(records))
+    for timings in (miss, hit):                                # first pass misses, second hits
+        for record in records:
+            t0 = time.perf_counter_ns()
+            click(record, cache)
+            timings.append(time.perf_counter_ns() - t0)
+    return {"records": len(records), "predict": _latency(miss), "cached": _latency(hit)}
+
+
+def bench_batch(model_dir=config.MODEL_DIR, rows=100_000, fmt="parquet", random_state=0, **_):
+    from readmission.artifacts import load_artifacts
+    from readmission.batch import iter_chunks, needed_columns, score_file
+    from readmission.instrumentation import STAGES
+    from readmission.synthetic import write_synthetic
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = write_synthetic(Path(tmp) / f"input.{fmt}", rows, random_state)
+        STAGES.reset()
+        n, seconds = score_file(source, Path(tmp) / f"output.{fmt}", model_dir=model_dir)
+        stages = {stage: s["sum_s"] for stage, s in STAGES.snapshot().items()}
+
+        # In-memory throughput on (at most) the first 1M rows
+        scorer = load_artifacts(model_dir).scorer
+        df     = next(iter_chunks(source, min(rows, IN_MEMORY_ROWS), needed_columns(scorer, None)))
+        t0     = time.perf_counter()
+        scorer.score(df)
+        in_memory = time.perf_counter() - t0
+    return {"rows": n, "format": fmt, "file_s": seconds, "file_rows_per_s": n / seconds,
+            "in_memory_rows_per_s": len(df) / in_memory, "stages_s": stages}
+
+
+def bench_training(train_rows=10_000, models=TRAIN_MODELS, random_state=42, **_):
+    from readmission.evaluation import NOTEBOOK_MODELS
+    from readmission.synthetic import generate
+    from readmission.train import (FEATURE_COLUMNS, INTEGER_COLUMNS, clean_data, design_data,
+                                   fit_model, fit_scaler, resample_data, split_data)
+
+    # Import sklearn / imblearn up front so no stage pays for it
+    import imblearn.over_sampling
+    import sklearn.linear_model
+    import sklearn.model_selection
+    import sklearn.preprocessing
+
+    times = {}
+
+    def timed(name, fn, *args):
+        t0 = time.perf_counter()
+        value = fn(*args)
+        times[name] = time.perf_counter() - t0
+        return value
+
+    df        = generate(train_rows, random_state)
+    clean     = timed("clean_s", clean_data, df)
+    scaler    = timed("fit_scaler_s", fit_scaler, clean)
+    design    = timed("encode_s", design_data, clean, scaler, FEATURE_COLUMNS, "float64", False)
+    split     = timed("split_s", split_data, design, 0.2, random_state)
+    resampled = timed("smote_s", resample_data, split, "smote", random_state, INTEGER_COLUMNS)
+
+    fits = {}
+    for key in models:
+        t0 = time.perf_counter()
+        if key == "logistic_regression":
+            fit_model(resampled, 1.0, 1000, "balanced")
+        else:
+            NOTEBOOK_MODELS[key][1]().fit(*resampled)
+        fits[key] = time.perf_counter() - t0
+    return {"rows": train_rows, "resampled_rows": len(resampled[1]), **times, "fit_s": fits}
+
+
+BENCHMARKS = {
+    "artifact_load": bench_artifact_load,
+    "single_row":    bench_single_row,
+    "batch":         bench_batch,
+    "training":      bench_training,
+}
+
+
+def _run_section(name, kwargs):
+    reset  = _reset_peak_rss()
+    result = BENCHMARKS[name](**kwargs)
+    result["peak_rss_mb"] = _peak_rss_mb() if reset else None
+    return result
+
+
+def run_sections(sections=SECTIONS, log=print, **kwargs):
+    """Run each section in a fresh process; returns {section: metrics}."""
+    results = {}
+    for name in sections:
+        if log:
+            log(f"  {name} ...")
+        # One process per section: isolated imports, caches and peak RSS
+        with ProcessPoolExecutor(1, mp_context=mp.get_context("spawn")) as pool:
+            results[name] = pool.submit(_run_section, name, kwargs).result()
+    return results
+
+
+def environment():
+    def git(*args):
+        try:
+            return subprocess.check_output(["git", *args], cwd=config.PROJECT_ROOT,
+                                           stderr=subprocess.DEVNULL, text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    import pandas as pd
+    import sklearn
+
+    return {
+        "commit":    git("rev-parse", "--short", "HEAD"),
+        "dirty":     bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python":    platform.python_version(),
+        "numpy":     np.__version__,
+        "pandas":    pd.__version__,
+        "sklearn":   sklearn.__version__,
+        "platform":  platform.platform(),
+        "cpus":      os.cpu_count(),
+    }
+
+
+# ============================================
+# Comparison
+# ============================================
+def _flatten(tree, prefix=""):
+    for key, value in tree.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, float(value)
+
+
+def _direction(name):
+    """+1 if higher is better, -1 if lower is better, 0 if informational."""
+    if name.endswith("_per_s"):
+        return 1
+    leaf = name.rsplit(".", 1)[-1]
+    if leaf.endswith(("_s", "_ms", "_us", "_mb")) or ".stages_s." in name or ".fit_s." in name:
+        return -1
+    return 0
+
+
+def compare(old, new, tolerance=0.10):
+    """[(metric, old, new, change, regressed)] for metrics present in both runs.
+
+    Sections run at a different scale (their `rows` differ) are skipped.
+    """
+    old_m, new_m = dict(_flatten(old["results"])), dict(_flatten(new["results"]))
+    skip = {section for section, result in new["results"].items()
+            if result.get("rows") != old["results"].get(section, {}).get("rows")}
+    rows = []
+    for name, after in new_m.items():
+        if name.split(".", 1)[0] in skip:
+            continue
+        before    = old_m.get(name)
+        direction = _direction(name)
+        if before is None or not direction or not before:
+            continue
+        change    = (after - before) / abs(before)
+        rows.append((name, before, after, change, direction * change < -tolerance))
+    return rows
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latency, throughput and training benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the benchmarks and write a JSON result file")
+    run.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    run.add_argument("--rows", type=int, default=100_000, help="batch-scoring rows (10k .. 10M)")
+    run.add_argument("--format", choices=["parquet", "csv"], default="parquet", dest="fmt")
+    run.add_argument("--train-rows", type=int, default=10_000)
+    run.add_argument("--models", nargs="+", choices=TRAIN_MODELS, default=list(TRAIN_MODELS))
+    run.add_argument("--model-dir", default=str(config.MODEL_DIR))
+    run.add_argument("--output", help="result file (default results/benchmarks/<commit>.json)")
+
+    cmp = sub.add_parser("compare", help="compare two result files")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--tolerance", type=float, default=0.10,
+                     help="relative change counted as a regression (default 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        old, new = (json.loads(Path(p).read_text()) for p in (args.old, args.new))
+        rows = compare(old, new, args.tolerance)
+        print(f"{'metric':<44} {'old':>12} {'new':>12} {'change':>8}")
+        for name, before, after, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<44} {before:>12.4g} {after:>12.4g} {change:>+8.1%}{flag}")
+        regressions = sum(r[-1] for r in rows)
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%}")
+        return 1 if regressions else 0
+
+    env = environment()
+    print(f"Benchmarking commit {env['commit']}{' (dirty)' if env['dirty'] else ''}:")
+    results = run_sections(args.sections, model_dir=args.model_dir, rows=args.rows, fmt=args.fmt,
+                           train_rows=args.train_rows, models=args.models)
+    output = Path(args.output or RESULTS_DIR / f"{env['commit'] or 'unknown'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"environment": env, "results": results}, indent=2) + "\n")
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
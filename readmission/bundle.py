@@ -0,0 +1,341 @@
+# ============================================
+# Single-file model bundle
+#
+# model.pkl / scaler.pkl / columns.pkl are three
+# pickles that must be unpickled (and kept in
+# sync) on every cold start.  model.bundle holds
+# everything the scorer needs in one file:
+#
+#   8s   magic  b"RDMBNDL\0"
+#   u32  format version
+#   u32  header length
+#   JSON header (padded to 64 bytes): model kind,
+#        columns, scaled features, threshold,
+#        risk tiers, array table, SHA-256 of
+#        the header (minus the digest itself)
+#        and the data section, digests of the
+#        source pickles
+#   raw little-endian array buffers, each
+#        64-byte aligned
+#
+# Arrays are views on a read-only memory map -
+# no unpickling, and worker processes share the
+# same pages.  The checksum is verified on load.
+#
+# Usage:
+#   python -m readmission.bundle build      # from the pickles in model/
+#   python -m readmission.bundle info
+#   python -m readmission.bundle bench      # cold-start load time vs pickles
+# ============================================
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from readmission import config
+
+
+MAGIC          = b"RDMBNDL\0"
+FORMAT_VERSION = 2
+ALIGN          = 64
+_PREAMBLE      = struct.Struct("<8sII")
+
+
+class BundleError(ValueError):
+    """Malformed, unsupported or corrupted bundle."""
+
+
+def _pad(n):
+    return -n % ALIGN
+
+
+def _digest(header, body):
+    """SHA-256 over the canonical header (without "sha256") and the data section."""
+    fields = {k: v for k, v in header.items() if k != "sha256"}
+    h = hashlib.sha256(json.dumps(fields, sort_keys=True).encode())
+    h.update(body)
+    return h.hexdigest()
+
+
+# ============================================
+# Writing
+# ============================================
+def _scorer_arrays(scorer):
+    """(kind, params, arrays) describing a LogisticScorer or TreeScorer."""
+    compiled = getattr(scorer, "compiled", None)
+    if compiled is None:
+        return "logistic", {}, {"coef": scorer.coef, "intercept": scorer.intercept}
+    params = {"kind": compiled.kind, "max_depth": int(compiled.max_depth),
+              "scale": float(compiled.scale), "init_raw": float(compiled.init_raw)}
+    arrays = {name: getattr(compiled, name)
+              for name in ("feature", "threshold", "left", "right", "value", "roots")}
+    return "tree_ensemble", params, arrays
+
+
+def _scaler_arrays(encoder):
+    # Only the truly scaled numerics (not the mean 0 / scale 1 defaults)
+    names = [c for c, (_, m, s) in encoder.numeric.items() if (m, s) != (0.0, 1.0)]
+    mean  = np.array([encoder.numeric[c][1] for c in names], dtype=np.float64)
+    scale = np.array([encoder.numeric[c][2] for c in names], dtype=np.float64)
+    return names, mean, scale
+
+
+def write_bundle(path, scorer, threshold=config.OPTIMAL_THRESHOLD,
+                 risk_tiers=config.RISK_TIERS, negative_tier=config.NEGATIVE_TIER, sources=None):
+    """Write `scorer` (plus decision settings) as a bundle file at `path`.
+
+    `sources` maps source file names to their SHA-256 digests; loaders use
+    it to detect a bundle that is older than the pickles next to it.
+    """
+    kind, params, arrays = _scorer_arrays(scorer)
+    scaled, mean, scale  = _scaler_arrays(scorer.encoder)
+    arrays = {**arrays, "scaler_mean": mean, "scaler_scale": scale}
+
+    table, blobs, offset = {}, [], 0
+    for name, arr in arrays.items():
+        arr  = np.ascontiguousarray(arr)
+        arr  = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+        data = arr.tobytes()
+        table[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape),
+                       "offset": offset, "nbytes": len(data)}
+        blobs.append(data + b"\0" * _pad(len(data)))
+        offset += len(blobs[-1])
+    body = b"".join(blobs)
+
+    header = {
+        "kind":            kind,
+        "params":          params,
+        "columns":         list(scorer.columns),
+        "scaled_features": scaled,
+        "threshold":       float(threshold),
+        "risk_tiers":      [[label, float(cutoff)] for label, cutoff in risk_tiers],
+        "negative_tier":   negative_tier,
+        "arrays":          table,
+        "sources":         dict(sources or {}),
+    }
+    header["sha256"] = _digest(header, body)
+    raw = json.dumps(header, sort_keys=True).encode()
+    raw += b" " * _pad(_PREAMBLE.size + len(raw))
+
+    path = Path(path)
+    tmp  = path.with_name(path.name + f".tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(raw)))
+        f.write(raw)
+        f.write(body)
+    os.replace(tmp, path)
+    return path
+
+
+# ============================================
+# Reading
+# ============================================
+class Bundle:
+    """A loaded bundle: header fields plus zero-copy array views."""
+
+    def __init__(self, header, arrays, buffer=None):
+        self.header  = header
+        self.arrays  = arrays
+        self._buffer = buffer               # keeps the memory map alive
+
+    @property
+    def columns(self):
+        return self.header["columns"]
+
+    @property
+    def threshold(self):
+        return self.header["threshold"]
+
+    @property
+    def risk_tiers(self):
+        return tuple((label, cutoff) for label, cutoff in self.header["risk_tiers"])
+
+    @property
+    def negative_tier(self):
+        return self.header["negative_tier"]
+
+    @property
+    def version(self):
+        return self.header["sha256"][:16]
+
+    @property
+    def sources(self):
+        return self.header.get("sources", {})
+
+    @property
+    def scaler(self):
+        """Stand-in exposing the StandardScaler attributes FeatureEncoder reads."""
+        return SimpleNamespace(
+            feature_names_in_=np.asarray(self.header["scaled_features"], dtype=object),
+            mean_=self.arrays["scaler_mean"],
+            scale_=self.arrays["scaler_scale"],
+        )
+
+    def scorer(self):
+        if self.header["kind"] == "logistic":
+            from readmission.scoring import LogisticScorer
+
+            return LogisticScorer.from_bundle(self)
+        if self.header["kind"] == "tree_ensemble":
+            from readmission.tree_compiler import TreeScorer
+
+            return TreeScorer.from_bundle(self)
+        raise BundleError(f"unknown model kind {self.header['kind']!r}")
+
+
+# Required header fields and their JSON types
+_HEADER_FIELDS = {
+    "kind":            str,
+    "params":          dict,
+    "columns":         list,
+    "scaled_features": list,
+    "threshold":       (int, float),
+    "risk_tiers":      list,
+    "negative_tier":   str,
+    "arrays":          dict,
+    "sha256":          str,
+}
+_ARRAY_FIELDS = {"dtype": str, "shape": list, "offset": int, "nbytes": int}
+
+
+def _check_header(path, header):
+    """Raise BundleError unless `header` has every field read_bundle and Bundle use."""
+    if not isinstance(header, dict):
+        raise BundleError(f"{path}: header is not a JSON object")
+    for key, kind in _HEADER_FIELDS.items():
+        if not isinstance(header.get(key), kind):
+            raise BundleError(f"{path}: header field {key!r} missing or malformed")
+    if not isinstance(header.get("sources", {}), dict):
+        raise BundleError(f"{path}: header field 'sources' malformed")
+    for name in ("scaler_mean", "scaler_scale"):
+        if name not in header["arrays"]:
+            raise BundleError(f"{path}: missing array {name!r}")
+    for name, spec in header["arrays"].items():
+        if not isinstance(spec, dict) or any(not isinstance(spec.get(k), t) for k, t in _ARRAY_FIELDS.items()):
+            raise BundleError(f"{path}: array {name!r} malformed")
+
+
+def read_bundle(path, verify=True):
+    """Memory-map a bundle file; raises BundleError if it is not valid."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _PREAMBLE.size:
+            raise BundleError(f"{path}: too short for a model bundle")
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, header_len = _PREAMBLE.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise BundleError(f"{path}: not a model bundle")
+    if version != FORMAT_VERSION:
+        raise BundleError(f"{path}: unsupported bundle format {version} (expected {FORMAT_VERSION})")
+
+    start = _PREAMBLE.size + header_len
+    if start > len(buf):
+        raise BundleError(f"{path}: truncated header")
+    try:
+        header = json.loads(bytes(buf[_PREAMBLE.size:start]))
+    except ValueError as exc:
+        raise BundleError(f"{path}: unreadable header ({exc})") from None
+    _check_header(path, header)
+    body = memoryview(buf)[start:]
+    if verify and _digest(header, body) != header.get("sha256"):
+        raise BundleError(f"{path}: checksum mismatch")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        if spec["offset"] + spec["nbytes"] > len(body):
+            raise BundleError(f"{path}: truncated data section ({name})")
+        try:
+            dtype = np.dtype(spec["dtype"])
+            count = spec["nbytes"] // dtype.itemsize
+            arrays[name] = np.frombuffer(body, dtype, count, spec["offset"]).reshape(spec["shape"])
+        except (TypeError, ValueError) as exc:
+            raise BundleError(f"{path}: array {name!r} malformed ({exc})") from None
+    return Bundle(header, arrays, buf)
+
+
+def build_from_pickles(model_dir=config.MODEL_DIR, output=None, **settings):
+    """Write model.bundle from the pickled artifacts in `model_dir`."""
+    import joblib
+
+    from readmission.artifacts import artifact_paths, file_digest
+    from readmission.scoring import build_scorer
+
+    paths  = artifact_paths(model_dir)
+    scorer = build_scorer(*(joblib.load(paths[k]) for k in ("model", "scaler", "columns")))
+    sources = {p.name: file_digest(p) for p in paths.values()}
+    output  = output or Path(model_dir) / config.BUNDLE_PATH.name
+    return write_bundle(output, scorer, sources=sources, **settings)
+
+
+# ============================================
+# CLI
+# ============================================
+_COLD_START = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{body}
+print(time.perf_counter() - start)
+"""
+
+_LOAD_PICKLES = """
+import joblib
+from readmission.scoring import build_scorer
+d = {model_dir!r}
+scorer = build_scorer(joblib.load(d + '/model.pkl'), joblib.load(d + '/scaler.pkl'),
+                      joblib.load(d + '/columns.pkl'))
+"""
+
+_LOAD_BUNDLE = """
+from readmission.bundle import read_bundle
+scorer = read_bundle({bundle!r}).scorer()
+"""
+
+
+def _cold_start(body, repeat):
+    code  = _COLD_START.format(root=str(config.PROJECT_ROOT), body=body)
+    times = [float(subprocess.check_output([sys.executable, "-W", "ignore", "-c", code]))
+             for _ in range(repeat)]
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect the single-file model bundle.")
+    parser.add_argument("command", choices=["build", "info", "bench"])
+    parser.add_argument("--model-dir", default=str(config.MODEL_DIR))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    bundle_path = Path(args.model_dir) / config.BUNDLE_PATH.name
+    if args.command == "build":
+        path = build_from_pickles(args.model_dir)
+        print(f"Bundle written to {path} ({path.stat().st_size:,} bytes)")
+        return 0
+
+    if args.command == "info":
+        bundle = read_bundle(bundle_path)
+        h = bundle.header
+        print(f"{bundle_path}  format {FORMAT_VERSION}  kind {h['kind']}  version {bundle.version}")
+        tiers = ", ".join(f"{label} >= {cutoff:g}%" for label, cutoff in bundle.risk_tiers)
+        print(f"threshold {h['threshold']}  tiers {tiers} (else {bundle.negative_tier})  "
+              f"{len(h['columns'])} columns")
+        for name, spec in h["arrays"].items():
+            print(f"  {name:<13} {spec['dtype']:<4} {tuple(spec['shape'])}")
+        return 0
+
+    pickles = _cold_start(_LOAD_PICKLES.format(model_dir=args.model_dir), args.repeat)
+    bundle  = _cold_start(_LOAD_BUNDLE.format(bundle=str(bundle_path)), args.repeat)
+    print(f"cold start (best of {args.repeat}): pickles {pickles * 1e3:.1f} ms   "
+          f"bundle {bundle * 1e3:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
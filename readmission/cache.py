@@ -0,0 +1,118 @@
+# ============================================
+# Memoized prediction cache
+#
+# Every app input is a bounded integer slider or
+# a small selectbox, and clinicians re-submit the
+# same combinations while exploring what-ifs.
+# PredictionCache is a thread-safe LRU keyed on
+# the canonicalized input tuple; it is tied to
+# the artifact version (a digest over model.pkl,
+# scaler.pkl and columns.pkl), so replacing any
+# of those files empties it automatically.
+# ============================================
+import numbers
+import threading
+from collections import OrderedDict
+
+from readmission import config
+
+
+def canonical_key(record):
+    """Order-independent, type-normalized key for a raw record.
+
+    50, 50.0 and np.int64(50) all map to the same key, and categorical
+    strings are stripped, so equivalent inputs share one cache slot.
+    """
+    return tuple(sorted((field, _canonical_value(value)) for field, value in record.items()))
+
+
+def _canonical_value(value):
+    if hasattr(value, "item"):               # numpy scalar
+        value = value.item()
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+class PredictionCache:
+    """LRU cache of probabilities, invalidated when the model version changes."""
+
+    def __init__(self, maxsize=config.PREDICTION_CACHE_SIZE):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize       = maxsize
+        self._data         = OrderedDict()
+        self._version      = None
+        self._lock         = threading.Lock()
+        self.hits          = 0
+        self.misses        = 0
+        self.evictions     = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, record, version, compute):
+        """Return the cached value for `record`, calling `compute()` on a miss."""
+        key = canonical_key(record)
+        with self._lock:
+            self._check_version(version)
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            # The model may have been swapped while we computed
+            if self._version == version and self.maxsize:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._version = version
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size":          len(self._data),
+            "maxsize":       self.maxsize,
+            "hits":          self.hits,
+            "misses":        self.misses,
+            "hit_rate":      self.hits / lookups if lookups else 0.0,
+            "evictions":     self.evictions,
+            "invalidations": self.invalidations,
+            "version":       self._version,
+        }
+
+
+# Process-wide instance shared by every Streamlit session
+PREDICTION_CACHE = PredictionCache()
@@ -0,0 +1,67 @@
+# ============================================
+# Shared paths and settings
+#
+# Paths are anchored to this file's location so
+# the tools work regardless of the current
+# working directory.
+# ============================================
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MODEL_DIR    = PROJECT_ROOT / "model"
+DATASET_DIR  = PROJECT_ROOT / "dataset"
+
+MODEL_PATH    = MODEL_DIR / "model.pkl"
+SCALER_PATH   = MODEL_DIR / "scaler.pkl"
+COLUMNS_PATH  = MODEL_DIR / "columns.pkl"
+BUNDLE_PATH   = MODEL_DIR / "model.bundle"
+KNN_INDEX_DIR = MODEL_DIR / "knn_index"
+DATASET_PATH  = DATASET_DIR / "readmission_dataset.csv"
+
+# Decision threshold tuned in the notebook for recall
+# on readmitted patients (instead of the default 0.5).
+OPTIMAL_THRESHOLD = 0.31
+
+# Risk tiers (readmission.results): a positive prediction
+# gets the first (label, cutoff) whose cutoff its rounded
+# probability in % reaches; negatives are NEGATIVE_TIER.
+HIGH_RISK_PCT = 60
+RISK_TIERS    = (("high", HIGH_RISK_PCT), ("moderate", 0))
+NEGATIVE_TIER = "low"
+
+# Max entries in the app's memoized prediction cache.
+# The full form input space is ~3.4e9 combinations, so
+# this only bounds memory for the combinations in use.
+PREDICTION_CACHE_SIZE = 4096
+
+# Max per-hospital scorers kept loaded by the router
+# (readmission.hospitals); others fall out LRU and are
+# re-mapped from their bundle on the next request.
+HOSPITAL_MODEL_CACHE_SIZE = 64
+
+# Plausible bounds for scoring input (batch files, monitor,
+# online updates).  Non-numeric or out-of-range values are
+# treated as missing, so the row is left unscored instead of
+# being scored on a wrapped or garbage value.
+INPUT_RANGES = {
+    "age":                  (0, 120),
+    "num_prior_admissions": (0, 100),
+    "time_in_hospital":     (0, 365),
+    "num_lab_procedures":   (0, 1000),
+    "num_medications":      (0, 1000),
+    "has_comorbidity":      (0, 1),
+}
+
+# Input bounds of the app form (slider min/max and
+# selectbox choices); also the what-if sweep ranges.
+FORM_RANGES = {
+    "age":                  (18, 100),
+    "time_in_hospital":     (1, 30),
+    "num_lab_procedures":   (1, 150),
+    "num_medications":      (1, 50),
+    "num_prior_admissions": (0, 20),
+}
+FORM_CHOICES = {
+    "admission_type":        ("Emergency", "Urgent", "Elective"),
+    "discharge_disposition": ("Home", "Transfer", "Rehabilitation"),
+}
@@ -0,0 +1,192 @@
+# ============================================
+# Typed, cached dataset loader
+#
+# A plain pd.read_csv of readmission_dataset.csv
+# yields int64/float64 numerics and string
+# columns for the categoricals.  load_dataset()
+# reads with an explicit compact schema (int8 /
+# int16, nullable Int16 where values can be
+# missing, category dtypes for the categoricals)
+# and, on first read, writes a columnar .npy
+# cache next to the project (.cache/dataset/).
+# Later loads memory-map those arrays instead of
+# parsing the CSV again.
+#
+# The cache is rebuilt automatically when the
+# source file's size/mtime or the schema change.
+# ============================================
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from readmission import config
+
+
+SCHEMA_VERSION = 1
+
+SCHEMA = {
+    "patient_id":               "int32",
+    "age":                      "int8",
+    "gender":                   "category",
+    "admission_type":           "category",
+    "primary_diagnosis_code":   "category",
+    "num_prior_admissions":     "int8",
+    "time_in_hospital":         "int8",
+    "num_lab_procedures":       "Int16",     # has missing values
+    "num_medications":          "Int16",     # has missing values
+    "has_comorbidity":          "int8",
+    "discharge_disposition":    "category",
+    "insurance_type":           "category",
+    "hospital_id":              "int16",
+    "readmitted_within_30days": "int8",
+    "days_to_readmission":      "float32",   # missing unless readmitted
+}
+
+CACHE_DIR = config.PROJECT_ROOT / ".cache" / "dataset"
+
+
+def csv_dtypes(columns=None):
+    """read_csv `dtype=` mapping for the schema (optionally a subset)."""
+    if columns is None:
+        return dict(SCHEMA)
+    return {c: t for c, t in SCHEMA.items() if c in columns}
+
+
+def input_dtypes(columns=None):
+    """read_csv `dtype=` mapping for scoring input: the categoricals only.
+
+    The compact int8 / Int16 schema is for the training data; on outside
+    files it would wrap out-of-range values and reject blanks or decimals,
+    so numerics are parsed by pandas and cleaned by coerce_input().
+    """
+    return {c: t for c, t in csv_dtypes(columns).items() if t == "category"}
+
+
+def coerce_input(df):
+    """Numeric input fields as float64, NaN where non-numeric or outside INPUT_RANGES."""
+    for field, (lo, hi) in config.INPUT_RANGES.items():
+        if field in df.columns:
+            values = pd.to_numeric(df[field], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            df[field] = np.where((values >= lo) & (values <= hi), values, np.nan)
+    return df
+
+
+def coerce_record(record):
+    """coerce_input for one JSON record: a copy with numeric fields as float.
+
+    Non-numeric or out-of-range numerics become None (unscored, like NaN in
+    a file).  Raises ValueError for a value that is not a JSON scalar.
+    """
+    for field, value in record.items():
+        if isinstance(value, (list, dict)):
+            raise ValueError(f"{field}: expected a single value, got a {type(value).__name__}")
+    record = dict(record)
+    for field, (lo, hi) in config.INPUT_RANGES.items():
+        value = record.get(field)
+        if value is None:
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = None
+        record[field] = value if value is not None and lo <= value <= hi else None
+    return record
+
+
+def read_csv_typed(path, usecols=None, **kwargs):
+    """pd.read_csv with the compact schema applied while parsing."""
+    return pd.read_csv(path, dtype=csv_dtypes(), usecols=usecols, **kwargs)
+
+
+# ============================================
+# Columnar .npy cache
+# ============================================
+def _cache_dir_for(path, cache_root):
+    path = Path(path).resolve()
+    tag  = hashlib.sha256(str(path).encode()).hexdigest()[:12]
+    return Path(cache_root) / f"{path.stem}-{tag}"
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "schema": SCHEMA_VERSION}
+
+
+def write_cache(df, cache_dir, stamp):
+    """Write each column of `df` as .npy arrays plus a meta.json."""
+    cache_dir = Path(cache_dir)
+    tmp = cache_dir.with_name(cache_dir.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        s     = df[col]
+        entry = {"name": col, "file": f"c{i:03d}"}
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            entry["kind"]       = "category"
+            entry["categories"] = [str(c) for c in s.cat.categories]
+            np.save(tmp / f"{entry['file']}.npy", s.cat.codes.to_numpy())
+        elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype) and s.dtype.kind in "iu":
+            entry["kind"]  = "nullable"
+            entry["dtype"] = str(s.dtype)
+            np.save(tmp / f"{entry['file']}.npy", s.to_numpy(dtype=s.dtype.numpy_dtype, na_value=0))
+            np.save(tmp / f"{entry['file']}.mask.npy", s.isna().to_numpy())
+        else:
+            entry["kind"] = "numpy"
+            np.save(tmp / f"{entry['file']}.npy", s.to_numpy())
+        columns.append(entry)
+
+    meta = {"source": stamp, "n_rows": len(df), "columns": columns}
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp, cache_dir)
+
+
+def read_cache(cache_dir, columns=None, mmap=True):
+    """Rebuild the DataFrame from a cache dir; numeric columns stay memory-mapped."""
+    cache_dir = Path(cache_dir)
+    meta      = json.loads((cache_dir / "meta.json").read_text())
+    mode      = "r" if mmap else None
+    data      = {}
+    for entry in meta["columns"]:
+        name = entry["name"]
+        if columns is not None and name not in columns:
+            continue
+        values = np.load(cache_dir / f"{entry['file']}.npy", mmap_mode=mode)
+        if entry["kind"] == "category":
+            dtype = pd.CategoricalDtype(entry["categories"])
+            data[name] = pd.Categorical.from_codes(values, dtype=dtype)
+        elif entry["kind"] == "nullable":
+            mask = np.load(cache_dir / f"{entry['file']}.mask.npy", mmap_mode=mode)
+            data[name] = pd.arrays.IntegerArray(np.asarray(values), np.asarray(mask))
+        else:
+            data[name] = values
+    return pd.DataFrame(data, copy=False), meta
+
+
+def load_dataset(path=config.DATASET_PATH, columns=None, cache=True, cache_root=CACHE_DIR):
+    """Load the readmission dataset with the compact schema.
+
+    The first call parses the CSV and writes the .npy cache; later calls
+    memory-map the cached columns (optionally only `columns`).
+    """
+    if not cache:
+        return read_csv_typed(path, usecols=columns)
+
+    cache_dir = _cache_dir_for(path, cache_root)
+    stamp     = _source_stamp(path)
+    meta_path = cache_dir / "meta.json"
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        if meta.get("source") == stamp:
+            return read_cache(cache_dir, columns)[0]
+
+    df = read_csv_typed(path)
+    write_cache(df, cache_dir, stamp)
+    return df if columns is None else df[list(columns)]
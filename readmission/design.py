@@ -0,0 +1,84 @@
+# ============================================
+# Compact design matrix for training
+#
+# The notebook builds the model matrix with
+#   pd.get_dummies(df, drop_first=True).astype(int)
+# - a dense int64 frame that is then scaled and
+# copied again at every selection step.
+#
+# build_design_matrix() writes the requested
+# feature columns straight from the typed frame
+# (category codes for the indicators) into one
+# preallocated float32 block, or a CSR matrix,
+# applying the StandardScaler on the way in.
+# Column names follow get_dummies' naming, so
+# the result lines up with columns.pkl.
+# ============================================
+import numpy as np
+import pandas as pd
+
+
+def _column_source(df, name):
+    """(field, category code or None) that feature `name` is computed from."""
+    if name in df.columns:
+        return name, None
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype) and name.startswith(col + "_"):
+            value = name[len(col) + 1:]
+            cats  = list(s.cat.categories)
+            if value in cats:
+                return col, cats.index(value)
+            return col, -2                   # unseen level: all zeros
+    raise KeyError(f"cannot build feature {name!r} from columns {list(df.columns)}")
+
+
+def build_design_matrix(df, columns, scaler=None, dtype=np.float32, sparse=False):
+    """Encode `df` into the model matrix for `columns`.
+
+    Categorical fields must use the category dtype (see
+    readmission.dataset).  Numeric columns listed in the scaler's
+    feature_names_in_ are standardized as they are written.
+    Returns a dense F-ordered ndarray, or a scipy CSR matrix if `sparse`.
+    """
+    n = len(df)
+    scaled = {}
+    if scaler is not None:
+        for col, m, s in zip(scaler.feature_names_in_, scaler.mean_, scaler.scale_):
+            scaled[col] = (m, s)
+
+    sources = [_column_source(df, name) for name in columns]
+    codes   = {}
+
+    def column_values(field, code):
+        if code is None:
+            values = df[field].to_numpy(dtype=np.float64)
+            if field in scaled:
+                m, s = scaled[field]
+                values = (values - m) / s
+            return values
+        if field not in codes:
+            codes[field] = df[field].cat.codes.to_numpy()
+        return codes[field] == code
+
+    if not sparse:
+        X = np.empty((n, len(columns)), dtype=dtype, order="F")
+        for j, (field, code) in enumerate(sources):
+            X[:, j] = column_values(field, code)
+        return X
+
+    from scipy import sparse as sp
+
+    # Column by column into CSC arrays, then one conversion to CSR
+    indices, data, indptr = [], [], [0]
+    for field, code in sources:
+        values = column_values(field, code)
+        nz = np.flatnonzero(values).astype(np.int32)
+        indices.append(nz)
+        data.append(np.ones(len(nz), dtype=dtype) if code is not None else values[nz].astype(dtype))
+        indptr.append(indptr[-1] + len(nz))
+    X = sp.csc_matrix(
+        (np.concatenate(data), np.concatenate(indices), np.asarray(indptr, dtype=np.int64)),
+        shape=(n, len(columns)),
+    )
+    return X.tocsr()
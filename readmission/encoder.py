@@ -0,0 +1,171 @@
+# ============================================
+# Precompiled feature encoder
+#
+# Replaces the per-click
+#   pd.DataFrame -> pd.get_dummies -> fill missing
+#   columns -> reorder -> scaler.transform
+# path with a lookup table compiled once from
+# columns.pkl and scaler.pkl.  Raw patient records
+# are written straight into a preallocated float64
+# matrix in training column order, with the
+# StandardScaler mean/scale applied on the way in.
+#
+# The arithmetic is the same as StandardScaler's
+# ((x - mean_) / scale_ in float64), so the output
+# is bit-identical to the original pandas path.
+# Matrices are column-major: encoding writes one
+# column at a time, and it is the layout sklearn
+# gets from a DataFrame, so the downstream matmul
+# sums in the same order too.
+# ============================================
+from collections.abc import Mapping
+
+import numpy as np
+
+
+# Raw categorical fields that were one-hot encoded
+# with pd.get_dummies(..., drop_first=True) in the
+# training notebook.
+CATEGORICAL_FIELDS = (
+    "gender",
+    "admission_type",
+    "primary_diagnosis_code",
+    "discharge_disposition",
+    "insurance_type",
+)
+
+
+class FeatureEncoder:
+    """Turn raw patient records into a scaled model matrix.
+
+    Accepts a single record (dict of scalars), a list of records
+    (list of dicts) or column arrays (dict of sequences / DataFrame).
+    Fields that are absent are treated as 0, and categories that were
+    not seen in training (the dropped base level) encode to all zeros -
+    exactly what the get_dummies/reindex path in the app did.  A numeric
+    field that is present but None (JSON null) is missing: it encodes to
+    NaN, so the row is left unscored like a NaN row in a batch file.
+    """
+
+    def __init__(self, columns, scaler):
+        self.columns    = list(columns)
+        self.n_features = len(self.columns)
+        index           = {col: i for i, col in enumerate(self.columns)}
+
+        scaled_cols = list(getattr(scaler, "feature_names_in_", []))
+        mean  = scaler.mean_  if getattr(scaler, "mean_", None)  is not None else np.zeros(len(scaled_cols))
+        scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones(len(scaled_cols))
+
+        # numeric field -> (column index, mean, scale); unscaled
+        # numerics (e.g. has_comorbidity) use mean 0 / scale 1.
+        self.numeric = {}
+        for col, m, s in zip(scaled_cols, mean, scale):
+            self.numeric[col] = (index[col], np.float64(m), np.float64(s))
+
+        # categorical field -> {category value: column index}
+        self.categorical = {}
+        for col in self.columns:
+            if col in self.numeric:
+                continue
+            field = next((f for f in CATEGORICAL_FIELDS if col.startswith(f + "_")), None)
+            if field is None:
+                self.numeric[col] = (index[col], np.float64(0.0), np.float64(1.0))
+            else:
+                self.categorical.setdefault(field, {})[col[len(field) + 1:]] = index[col]
+
+        # Row template for a record with every field missing:
+        # numerics at 0 (then scaled), every indicator off.
+        self._blank = np.zeros(self.n_features, dtype=np.float64)
+        for idx, m, s in self.numeric.values():
+            self._blank[idx] = (0.0 - m) / s
+
+    @classmethod
+    def from_artifacts(cls, columns, scaler):
+        return cls(columns, scaler)
+
+    # ----------------------------------------
+    # Encoding
+    # ----------------------------------------
+    def transform(self, records, out=None):
+        """Encode `records` into an (n_rows, n_features) float64 matrix."""
+        if isinstance(records, Mapping):
+            values = list(records.values())
+            if values and all(np.ndim(v) == 0 for v in values):
+                return self.transform_one(records, out=out)
+            return self.transform_columns(records, out=out)
+        if hasattr(records, "columns") and hasattr(records, "__getitem__"):
+            return self.transform_columns(records, out=out)
+        return self.transform_records(records, out=out)
+
+    def transform_one(self, record, out=None):
+        """Fast path for a single dict - the Streamlit predict click."""
+        X   = self._alloc(1, out)
+        row = X[0]
+        row[:] = self._blank
+        for field, (idx, m, s) in self.numeric.items():
+            if field in record:
+                value    = record[field]
+                row[idx] = np.nan if value is None else (np.float64(value) - m) / s
+        for field, lookup in self.categorical.items():
+            idx = lookup.get(record.get(field))
+            if idx is not None:
+                row[idx] = 1.0
+        return X
+
+    def transform_records(self, records, out=None):
+        """Encode a sequence of dicts."""
+        records = records if isinstance(records, list) else list(records)
+        columns = {field: [r.get(field, _ABSENT) for r in records] for field in self.numeric}
+        columns.update({field: [r.get(field) for r in records] for field in self.categorical})
+        return self.transform_columns(columns, n_rows=len(records), out=out)
+
+    def transform_columns(self, columns, n_rows=None, out=None):
+        """Encode column arrays (dict of sequences or a DataFrame)."""
+        if n_rows is None:
+            n_rows = len(columns.index) if hasattr(columns, "index") else _column_length(columns)
+        X = self._alloc(n_rows, out)
+        X[:] = self._blank
+
+        for field, (idx, m, s) in self.numeric.items():
+            if field not in columns:
+                continue
+            raw = _as_float(columns[field])
+            X[:, idx] = (raw - m) / s
+
+        for field, lookup in self.categorical.items():
+            if field not in columns:
+                continue
+            raw = np.asarray(columns[field], dtype=object)
+            for value, idx in lookup.items():
+                X[:, idx] = raw == value
+        return X
+
+    def _alloc(self, n_rows, out):
+        if out is None:
+            return np.empty((n_rows, self.n_features), dtype=np.float64, order="F")
+        if out.shape != (n_rows, self.n_features) or out.dtype != np.float64:
+            raise ValueError(
+                f"out must be a float64 array of shape ({n_rows}, {self.n_features}), "
+                f"got {out.dtype} {out.shape}"
+            )
+        return out
+
+
+# Placeholder for a key a record does not have (as opposed to a None value)
+_ABSENT = object()
+
+
+def _column_length(columns):
+    for values in columns.values():
+        return len(values)
+    return 0
+
+
+def _as_float(values):
+    # Absent keys in a list-of-dicts become 0, matching the "missing
+    # column = 0" behaviour of the reindex loop; explicit None is NaN.
+    if isinstance(values, list):
+        values = [0 if v is _ABSENT else np.nan if v is None else v for v in values]
+    elif hasattr(values, "to_numpy"):          # pandas, incl. nullable Int16
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(values, dtype=np.float64)
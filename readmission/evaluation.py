@@ -0,0 +1,225 @@
+# ============================================
+# Model comparison and threshold sweeps
+#
+# The notebook scores each model with predict()
+# and separate accuracy / precision / recall /
+# F1 calls, and OPTIMAL_THRESHOLD (0.31) was
+# picked by hand.  Here every model's
+# probabilities are computed once and sorted
+# once; cumulative sums over the sorted labels
+# give the full confusion matrix at every
+# distinct threshold, and any other threshold
+# grid is answered with a binary search - so a
+# sweep over thousands of thresholds costs about
+# the same as evaluating one.
+#
+# Usage:
+#   python -m readmission.evaluation
+#   python -m readmission.evaluation --min-recall 0.85 --models logistic_regression knn
+# ============================================
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Final models of the notebook (trained on the SMOTE-resampled split)
+NOTEBOOK_MODELS = {
+    "decision_tree": ("Decision Tree", lambda: _sk("tree", "DecisionTreeClassifier")(
+        max_depth=50, min_samples_split=20, min_samples_leaf=10,
+        class_weight="balanced", random_state=42)),
+    "knn": ("KNN", lambda: _sk("neighbors", "KNeighborsClassifier")(
+        n_neighbors=50, weights="distance", metric="manhattan")),
+    "random_forest": ("Random Forest", lambda: _sk("ensemble", "RandomForestClassifier")(
+        n_estimators=300, max_depth=8, min_samples_split=10, min_samples_leaf=5,
+        class_weight="balanced", random_state=42, n_jobs=-1)),
+    "gradient_boosting": ("Gradient Boosting", lambda: _sk("ensemble", "GradientBoostingClassifier")(
+        n_estimators=100, learning_rate=0.1, random_state=42)),
+}
+
+
+def _sk(module, name):
+    import importlib
+
+    return getattr(importlib.import_module(f"sklearn.{module}"), name)
+
+
+# ============================================
+# Confusion counts at every threshold
+# ============================================
+class ThresholdCurve:
+    """Confusion counts for `prob >= t` at every distinct score t.
+
+    Built from one descending sort of the scores; `at(thresholds)` answers
+    arbitrary thresholds by binary search over the same arrays.
+    """
+
+    def __init__(self, y_true, y_prob):
+        y_true = np.asarray(y_true).astype(bool)
+        y_prob = np.asarray(y_prob, dtype=np.float64)
+        order  = np.argsort(-y_prob, kind="stable")
+        scores = y_prob[order]
+        hits   = y_true[order]
+
+        # Last position of each run of equal scores
+        ends = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+        tp   = np.cumsum(hits)[ends]
+
+        self.thresholds = scores[ends]                 # descending
+        self.tp         = tp
+        self.fp         = ends + 1 - tp
+        self.n_pos      = int(y_true.sum())
+        self.n_neg      = len(y_true) - self.n_pos
+
+    def at(self, thresholds):
+        """(tp, fp) for predicting positive when prob >= each threshold."""
+        t = np.asarray(thresholds, dtype=np.float64)
+        # Number of distinct scores >= t (thresholds are descending)
+        k  = np.searchsorted(-self.thresholds, -t, side="right")
+        tp = np.r_[0, self.tp][k]
+        fp = np.r_[0, self.fp][k]
+        return tp, fp
+
+    def roc_auc(self):
+        tpr = np.r_[0, self.tp] / max(self.n_pos, 1)
+        fpr = np.r_[0, self.fp] / max(self.n_neg, 1)
+        return float(np.trapezoid(tpr, fpr))
+
+    def average_precision(self):
+        recall    = np.r_[0, self.tp] / max(self.n_pos, 1)
+        precision = self.tp / (self.tp + self.fp)
+        return float(np.sum(np.diff(recall) * precision))
+
+
+def _metrics(tp, fp, n_pos, n_neg):
+    tp, fp = np.asarray(tp, dtype=np.int64), np.asarray(fp, dtype=np.int64)
+    fn, tn = n_pos - tp, n_neg - fp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall    = np.where(n_pos > 0, tp / max(n_pos, 1), 0.0)
+        f1        = np.where(precision + recall > 0,
+                             2 * precision * recall / (precision + recall), 0.0)
+    return {
+        "tp": tp, "fp": fp, "tn": tn, "fn": fn,
+        "accuracy":    (tp + tn) / max(n_pos + n_neg, 1),
+        "precision":   precision,
+        "recall":      recall,
+        "specificity": tn / max(n_neg, 1),
+        "f1":          f1,
+    }
+
+
+def threshold_sweep(y_true, y_prob, thresholds=None):
+    """Confusion matrix and metrics at every threshold, as a DataFrame.
+
+    `thresholds=None` uses every distinct predicted probability.
+    """
+    curve = y_prob if isinstance(y_prob, ThresholdCurve) else ThresholdCurve(y_true, y_prob)
+    if thresholds is None:
+        t, tp, fp = curve.thresholds, curve.tp, curve.fp
+    else:
+        t = np.asarray(thresholds, dtype=np.float64)
+        tp, fp = curve.at(t)
+    return pd.DataFrame({"threshold": t, **_metrics(tp, fp, curve.n_pos, curve.n_neg)})
+
+
+def recommend_threshold(sweep, min_recall=0.8, metric="precision"):
+    """Row of `sweep` maximizing `metric` among thresholds with recall >= min_recall.
+
+    Ties go to the highest threshold.  None if no threshold reaches the recall.
+    """
+    ok = sweep[sweep["recall"] >= min_recall]
+    if ok.empty:
+        return None
+    best = ok[ok[metric] == ok[metric].max()]
+    return best.loc[best["threshold"].idxmax()]
+
+
+# ============================================
+# Model comparison
+# ============================================
+def positive_proba(model, X):
+    if hasattr(model, "predict_proba"):
+        return np.asarray(model.predict_proba(X))[:, 1]
+    return np.asarray(model.score_matrix(X))
+
+
+def compare_models(models, X_test, y_test, min_recall=0.8, metric="precision",
+                   default_threshold=0.5, thresholds=None):
+    """One row per model: metrics at `default_threshold` and at the
+    recommended recall-constrained threshold, plus ROC AUC / average precision.
+
+    `models` maps display name -> fitted model (or precomputed probabilities).
+    Returns (table, {name: sweep DataFrame}).
+    """
+    rows, sweeps = [], {}
+    for name, model in models.items():
+        prob  = model if isinstance(model, np.ndarray) else positive_proba(model, X_test)
+        curve = ThresholdCurve(y_test, prob)
+        sweep = threshold_sweep(y_test, curve, thresholds)
+        base  = threshold_sweep(y_test, curve, [default_threshold]).iloc[0]
+        best  = recommend_threshold(sweep, min_recall, metric)
+        sweeps[name] = sweep
+
+        row = {
+            "Model":     name,
+            "Accuracy":  base["accuracy"],
+            "Precision": base["precision"],
+            "Recall":    base["recall"],
+            "F1 Score":  base["f1"],
+            "ROC AUC":   curve.roc_auc(),
+            "Avg Precision": curve.average_precision(),
+        }
+        if best is not None:
+            row.update({
+                "Threshold":             best["threshold"],
+                "Precision @ Threshold": best["precision"],
+                "Recall @ Threshold":    best["recall"],
+                "F1 @ Threshold":        best["f1"],
+                "TP": int(best["tp"]), "FN": int(best["fn"]),
+            })
+        rows.append(row)
+    return pd.DataFrame(rows), sweeps
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    from readmission.train import build_pipeline
+
+    choices = ["logistic_regression", *NOTEBOOK_MODELS]
+    parser = argparse.ArgumentParser(description="Compare models across all decision thresholds.")
+    parser.add_argument("--models", nargs="+", choices=choices, default=choices)
+    parser.add_argument("--min-recall", type=float, default=0.8)
+    parser.add_argument("--metric", choices=["precision", "f1", "accuracy", "specificity"],
+                        default="precision", help="maximized subject to the recall constraint")
+    parser.add_argument("--default-threshold", type=float, default=0.5)
+    parser.add_argument("--grid", type=int, default=0,
+                        help="sweep an evenly spaced grid of N thresholds instead of every score")
+    args = parser.parse_args(argv)
+
+    _, stages = build_pipeline(log=None)
+    split = stages["split"].value()
+    models = {}
+    for key in args.models:
+        if key == "logistic_regression":
+            models["Logistic Regression"] = stages["fit"].value()
+        else:
+            label, factory = NOTEBOOK_MODELS[key]
+            models[label] = factory().fit(*stages["resample"].value())
+
+    grid = np.linspace(0, 1, args.grid) if args.grid else None
+    table, _ = compare_models(models, split["X_test"], split["y_test"], args.min_recall,
+                              args.metric, args.default_threshold, grid)
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.float_format", "{:.3f}".format):
+        if "Recall @ Threshold" in table:
+            table = table.sort_values("Recall @ Threshold", ascending=False)
+        print(table.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
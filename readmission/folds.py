@@ -0,0 +1,231 @@
+# ============================================
+# Shared cross-validation folds
+#
+# In the notebook every model (and every
+# GridSearchCV) re-splits and re-resamples the
+# same training data.  FoldCache builds the
+# stratified folds once - each training part
+# resampled inside the fold, validation parts
+# untouched - and stores them as .npy files
+# under .cache/folds, keyed by a hash of the
+# data and the fold settings.  Later calls
+# memory-map the arrays, so comparing N models
+# costs N x cv fits and nothing else; joblib
+# workers receive the memmaps by reference.
+#
+# Usage:
+#   python -m readmission.folds
+#   python -m readmission.folds --models logistic_regression knn --scoring f1
+# ============================================
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from readmission import config
+from readmission.resampling import METHODS, resample as resample_xy
+
+
+CACHE_DIR = config.PROJECT_ROOT / ".cache" / "folds"
+
+FOLD_VERSION = 1
+
+_ARRAYS = ("X_train", "y_train", "X_val", "y_val")
+
+
+class Fold:
+    __slots__ = _ARRAYS
+
+    def __init__(self, X_train, y_train, X_val, y_val):
+        self.X_train = X_train
+        self.y_train = y_train
+        self.X_val   = X_val
+        self.y_val   = y_val
+
+
+def build_folds(X, y, cv=5, resample="smote", random_state=42, integer_columns=()):
+    """Stratified folds, each training part resampled once up front."""
+    from sklearn.model_selection import StratifiedKFold
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    folds = []
+    splitter = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+    for train_idx, val_idx in splitter.split(X, y):
+        X_tr, y_tr = resample_xy(X[train_idx], y[train_idx], resample, random_state)
+        if resample != "none" and len(integer_columns):
+            X_tr[:, integer_columns] = np.trunc(X_tr[:, integer_columns])
+        # Shuffle once so any prefix is a representative subsample
+        order = np.random.default_rng(random_state).permutation(len(y_tr))
+        folds.append(Fold(X_tr[order], y_tr[order], X[val_idx], y[val_idx]))
+    return folds
+
+
+# ============================================
+# On-disk cache
+# ============================================
+class FoldCache:
+    def __init__(self, cache_dir=CACHE_DIR, cv=5, resample="smote", random_state=42,
+                 integer_columns=(), enabled=True):
+        self.cache_dir       = Path(cache_dir)
+        self.cv              = cv
+        self.resample        = resample
+        self.random_state    = random_state
+        self.integer_columns = list(integer_columns)
+        self.enabled         = enabled
+        self.hits            = 0
+        self.misses          = 0
+
+    def key(self, X, y):
+        """Hash of the data and the fold settings."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.ascontiguousarray(y)
+        h = hashlib.sha256()
+        h.update(json.dumps({
+            "version":         FOLD_VERSION,
+            "cv":              self.cv,
+            "resample":        self.resample,
+            "random_state":    self.random_state,
+            "integer_columns": self.integer_columns,
+            "shape":           X.shape,
+            "y_dtype":         str(y.dtype),
+        }, sort_keys=True).encode())
+        h.update(X.tobytes())
+        h.update(y.tobytes())
+        return h.hexdigest()
+
+    def path(self, X, y):
+        return self.cache_dir / self.key(X, y)[:16]
+
+    def get(self, X, y):
+        """Folds for (X, y); memory-mapped from the cache when available."""
+        if not self.enabled:
+            return self._build(X, y)
+        path = self.path(X, y)
+        if (path / "meta.json").exists():
+            self.hits += 1
+            return load_folds(path)
+        self.misses += 1
+        folds = self._build(X, y)
+        save_folds(folds, path)
+        return load_folds(path)
+
+    def _build(self, X, y):
+        return build_folds(X, y, self.cv, self.resample, self.random_state, self.integer_columns)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def save_folds(folds, path):
+    path = Path(path)
+    tmp  = path.with_name(path.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for i, fold in enumerate(folds):
+        for name in _ARRAYS:
+            np.save(tmp / f"fold{i}-{name}.npy", getattr(fold, name))
+    (tmp / "meta.json").write_text(json.dumps({"n_folds": len(folds)}))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def load_folds(path, mmap=True):
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text())
+    mode = "r" if mmap else None
+    return [
+        Fold(*(np.load(path / f"fold{i}-{name}.npy", mmap_mode=mode) for name in _ARRAYS))
+        for i in range(meta["n_folds"])
+    ]
+
+
+# ============================================
+# Comparing estimators on shared folds
+# ============================================
+def _fit_fold(estimator, fold, scorer):
+    from sklearn.base import clone
+
+    start = time.perf_counter()
+    est   = clone(estimator).fit(fold.X_train, fold.y_train)
+    return scorer(est, fold.X_val, fold.y_val), time.perf_counter() - start
+
+
+def cross_validate(estimators, folds, scoring="recall", n_jobs=-1):
+    """Score every estimator on every fold; one row per estimator.
+
+    `estimators` maps name -> unfitted estimator.  All (estimator, fold)
+    fits run in one joblib batch.
+    """
+    from sklearn.metrics import get_scorer
+
+    scorer = get_scorer(scoring)
+    tasks  = [(name, f) for name in estimators for f in range(len(folds))]
+    out    = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(estimators[name], folds[f], scorer) for name, f in tasks
+    )
+    rows = []
+    for name in estimators:
+        scores = [s for (n, _), (s, _t) in zip(tasks, out) if n == name]
+        times  = [t for (n, _), (_s, t) in zip(tasks, out) if n == name]
+        rows.append({
+            "Model":         name,
+            f"mean_{scoring}": float(np.mean(scores)),
+            f"std_{scoring}":  float(np.std(scores)),
+            "mean_fit_time": float(np.mean(times)),
+        })
+    return pd.DataFrame(rows)
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    from sklearn.linear_model import LogisticRegression
+
+    from readmission.evaluation import NOTEBOOK_MODELS
+    from readmission.train import INTEGER_COLUMNS, build_pipeline
+
+    choices = ["logistic_regression", *NOTEBOOK_MODELS]
+    parser = argparse.ArgumentParser(description="Cross-validate the candidate models on cached folds.")
+    parser.add_argument("--models", nargs="+", choices=choices, default=choices)
+    parser.add_argument("--scoring", default="recall")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--resample", choices=METHODS, default="smote")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR))
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    _, stages = build_pipeline(log=None)
+    split = stages["split"].value()
+
+    start = time.perf_counter()
+    cache = FoldCache(args.cache_dir, args.cv, args.resample, integer_columns=INTEGER_COLUMNS,
+                      enabled=not args.no_cache)
+    folds = cache.get(split["X_train"], split["y_train"])
+    status = "cached" if cache.hits else "built"
+    print(f"{len(folds)} folds {status} in {time.perf_counter() - start:.2f}s")
+
+    estimators = {}
+    for key in args.models:
+        if key == "logistic_regression":
+            estimators["Logistic Regression"] = LogisticRegression(max_iter=1000, class_weight="balanced")
+        else:
+            label, factory = NOTEBOOK_MODELS[key]
+            estimators[label] = factory()
+    table = cross_validate(estimators, folds, args.scoring, args.n_jobs)
+    print(table.to_string(index=False, float_format="{:.4f}".format))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+# ============================================
+# Per-hospital models
+#
+# The notebook drops hospital_id and fits one
+# global model for every site.  This module can
+# additionally fit one model per hospital_id -
+# the same clean / scale / SMOTE / fit stages as
+# readmission.train, run on that hospital's rows,
+# one hospital per process - and write each to
+# model/hospitals/<hospital_id>/ (pickles plus
+# model.bundle).  Hospitals with too few rows (or
+# too few readmissions) get no model of their
+# own; model/hospitals/index.json lists the ones
+# that do.  Each hospital's bundle carries its
+# own decision threshold, which the router
+# reports per record (score_with_thresholds).
+#
+# HospitalRouter scores records with their
+# hospital's model and falls back to the global
+# model in model/ for unknown or missing ids.
+# Hospital scorers are loaded lazily from their
+# memory-mapped bundles and kept in an LRU of
+# bounded size, so one process can serve many
+# sites with bounded memory.  Rewriting
+# index.json (a retrain) empties the LRU.
+#
+# Usage:
+#   python -m readmission.train --per-hospital
+#   python -m readmission.hospitals train --workers 4
+#   python -m readmission.hospitals info
+#   python -m readmission.batch in.csv out.csv --per-hospital
+#   python -m readmission.service --per-hospital
+# ============================================
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from readmission import config
+from readmission.artifacts import REGISTRY, load_artifacts
+from readmission.resampling import METHODS
+
+
+ROUTE_COLUMN      = "hospital_id"
+HOSPITALS_DIRNAME = "hospitals"
+INDEX_FILE        = "index.json"
+
+MIN_HOSPITAL_ROWS = 500
+MIN_CLASS_ROWS    = 6             # SMOTE needs k_neighbors + 1 minority training rows
+
+
+def hospitals_dir(model_dir=config.MODEL_DIR):
+    return Path(model_dir) / HOSPITALS_DIRNAME
+
+
+# ============================================
+# Training
+# ============================================
+def _fit_hospital(hospital_id, df, output_dir, test_size, random_state, resample, C, max_iter,
+                  class_weight, threshold):
+    from readmission.train import (
+        FEATURE_COLUMNS, INTEGER_COLUMNS, clean_data, design_data, evaluate_model,
+        export_artifacts, fit_model, fit_scaler, resample_data, split_data,
+    )
+
+    start   = time.perf_counter()
+    df      = clean_data(df)
+    scaler  = fit_scaler(df)
+    split   = split_data(design_data(df, scaler, FEATURE_COLUMNS, "float64", False),
+                         test_size, random_state)
+    if resample != "none" and np.bincount(split["y_train"], minlength=2).min() < MIN_CLASS_ROWS:
+        return hospital_id, None                 # too few readmissions for SMOTE to see
+    model   = fit_model(resample_data(split, resample, random_state, INTEGER_COLUMNS),
+                        C, max_iter, class_weight)
+    metrics = evaluate_model(model, split, threshold)
+    export_artifacts(model, scaler, Path(output_dir) / str(hospital_id), threshold)
+    return hospital_id, {"rows": len(df), "metrics": metrics,
+                         "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _eligible(df, min_rows):
+    # The minority count SMOTE needs is checked on the training split (_fit_hospital)
+    from readmission.train import TARGET, clean_data
+
+    clean  = clean_data(df)
+    counts = clean[TARGET].value_counts()
+    return len(clean) >= min_rows and len(counts) == 2 and counts.min() >= 2   # stratified split
+
+
+def train_hospital_models(df, model_dir=config.MODEL_DIR, workers=-1, min_rows=MIN_HOSPITAL_ROWS,
+                          test_size=0.2, random_state=42, resample="smote", C=1.0, max_iter=1000,
+                          class_weight="balanced", threshold=config.OPTIMAL_THRESHOLD):
+    """Fit one model per hospital_id in `df`, in parallel; returns the index dict.
+
+    The models replace model_dir/hospitals as a whole, so hospitals that no
+    longer qualify fall back to the global model.
+    """
+    target = hospitals_dir(model_dir)
+    tmp    = target.with_name(target.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    groups  = {int(h): part for h, part in df.groupby(ROUTE_COLUMN, observed=True, sort=True)}
+    skipped = [h for h, part in groups.items() if not _eligible(part, min_rows)]
+    results = Parallel(n_jobs=workers)(
+        delayed(_fit_hospital)(h, part, tmp, test_size, random_state, resample, C, max_iter,
+                               class_weight, threshold)
+        for h, part in groups.items() if h not in skipped
+    )
+    skipped += [h for h, info in results if info is None]
+    index = {
+        "created":   time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "min_rows":  min_rows,
+        "hospitals": {str(h): info for h, info in results if info is not None},
+        "skipped":   [str(h) for h in sorted(skipped)],
+    }
+    (tmp / INDEX_FILE).write_text(json.dumps(index, indent=2))
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return index
+
+
+# ============================================
+# Routing
+# ============================================
+def _read_index(path):
+    return json.loads(Path(path).read_text())
+
+
+def _hospital_keys(ids):
+    """Index keys ("5") for raw hospital ids; "" where missing or not a number."""
+    ids = pd.to_numeric(pd.Series(ids, dtype=object), errors="coerce")
+    return np.where(ids.notna(), ids.fillna(-1).astype(np.int64).astype(str), "")
+
+
+def _load_hospital(path):
+    """(scorer, results.Policy) for one hospital's model directory."""
+    from readmission.bundle import read_bundle
+    from readmission.results import DEFAULT_POLICY, Policy
+    from readmission.scoring import build_scorer
+
+    bundle = path / config.BUNDLE_PATH.name
+    if bundle.exists():
+        bundle = read_bundle(bundle)
+        return bundle.scorer(), Policy.of(bundle)
+    import joblib
+
+    scorer = build_scorer(*(joblib.load(path / f"{k}.pkl") for k in ("model", "scaler", "columns")))
+    return scorer, DEFAULT_POLICY
+
+
+class HospitalRouter:
+    """Scores each record with its hospital's model (global model as fallback).
+
+    Drop-in for a scorer's score() / predict_proba(); `encoder` is the global
+    model's, which every hospital model shares the columns of.
+    score_with_thresholds() also returns each record's hospital threshold.
+    """
+
+    route_column = ROUTE_COLUMN
+
+    def __init__(self, model_dir=config.MODEL_DIR, maxsize=config.HOSPITAL_MODEL_CACHE_SIZE,
+                 registry=REGISTRY):
+        self.model_dir  = Path(model_dir)
+        self.maxsize    = maxsize
+        self.registry   = registry
+        self._models    = OrderedDict()
+        self._version   = None
+        self._lock      = threading.Lock()
+        self.hits       = 0
+        self.misses     = 0
+        self.evictions  = 0
+        self.fallbacks  = 0
+
+    @property
+    def fallback(self):
+        """The global scorer (reloaded by the registry when model/ changes)."""
+        return load_artifacts(self.model_dir, self.registry).scorer
+
+    @property
+    def encoder(self):
+        return self.fallback.encoder
+
+    @property
+    def fallback_policy(self):
+        from readmission.results import Policy
+
+        return Policy.of(load_artifacts(self.model_dir, self.registry))
+
+    def hospitals(self):
+        """{hospital key: index entry} for hospitals with their own model."""
+        path = hospitals_dir(self.model_dir) / INDEX_FILE
+        if not path.exists():
+            self._check_version(None)
+            return {}
+        index = self.registry.get(path, loader=_read_index)
+        self._check_version(self.registry.digest(path))
+        return index["hospitals"]
+
+    def _check_version(self, version):
+        if version != self._version:
+            with self._lock:
+                self._models.clear()
+                self._version = version
+
+    def _entry(self, hospital_id):
+        key = hospital_id if isinstance(hospital_id, str) else str(_hospital_keys([hospital_id])[0])
+        if key not in self.hospitals():
+            self.fallbacks += 1
+            return self.fallback, self.fallback_policy
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = _load_hospital(hospitals_dir(self.model_dir) / key)
+            if self.maxsize:
+                self._models[key] = entry
+                while len(self._models) > self.maxsize:
+                    self._models.popitem(last=False)
+                    self.evictions += 1
+            return entry
+
+    def scorer_for(self, hospital_id):
+        """Scorer for one hospital id (the global scorer if it has none)."""
+        return self._entry(hospital_id)[0]
+
+    def threshold_for(self, hospital_id):
+        """Decision threshold stored with that hospital's model (else the global one)."""
+        return self._entry(hospital_id)[1].threshold
+
+    def score(self, records):
+        """Positive-class probability, shape (n_rows,), in input order."""
+        return self.score_with_thresholds(records)[0]
+
+    def score_with_thresholds(self, records):
+        """(probability, threshold) per record, each from the record's hospital model."""
+        if isinstance(records, Mapping):
+            values = list(records.values())
+            if values and all(np.ndim(v) == 0 for v in values):
+                records = [records]
+            else:
+                records = pd.DataFrame(records)
+        if hasattr(records, "columns"):
+            ids  = records.get(self.route_column, [None] * len(records))
+            take = lambda rows: records.iloc[rows]
+        else:
+            ids  = [r.get(self.route_column) for r in records]
+            take = lambda rows: [records[i] for i in rows]
+
+        keys      = _hospital_keys(ids)
+        out       = np.empty(len(keys), dtype=np.float64)
+        threshold = np.empty(len(keys), dtype=np.float64)
+        if not len(keys):
+            return out, threshold
+        # One vectorized call per hospital present in the batch
+        groups, inverse = np.unique(keys, return_inverse=True)
+        order  = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(groups)))[:-1]
+        for key, rows in zip(groups, np.split(order, bounds)):
+            scorer, policy = self._entry(key)
+            out[rows]       = scorer.score(take(rows))
+            threshold[rows] = policy.threshold
+        return out, threshold
+
+    def predict_proba(self, records):
+        prob = self.score(records)
+        return np.stack([1 - prob, prob], axis=1)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "loaded":    len(self._models),
+            "maxsize":   self.maxsize,
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "hit_rate":  self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "fallbacks": self.fallbacks,
+        }
+
+
+@lru_cache(maxsize=8)
+def router_for(model_dir=config.MODEL_DIR):
+    """Process-wide HospitalRouter for `model_dir`."""
+    return HospitalRouter(model_dir)
+
+
+def format_index(index):
+    """Per-hospital test metrics table (CLI output)."""
+    rows = [f"{'hospital':>8} {'rows':>8} {'recall':>7} {'precision':>9} {'f1':>6}"]
+    for h, info in index["hospitals"].items():
+        m = info["metrics"]
+        rows.append(f"{h:>8} {info['rows']:>8,} {m['recall']:>7.3f} {m['precision']:>9.3f} {m['f1']:>6.3f}")
+    if index["skipped"]:
+        rows.append(f"global fallback for: {', '.join(index['skipped'])}")
+    return "\n".join(rows)
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    from readmission.train import load_data
+
+    parser = argparse.ArgumentParser(description="Per-hospital readmission models.")
+    parser.add_argument("command", choices=["train", "info"])
+    parser.add_argument("--data", default=str(config.DATASET_PATH))
+    parser.add_argument("--model-dir", default=str(config.MODEL_DIR))
+    parser.add_argument("--workers", type=int, default=-1, help="processes (-1 = one per CPU)")
+    parser.add_argument("--min-rows", type=int, default=MIN_HOSPITAL_ROWS,
+                        help="smaller hospitals use the global model")
+    parser.add_argument("--resample", choices=METHODS, default="smote")
+    parser.add_argument("--threshold", type=float, default=config.OPTIMAL_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        start = time.perf_counter()
+        index = train_hospital_models(load_data(args.data), args.model_dir, args.workers, args.min_rows,
+                                      resample=args.resample, threshold=args.threshold)
+        print(f"Trained {len(index['hospitals'])} hospital models in {time.perf_counter() - start:.1f}s")
+    else:
+        path = hospitals_dir(args.model_dir) / INDEX_FILE
+        if not path.exists():
+            print(f"No per-hospital models in {hospitals_dir(args.model_dir)}")
+            return 1
+        index = _read_index(path)
+    print(format_index(index))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+# ============================================
+# Hot-path instrumentation
+#
+# Per-stage wall-clock timers for the scoring
+# path (artifact load, encode, model, result
+# assembly, HTML render, service request / batch)
+# aggregated into fixed-bucket latency
+# histograms.  Recording is a perf_counter pair
+# plus a bisect, so it stays on in production.
+#
+# STAGES is process-wide, like the artifact
+# registry and the prediction cache, so the app,
+# the batch CLI and the HTTP service all report
+# into it.  Export as JSON (snapshot) or as
+# Prometheus text exposition (to_prometheus).
+#
+# An optional sampling profiler records the
+# Python stacks of every thread at a fixed
+# interval and reports the hottest functions and
+# flamegraph-ready collapsed stacks.
+#
+# Environment:
+#   READMISSION_TIMINGS=0          disable the stage timers
+#   READMISSION_PROFILE=1          start the sampling profiler
+#   READMISSION_PROFILE_INTERVAL_MS=5
+# ============================================
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+
+# Upper bounds in seconds: 1-2.5-5 per decade, 1 us .. 10 s
+BUCKETS = tuple(round(m * 10.0 ** e, 12) for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+
+
+def _env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("", "0", "false", "no", "off")
+
+
+# ============================================
+# Histograms
+# ============================================
+class Histogram:
+    """Cumulative-style latency histogram with fixed bucket bounds."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts  = [0] * (len(self.buckets) + 1)     # last slot is +Inf
+        self.count   = 0
+        self.sum     = 0.0
+        self.max     = 0.0
+        self.last    = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum   += seconds
+        self.last   = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank   = q * self.count
+        cum    = np.cumsum(self.counts)
+        i      = int(np.searchsorted(cum, rank))
+        lo     = self.buckets[i - 1] if i > 0 else 0.0
+        hi     = self.buckets[i] if i < len(self.buckets) else self.max
+        below  = cum[i - 1] if i > 0 else 0
+        inside = self.counts[i]
+        frac   = (rank - below) / inside if inside else 1.0
+        return min(lo + (hi - lo) * frac, self.max)
+
+    def summary(self):
+        return {
+            "count":   self.count,
+            "sum_s":   self.sum,
+            "mean_ms": self.sum / self.count * 1e3 if self.count else 0.0,
+            "p50_ms":  self.quantile(0.50) * 1e3,
+            "p90_ms":  self.quantile(0.90) * 1e3,
+            "p99_ms":  self.quantile(0.99) * 1e3,
+            "max_ms":  self.max * 1e3,
+            "last_ms": self.last * 1e3,
+        }
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name     = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class StageTimings:
+    """Named stage histograms, safe to record into from several threads."""
+
+    def __init__(self, enabled=True, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._hists  = {}
+        self._lock   = threading.Lock()
+
+    def time(self, stage):
+        """Context manager recording the wall time of its block under `stage`."""
+        return _Timer(self, stage) if self.enabled else _NULL_TIMER
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self._hists.get(stage)
+            if hist is None:
+                hist = self._hists[stage] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    def histogram(self, stage):
+        return self._hists.get(stage)
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+    def snapshot(self):
+        """{stage: summary} in first-recorded order (JSON-ready)."""
+        with self._lock:
+            return {stage: hist.summary() for stage, hist in self._hists.items()}
+
+    def to_prometheus(self, metric="readmission_stage_seconds"):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [f"# HELP {metric} Wall time spent per scoring stage.",
+                 f"# TYPE {metric} histogram"]
+        with self._lock:
+            for stage, hist in self._hists.items():
+                cum = 0
+                for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cum += n
+                    le   = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cum}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {hist.sum!r}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def format_table(self):
+        """Plain-text summary table (CLI output)."""
+        rows = [f"{'stage':<16} {'count':>8} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'total s':>9}"]
+        for stage, s in self.snapshot().items():
+            rows.append(f"{stage:<16} {s['count']:>8,} {s['mean_ms']:>9.3f} {s['p50_ms']:>9.3f} "
+                        f"{s['p99_ms']:>9.3f} {s['sum_s']:>9.3f}")
+        return "\n".join(rows)
+
+
+# Process-wide instance shared by every Streamlit session
+STAGES = StageTimings(enabled=_env_flag("READMISSION_TIMINGS", True))
+
+
+# ============================================
+# Sampling profiler
+# ============================================
+class SamplingProfiler:
+    """Samples every thread's Python stack each `interval` seconds.
+
+    Pure Python (sys._current_frames), so it needs no extra dependency;
+    the cost is one stack walk per thread per sample, paid by a
+    background thread.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval  = interval
+        self.max_depth = max_depth
+        self.samples   = 0
+        self._stacks   = Counter()
+        self._lock     = threading.Lock()
+        self._stop     = threading.Event()
+        self._thread   = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            stacks = [self._stack(frame) for ident, frame in frames.items() if ident != me]
+            with self._lock:
+                self.samples += 1
+                self._stacks.update(stacks)
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return tuple(reversed(names))
+
+    def top(self, n=20):
+        """[(function, self samples, total samples)] by self samples."""
+        own, total = Counter(), Counter()
+        with self._lock:
+            for stack, count in self._stacks.items():
+                own[stack[-1]] += count
+                for name in set(stack):
+                    total[name] += count
+        return [(name, count, total[name]) for name, count in own.most_common(n)]
+
+    def collapsed(self):
+        """Collapsed stacks ("a;b;c count" lines) for flamegraph tools."""
+        with self._lock:
+            items = sorted(self._stacks.items(), key=lambda kv: -kv[1])
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in items) + "\n"
+
+
+PROFILER = SamplingProfiler(
+    interval=float(os.environ.get("READMISSION_PROFILE_INTERVAL_MS", 5)) / 1e3,
+)
+
+
+def maybe_start_profiler():
+    """Start PROFILER if READMISSION_PROFILE is set; returns whether it runs."""
+    if _env_flag("READMISSION_PROFILE", False):
+        PROFILER.start()
+    return PROFILER.running
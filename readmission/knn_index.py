@@ -0,0 +1,261 @@
+# ============================================
+# Compact neighbour index for the KNN model
+#
+# The notebook's KNeighborsClassifier
+# (n_neighbors=50, weights="distance",
+# metric="manhattan") brute-forces the whole
+# SMOTE-expanded training set in float64 at
+# predict time.  KNNIndex keeps the same
+# neighbours in a compact layout:
+#
+#   - scaled numeric columns as float32
+#   - 0/1 indicator columns bit-packed into one
+#     integer per row; their L1 distance is the
+#     popcount of an XOR
+#
+# Queries run in blocks (block x n_train
+# distance tiles), so memory per call is
+# bounded.  The index is saved next to
+# model.pkl (model/knn_index/) as .npy arrays
+# and memory-mapped on load.
+#
+# Usage:
+#   python -m readmission.knn_index build
+#   python -m readmission.knn_index check
+#   python -m readmission.knn_index bench
+# ============================================
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from readmission import config
+
+# Notebook hyperparameters
+N_NEIGHBORS = 50
+WEIGHTS     = "distance"
+
+
+def _popcount(a):
+    if hasattr(np, "bitwise_count"):                 # numpy >= 2.0
+        return np.bitwise_count(a)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[a.view(np.uint8).reshape(a.shape + (-1,))].sum(axis=-1, dtype=np.uint8)
+
+
+def _binary_columns(X):
+    return [j for j in range(X.shape[1]) if np.isin(X[:, j], (0, 1)).all()]
+
+
+def _pack(X, columns, dtype):
+    codes = np.zeros(len(X), dtype=dtype)
+    for bit, j in enumerate(columns):
+        codes |= (np.asarray(X[:, j]) != 0).astype(dtype) << dtype(bit)
+    return codes
+
+
+class KNNIndex:
+    """Manhattan-distance k-nearest-neighbour classifier over a fixed training set."""
+
+    def __init__(self, X, y, k=N_NEIGHBORS, weights=WEIGHTS, classes=None, block_size=64):
+        X = np.asarray(X)
+        if weights not in ("distance", "uniform"):
+            raise ValueError(f"unsupported weights {weights!r}")
+        self.k          = int(k)
+        self.weights    = weights
+        self.block_size = block_size
+        self.classes    = np.unique(y) if classes is None else np.asarray(classes)
+        self.y          = np.searchsorted(self.classes, np.asarray(y)).astype(np.int8)
+        self.binary     = np.asarray(_binary_columns(X)[:64], dtype=np.int64)
+        self.numeric    = np.setdiff1d(np.arange(X.shape[1]), self.binary)
+        self.code_dtype = np.uint32 if len(self.binary) <= 32 else np.uint64
+        self.X_num = np.ascontiguousarray(X[:, self.numeric].T, dtype=np.float32)   # (d_num, n)
+        self.codes = _pack(X, self.binary, self.code_dtype)
+        self.n_features = X.shape[1]
+
+    @classmethod
+    def from_estimator(cls, model, **kwargs):
+        """Index over a fitted KNeighborsClassifier's training data."""
+        metric = model.effective_metric_
+        if metric not in ("manhattan", "cityblock", "l1") and not (metric == "minkowski" and model.p == 1):
+            raise ValueError(f"KNNIndex only supports manhattan distance, not {metric!r}")
+        y = model.classes_[model._y]
+        return cls(model._fit_X, y, model.n_neighbors, model.weights, model.classes_, **kwargs)
+
+    @property
+    def n_train(self):
+        return len(self.y)
+
+    # ----------------------------------------
+    # Queries
+    # ----------------------------------------
+    def distances(self, Q):
+        """L1 distances (len(Q), n_train) for one block of queries, float32."""
+        if len(self.binary):
+            q = _pack(Q, self.binary, self.code_dtype)
+            D = _popcount(q[:, None] ^ self.codes[None, :]).astype(np.float32)
+        else:
+            D = np.zeros((len(Q), self.n_train), dtype=np.float32)
+        Q_num = np.asarray(Q[:, self.numeric], dtype=np.float32)
+        tmp   = np.empty_like(D)
+        for row in range(len(self.numeric)):
+            np.subtract(Q_num[:, row, None], self.X_num[row][None, :], out=tmp)
+            np.abs(tmp, out=tmp)
+            D += tmp
+        return D
+
+    def kneighbors(self, Q):
+        """(distances, indices) of the k nearest training rows, nearest first."""
+        Q = self._check(Q)
+        dist = np.empty((len(Q), self.k), dtype=np.float32)
+        idx  = np.empty((len(Q), self.k), dtype=np.int64)
+        for lo in range(0, len(Q), self.block_size):
+            hi   = min(lo + self.block_size, len(Q))
+            D    = self.distances(Q[lo:hi])
+            part = np.argpartition(D, self.k - 1, axis=1)[:, :self.k]
+            d    = np.take_along_axis(D, part, axis=1)
+            order = np.argsort(d, axis=1, kind="stable")
+            idx[lo:hi]  = np.take_along_axis(part, order, axis=1)
+            dist[lo:hi] = np.take_along_axis(d, order, axis=1)
+        return dist, idx
+
+    def predict_proba(self, Q):
+        dist, idx = self.kneighbors(Q)
+        if self.weights == "uniform":
+            w = np.ones_like(dist)
+        else:
+            # As sklearn: exact matches, when present, get all the weight
+            with np.errstate(divide="ignore"):
+                w = 1.0 / dist
+            exact = np.isinf(w)
+            rows  = exact.any(axis=1)
+            w[rows] = exact[rows]
+        labels = self.y[idx]
+        proba  = np.zeros((len(idx), len(self.classes)))
+        for c in range(len(self.classes)):
+            proba[:, c] = (w * (labels == c)).sum(axis=1)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, Q):
+        return self.classes[self.predict_proba(Q).argmax(axis=1)]
+
+    def _check(self, Q):
+        Q = np.asarray(Q)
+        if Q.ndim == 1:
+            Q = Q[None, :]
+        if Q.shape[1] != self.n_features:
+            raise ValueError(f"expected {self.n_features} features, got {Q.shape[1]}")
+        if len(self.binary) and not np.isin(Q[:, self.binary], (0, 1)).all():
+            raise ValueError("indicator columns of the query must be 0/1")
+        return Q
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+    def save(self, path=config.KNN_INDEX_DIR):
+        path = Path(path)
+        tmp  = path.with_name(path.name + f".tmp{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "X_num.npy", self.X_num)
+        np.save(tmp / "codes.npy", self.codes)
+        np.save(tmp / "y.npy", self.y)
+        meta = {
+            "k":          self.k,
+            "weights":    self.weights,
+            "classes":    self.classes.tolist(),
+            "binary":     self.binary.tolist(),
+            "numeric":    self.numeric.tolist(),
+            "n_features": self.n_features,
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path=config.KNN_INDEX_DIR, mmap=True, block_size=64):
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        mode = "r" if mmap else None
+        self = cls.__new__(cls)
+        self.k          = meta["k"]
+        self.weights    = meta["weights"]
+        self.block_size = block_size
+        self.classes    = np.asarray(meta["classes"])
+        self.binary     = np.asarray(meta["binary"], dtype=np.int64)
+        self.numeric    = np.asarray(meta["numeric"], dtype=np.int64)
+        self.n_features = meta["n_features"]
+        self.X_num      = np.load(path / "X_num.npy", mmap_mode=mode)
+        self.codes      = np.load(path / "codes.npy", mmap_mode=mode)
+        self.code_dtype = self.codes.dtype.type
+        self.y          = np.load(path / "y.npy", mmap_mode=mode)
+        return self
+
+
+def check_sklearn_parity(index, model, X):
+    """(max |proba diff|, prediction agreement) against the sklearn model on X."""
+    X   = np.asarray(X, dtype=np.float64)
+    ref = model.predict_proba(X)
+    got = index.predict_proba(X)
+    return float(np.abs(ref - got).max()), float((ref.argmax(1) == got.argmax(1)).mean())
+
+
+# ============================================
+# CLI
+# ============================================
+def _fit_notebook_knn():
+    from readmission.evaluation import NOTEBOOK_MODELS
+    from readmission.train import build_pipeline
+
+    _, stages = build_pipeline(log=None)
+    X, y  = stages["resample"].value()
+    model = NOTEBOOK_MODELS["knn"][1]().fit(np.asarray(X), np.asarray(y))
+    return model, stages["split"].value()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build, check and benchmark the KNN index.")
+    parser.add_argument("command", choices=["build", "check", "bench"])
+    parser.add_argument("--path", default=str(config.KNN_INDEX_DIR))
+    parser.add_argument("--block-size", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        model, _ = _fit_notebook_knn()
+        path = KNNIndex.from_estimator(model, block_size=args.block_size).save(args.path)
+        size = sum(f.stat().st_size for f in Path(path).iterdir())
+        print(f"KNN index ({len(model._y):,} rows, {size / 1e6:.1f} MB) written to {path}")
+        return 0
+
+    model, split = _fit_notebook_knn()
+    X_test = np.asarray(split["X_test"], dtype=np.float64)
+    index  = KNNIndex.load(args.path, block_size=args.block_size)
+
+    if args.command == "check":
+        diff, agree = check_sklearn_parity(index, model, X_test)
+        print(f"Max |probability diff| vs sklearn over {len(X_test):,} rows: {diff:.3g}")
+        print(f"Prediction agreement: {agree:.4%}")
+        return 0
+
+    for label, fn in (("sklearn", model.predict_proba), ("index", index.predict_proba)):
+        fn(X_test[:1])
+        start = time.perf_counter()
+        for i in range(200):
+            fn(X_test[i:i + 1])
+        single = (time.perf_counter() - start) / 200
+        start = time.perf_counter()
+        fn(X_test)
+        batch = time.perf_counter() - start
+        print(f"{label:<8} single row {single * 1e3:7.2f} ms   batch {len(X_test):,} rows "
+              f"{batch:6.2f}s ({len(X_test) / batch:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+# ============================================
+# Streaming drift and calibration monitor
+#
+# Watches the records being scored and compares
+# them with a baseline built from the dataset
+# (the population scaler.pkl was fitted on):
+#
+#   numerics      running count / mean / variance
+#                 (Welford, merged per batch with
+#                 Chan's formula), min / max,
+#                 missing count, and a histogram
+#                 over the baseline's decile bins
+#   categoricals  level counts
+#   probability   histogram over 20 fixed bins,
+#                 predicted-positive rate
+#
+# Everything is fixed-size counters, so memory
+# is O(1) in the number of records.  observe()
+# works on the already-encoded matrix the scorer
+# produced (numerics are in scaler units, one-hot
+# columns are level indicators), so monitoring is
+# a few column reductions per batch.
+#
+# report() gives PSI and (binned) KS per feature,
+# the mean shift in scaler standard deviations,
+# and alerts when a threshold is crossed.
+# Monitors from several workers can be merge()d.
+#
+# Usage:
+#   python -m readmission.monitoring /tmp/discharges.parquet
+#   python -m readmission.batch in.csv out.csv --monitor drift.json
+#   GET /monitor on readmission.service
+# ============================================
+import argparse
+import json
+import sys
+import threading
+
+import numpy as np
+
+from readmission import config
+
+
+PROB_BINS    = 20
+NUMERIC_BINS = 10
+MIN_RECORDS  = 500            # no alerts before this many records
+EPS          = 1e-4           # floor for empty bins in PSI
+
+# (warn, alert) levels
+PSI_LEVELS   = (0.10, 0.25)
+KS_LEVELS    = (0.10, 0.20)
+SHIFT_LEVELS = (0.25, 0.50)    # |mean shift| in scaler standard deviations
+RATE_LEVELS  = (0.05, 0.10)    # |predicted positive rate - baseline|
+
+
+def _proportions(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    total  = counts.sum()
+    return counts / total if total else counts
+
+
+def psi(expected, actual):
+    """Population stability index between two count (or proportion) vectors."""
+    e = np.maximum(_proportions(expected), EPS)
+    a = np.maximum(_proportions(actual), EPS)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks(expected, actual):
+    """Max CDF distance between two binned distributions."""
+    return float(np.max(np.abs(np.cumsum(_proportions(expected)) - np.cumsum(_proportions(actual)))))
+
+
+def _level(value, levels):
+    warn, alert = levels
+    return "alert" if value >= alert else "warn" if value >= warn else None
+
+
+# ============================================
+# Baseline
+# ============================================
+class Baseline:
+    """Reference distributions, in the encoded (scaled) feature space."""
+
+    def __init__(self, numeric, categorical, units, edges, numeric_counts, mean, std,
+                 category_counts, prob_counts, positive_rate, threshold, records):
+        self.numeric         = numeric            # [(field, column index)]
+        self.units           = units              # field -> (scaler mean, scale)
+        self.categorical     = categorical        # [(field, [levels], [column indices])]
+        self.edges           = edges              # field -> inner bin edges
+        self.numeric_counts  = numeric_counts     # field -> counts per bin
+        self.mean            = mean               # (n_numeric,) scaled units
+        self.std             = std
+        self.category_counts = category_counts    # field -> counts per level (+ base)
+        self.prob_counts     = prob_counts
+        self.positive_rate   = positive_rate
+        self.threshold       = threshold
+        self.records         = records
+
+    @classmethod
+    def from_matrix(cls, encoder, X, probability, threshold=config.OPTIMAL_THRESHOLD):
+        numeric     = [(field, idx) for field, (idx, _, _) in encoder.numeric.items()]
+        units       = {field: (float(m), float(s)) for field, (_, m, s) in encoder.numeric.items()}
+        categorical = [(field, list(lookup), list(lookup.values()))
+                       for field, lookup in encoder.categorical.items()]
+        valid = ~np.isnan(X).any(axis=1)
+        X, probability = X[valid], probability[valid]
+
+        edges, counts = {}, {}
+        for field, idx in numeric:
+            inner = np.unique(np.quantile(X[:, idx], np.linspace(0, 1, NUMERIC_BINS + 1)[1:-1]))
+            edges[field]  = inner
+            counts[field] = np.bincount(np.searchsorted(inner, X[:, idx], side="right"),
+                                        minlength=len(inner) + 1)
+        values = X[:, [idx for _, idx in numeric]]
+        cats   = {field: _level_counts(X, indices) for field, _, indices in categorical}
+        probs  = np.bincount(_prob_bins(probability), minlength=PROB_BINS)
+        return cls(numeric, categorical, units, edges, counts, values.mean(axis=0), values.std(axis=0),
+                   cats, probs, float(np.mean(probability >= threshold)), threshold, int(valid.sum()))
+
+    @classmethod
+    def from_dataset(cls, scorer, path=config.DATASET_PATH, threshold=config.OPTIMAL_THRESHOLD):
+        from readmission.dataset import load_dataset
+
+        df = load_dataset(path)
+        X  = scorer.encoder.transform(df)
+        # Routed scorers (readmission.hospitals) score raw records per hospital
+        probability = scorer.score_matrix(X) if hasattr(scorer, "score_matrix") else scorer.score(df)
+        return cls.from_matrix(scorer.encoder, X, probability, threshold)
+
+
+def _level_counts(X, indices):
+    """Counts per one-hot level, plus the base level (no indicator set) last."""
+    counts = X[:, indices].sum(axis=0)
+    return np.append(counts, len(X) - counts.sum())
+
+
+def _prob_bins(probability):
+    return np.minimum((probability * PROB_BINS).astype(np.intp), PROB_BINS - 1)
+
+
+# ============================================
+# Streaming statistics
+# ============================================
+class StreamingMonitor:
+    """O(1)-memory running statistics over scored records."""
+
+    def __init__(self, baseline):
+        self.baseline  = baseline
+        self._cols     = np.array([idx for _, idx in baseline.numeric], dtype=np.intp)
+        self._lock     = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        k = len(self._cols)
+        self.records   = 0                             # rows seen (scored or not)
+        self.unscored  = 0                             # rows with a missing numeric
+        self.count     = np.zeros(k)                   # per numeric: non-missing values
+        self.mean      = np.zeros(k)
+        self.m2        = np.zeros(k)
+        self.min       = np.full(k, np.inf)
+        self.max       = np.full(k, -np.inf)
+        self.positives = 0
+        self.numeric_counts  = {f: np.zeros_like(c) for f, c in self.baseline.numeric_counts.items()}
+        self.category_counts = {f: np.zeros(len(c)) for f, c in self.baseline.category_counts.items()}
+        self.prob_counts     = np.zeros(PROB_BINS, dtype=np.int64)
+
+    # ----------------------------------------
+    # Updates
+    # ----------------------------------------
+    def observe(self, X, probability):
+        """Fold one scored batch (encoded matrix + probabilities) into the stats."""
+        X           = np.asarray(X)
+        probability = np.asarray(probability)
+        values      = X[:, self._cols]
+        present     = ~np.isnan(values)
+        complete    = bool(present.all())
+
+        # Batch moments per feature, merged below with Chan's formula
+        if complete:
+            valid  = slice(None)
+            n_b    = np.full(len(self._cols), float(len(X)))
+            mean_b = values.mean(axis=0) if len(X) else np.zeros(len(self._cols))
+            dev    = values - mean_b
+            lo     = values.min(axis=0, initial=np.inf)
+            hi     = values.max(axis=0, initial=-np.inf)
+            sums   = X.sum(axis=0)
+        else:
+            valid  = present.all(axis=1)
+            n_b    = present.sum(axis=0).astype(np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean_b = np.where(n_b > 0, np.where(present, values, 0.0).sum(axis=0) / n_b, 0.0)
+            dev    = np.where(present, values - mean_b, 0.0)
+            lo     = np.where(present, values, np.inf).min(axis=0, initial=np.inf)
+            hi     = np.where(present, values, -np.inf).max(axis=0, initial=-np.inf)
+            # Column sums over scored rows only (NaN lands in unused numeric columns)
+            sums   = valid.astype(np.float64) @ X
+        m2_b = np.einsum("ij,ij->j", dev, dev)
+
+        prob     = probability[valid]
+        n_scored = len(prob)
+        hists    = {field: np.bincount(np.searchsorted(self.baseline.edges[field], values[valid, j],
+                                                       side="right"),
+                                       minlength=len(self.baseline.edges[field]) + 1)
+                    for j, (field, _) in enumerate(self.baseline.numeric)}
+        cats     = {field: np.append(sums[indices], n_scored - sums[indices].sum())
+                    for field, _, indices in self.baseline.categorical}
+        probs    = np.bincount(_prob_bins(prob), minlength=PROB_BINS)
+        pos      = int(np.count_nonzero(prob >= self.baseline.threshold))
+
+        with self._lock:
+            self._merge_moments(n_b, mean_b, m2_b)
+            np.minimum(self.min, lo, out=self.min)
+            np.maximum(self.max, hi, out=self.max)
+            self.records   += len(X)
+            self.unscored  += len(X) - n_scored
+            self.positives += pos
+            self.prob_counts += probs
+            for field, counts in hists.items():
+                self.numeric_counts[field] += counts
+            for field, counts in cats.items():
+                self.category_counts[field] += counts
+
+    def _merge_moments(self, n_b, mean_b, m2_b):
+        n     = self.count + n_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(n > 0, n_b / n, 0.0)
+        self.mean  = self.mean + delta * frac
+        self.m2    = self.m2 + m2_b + delta * delta * self.count * frac
+        self.count = n
+
+    def merge(self, other):
+        """Fold another monitor (same baseline) into this one."""
+        with self._lock:
+            self._merge_moments(other.count, other.mean, other.m2)
+            np.minimum(self.min, other.min, out=self.min)
+            np.maximum(self.max, other.max, out=self.max)
+            self.records   += other.records
+            self.unscored  += other.unscored
+            self.positives += other.positives
+            self.prob_counts += other.prob_counts
+            for field in self.numeric_counts:
+                self.numeric_counts[field] += other.numeric_counts[field]
+            for field in self.category_counts:
+                self.category_counts[field] += other.category_counts[field]
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # ----------------------------------------
+    # Report
+    # ----------------------------------------
+    def report(self):
+        """Drift metrics and alerts (JSON-ready)."""
+        base = self.baseline
+        with self._lock:
+            scored   = self.records - self.unscored
+            std      = np.sqrt(self.m2 / np.maximum(self.count, 1))
+            alerts   = []
+            numeric  = {}
+            for j, (field, _) in enumerate(base.numeric):
+                expected, actual = base.numeric_counts[field], self.numeric_counts[field]
+                stats = {
+                    "count":       int(self.count[j]),
+                    "missing":     int(self.records - self.count[j]),
+                    # Scaled units: the mean shift is in scaler standard deviations
+                    "mean_shift":  float(self.mean[j] - base.mean[j]),
+                    "std_ratio":   float(std[j] / base.std[j]) if base.std[j] else None,
+                    "psi":         psi(expected, actual) if scored else 0.0,
+                    "ks":          ks(expected, actual) if scored else 0.0,
+                }
+                stats.update(self._raw_units(field, j, std[j]))
+                numeric[field] = stats
+                self._check(alerts, field, "psi", stats["psi"], PSI_LEVELS, scored)
+                self._check(alerts, field, "ks", stats["ks"], KS_LEVELS, scored)
+                self._check(alerts, field, "mean_shift", abs(stats["mean_shift"]), SHIFT_LEVELS, scored)
+
+            categorical = {}
+            for field, levels, _ in base.categorical:
+                expected, actual = base.category_counts[field], self.category_counts[field]
+                names = levels + ["(base)"]
+                categorical[field] = {
+                    "frequencies": dict(zip(names, _proportions(actual).round(6).tolist())),
+                    "baseline":    dict(zip(names, _proportions(expected).round(6).tolist())),
+                    "psi":         psi(expected, actual) if scored else 0.0,
+                }
+                self._check(alerts, field, "psi", categorical[field]["psi"], PSI_LEVELS, scored)
+
+            rate = self.positives / scored if scored else 0.0
+            probability = {
+                "histogram":              self.prob_counts.tolist(),
+                "psi":                    psi(base.prob_counts, self.prob_counts) if scored else 0.0,
+                "positive_rate":          rate,
+                "baseline_positive_rate": base.positive_rate,
+            }
+            self._check(alerts, "probability", "psi", probability["psi"], PSI_LEVELS, scored)
+            self._check(alerts, "probability", "positive_rate_shift",
+                        abs(rate - base.positive_rate), RATE_LEVELS, scored)
+
+        return {"records": self.records, "scored": scored, "alerts": alerts,
+                "numeric": numeric, "categorical": categorical, "probability": probability}
+
+    def _raw_units(self, field, j, std):
+        """Mean / std / min / max back in the field's own units."""
+        if not self.count[j]:
+            return {}
+        m, s = self.baseline.units[field]
+        return {"mean": float(self.mean[j] * s + m), "std": float(std * s),
+                "min": float(self.min[j] * s + m), "max": float(self.max[j] * s + m)}
+
+    @staticmethod
+    def _check(alerts, feature, metric, value, levels, scored):
+        if scored < MIN_RECORDS:
+            return
+        level = _level(value, levels)
+        if level:
+            alerts.append({"feature": feature, "metric": metric, "value": round(float(value), 4),
+                           "level": level})
+
+
+def monitor_for(scorer, path=config.DATASET_PATH, threshold=config.OPTIMAL_THRESHOLD):
+    """A fresh StreamingMonitor against the dataset baseline for `scorer`."""
+    return StreamingMonitor(Baseline.from_dataset(scorer, path, threshold))
+
+
+def format_report(report):
+    """Short plain-text summary (CLI output)."""
+    lines = [f"{report['records']:,} records ({report['scored']:,} scored)"]
+    lines.append(f"{'feature':<24} {'psi':>7} {'ks':>7} {'shift':>7}")
+    for field, s in report["numeric"].items():
+        lines.append(f"{field:<24} {s['psi']:>7.3f} {s['ks']:>7.3f} {s['mean_shift']:>+7.2f}")
+    for field, s in report["categorical"].items():
+        lines.append(f"{field:<24} {s['psi']:>7.3f}")
+    p = report["probability"]
+    lines.append(f"{'probability':<24} {p['psi']:>7.3f}   positive rate {p['positive_rate']:.3f} "
+                 f"(baseline {p['baseline_positive_rate']:.3f})")
+    for a in report["alerts"]:
+        lines.append(f"{a['level'].upper():<5} {a['feature']} {a['metric']} = {a['value']}")
+    if not report["alerts"]:
+        lines.append("no drift alerts")
+    return "\n".join(lines)
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    from readmission.artifacts import load_artifacts
+    from readmission.batch import DEFAULT_CHUNKSIZE, iter_chunks, needed_columns
+
+    parser = argparse.ArgumentParser(description="Drift report for a file of records.")
+    parser.add_argument("input", help="CSV or Parquet with the dataset schema")
+    parser.add_argument("--model-dir", default=str(config.MODEL_DIR))
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--json", action="store_true", help="print the full JSON report")
+    args = parser.parse_args(argv)
+
+    artifacts = load_artifacts(args.model_dir)
+    scorer    = artifacts.scorer
+    monitor   = monitor_for(scorer, threshold=artifacts.threshold)
+    for chunk in iter_chunks(args.input, args.chunksize, needed_columns(scorer, None)):
+        X = scorer.encoder.transform(chunk)
+        monitor.observe(X, scorer.score_matrix(X))
+
+    report = monitor.report()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if any(a["level"] == "alert" for a in report["alerts"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# ============================================
+# Incremental (online) retraining
+#
+# Daily readmission outcomes arrive in the
+# dataset schema (readmitted_within_30days as the
+# label).  Instead of re-reading the full history
+# and refitting LogisticRegression + SMOTE, the
+# current artifacts are updated in place from the
+# new rows only:
+#
+#   1. scaler.partial_fit on the chunk - the
+#      running mean / variance of the scaled
+#      numerics (StandardScaler merges them
+#      exactly, as if it had seen every row)
+#   2. the coefficients are re-expressed for the
+#      new mean / scale, so the model's decision
+#      function is unchanged by the rescaling
+#   3. mini-batch SGD on the class-balanced L2
+#      log-loss (the same objective as the
+#      trained model) starting from those
+#      coefficients
+#
+# Every chunk is scored before it is learned
+# from, so the reported metrics are honest
+# out-of-sample (prequential) numbers.
+#
+# Each update is checkpointed as a new artifact
+# version under model/checkpoints/vNNNN (pickles,
+# model.bundle and meta.json) and then published
+# by pointing model/CURRENT at it, where the
+# artifact registry picks it up without a
+# restart.  Checkpoints are never modified after
+# they are written.
+#
+# Usage:
+#   python -m readmission.online outcomes_2026-10-16.csv
+#   python -m readmission.online day1.parquet day2.parquet --epochs 2
+#   python -m readmission.online outcomes.csv --no-publish    # checkpoint only
+#   python -m readmission.online --restore v0003
+# ============================================
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+from scipy.special import expit
+
+from readmission import config
+from readmission.artifacts import CURRENT_FILE, artifact_paths, live_dir
+from readmission.encoder import FeatureEncoder
+
+
+TARGET = "readmitted_within_30days"
+
+DEFAULT_CHUNKSIZE  = 50_000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_LR         = 0.01
+CHECKPOINT_DIRNAME = "checkpoints"
+
+
+# ============================================
+# Model state
+# ============================================
+class OnlineLogistic:
+    """A LogisticRegression + StandardScaler pair that learns from new rows."""
+
+    def __init__(self, model, scaler, columns, C=None, lr=DEFAULT_LR, batch_size=DEFAULT_BATCH_SIZE,
+                 epochs=1, random_state=0):
+        if not hasattr(model, "coef_"):
+            raise TypeError(f"online updates need a linear model, not {type(model).__name__}")
+        self.model      = copy.deepcopy(model)
+        self.scaler     = copy.deepcopy(scaler)
+        self.columns    = list(columns)
+        self.C          = float(C if C is not None else getattr(model, "C", 1.0))
+        self.lr         = lr
+        self.batch_size = batch_size
+        self.epochs     = epochs
+        self.rng        = np.random.default_rng(random_state)
+        self.scaled     = list(self.scaler.feature_names_in_)
+        self.coef       = np.asarray(self.model.coef_, dtype=np.float64).reshape(-1).copy()
+        self.intercept  = float(np.asarray(self.model.intercept_).reshape(-1)[0])
+        self.encoder    = FeatureEncoder(self.columns, self.scaler)
+        self.rows       = 0
+        self.steps      = 0
+        self.metrics    = _PrequentialMetrics()
+
+    @classmethod
+    def from_model_dir(cls, model_dir=config.MODEL_DIR, **kwargs):
+        paths = artifact_paths(live_dir(model_dir))
+        return cls(*(joblib.load(paths[k]) for k in ("model", "scaler", "columns")), **kwargs)
+
+    def partial_fit(self, df, threshold=config.OPTIMAL_THRESHOLD):
+        """Update the scaler and the coefficients from one labelled chunk."""
+        df = df.dropna(subset=list(self.encoder.numeric) + [TARGET])
+        if not len(df):
+            return self
+        y = df[TARGET].to_numpy(dtype=np.float64)
+
+        # Score before learning: prequential evaluation
+        X = self.encoder.transform(df)
+        self.metrics.update(y, self._predict(X), threshold)
+
+        self._rescale(df[self.scaled].astype(np.float64))
+        X = self.encoder.transform(df)
+        self._sgd(X, y)
+        self.rows += len(df)
+        return self
+
+    def _predict(self, X):
+        return expit(X @ self.coef + self.intercept)
+
+    def _rescale(self, values):
+        """scaler.partial_fit, keeping w . (x - mean) / scale unchanged."""
+        idx       = [self.encoder.numeric[c][0] for c in self.scaled]
+        old_mean  = self.scaler.mean_.copy()
+        old_scale = self.scaler.scale_.copy()
+        self.scaler.partial_fit(values)
+        w = self.coef[idx] / old_scale
+        self.intercept    += float(w @ (self.scaler.mean_ - old_mean))
+        self.coef[idx]     = w * self.scaler.scale_
+        self.encoder       = FeatureEncoder(self.columns, self.scaler)
+
+    def _sgd(self, X, y):
+        # class_weight="balanced" on this chunk; L2 as in LogisticRegression(C)
+        counts = np.bincount(y.astype(np.intp), minlength=2).astype(np.float64)
+        sample = np.where(y == 1, len(y) / (2 * max(counts[1], 1)), len(y) / (2 * max(counts[0], 1)))
+        alpha  = 1.0 / (self.C * float(np.max(self.scaler.n_samples_seen_)))
+        for _ in range(self.epochs):
+            order = self.rng.permutation(len(y))
+            for start in range(0, len(y), self.batch_size):
+                rows   = order[start:start + self.batch_size]
+                Xb, sw = X[rows], sample[rows]
+                resid  = sw * (self._predict(Xb) - y[rows])
+                n      = len(rows)
+                self.coef      -= self.lr * (Xb.T @ resid / n + alpha * self.coef)
+                self.intercept -= self.lr * float(resid.sum() / n)
+                self.steps     += 1
+
+    def export_model(self):
+        """A fitted LogisticRegression carrying the updated coefficients."""
+        model = copy.deepcopy(self.model)
+        model.coef_      = self.coef.reshape(1, -1).copy()
+        model.intercept_ = np.array([self.intercept])
+        return model
+
+
+class _PrequentialMetrics:
+    """Log-loss and confusion counts of predictions made before each update."""
+
+    def __init__(self):
+        self.n        = 0
+        self.log_loss = 0.0
+        self.tp = self.fp = self.fn = self.tn = 0
+
+    def update(self, y, prob, threshold):
+        p = np.clip(prob, 1e-15, 1 - 1e-15)
+        self.log_loss += float(-(y * np.log(p) + (1 - y) * np.log1p(-p)).sum())
+        self.n        += len(y)
+        pred = prob >= threshold
+        pos  = y == 1
+        self.tp += int(np.count_nonzero(pred & pos))
+        self.fp += int(np.count_nonzero(pred & ~pos))
+        self.fn += int(np.count_nonzero(~pred & pos))
+        self.tn += int(np.count_nonzero(~pred & ~pos))
+
+    def summary(self):
+        if not self.n:
+            return {"rows": 0}
+        return {
+            "rows":      self.n,
+            "log_loss":  self.log_loss / self.n,
+            "accuracy":  (self.tp + self.tn) / self.n,
+            "precision": self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0,
+            "recall":    self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0,
+        }
+
+
+# ============================================
+# Checkpoints
+# ============================================
+def checkpoint_dir(model_dir=config.MODEL_DIR):
+    return Path(model_dir) / CHECKPOINT_DIRNAME
+
+
+def list_checkpoints(model_dir=config.MODEL_DIR):
+    """Checkpoint directories, oldest first."""
+    root = checkpoint_dir(model_dir)
+    return sorted(p for p in root.glob("v[0-9]*") if p.is_dir()) if root.exists() else []
+
+
+def _next_version(model_dir):
+    existing = list_checkpoints(model_dir)
+    return f"v{int(existing[-1].name[1:]) + 1:04d}" if existing else "v0001"
+
+
+def save_checkpoint(online, model_dir=config.MODEL_DIR, threshold=config.OPTIMAL_THRESHOLD,
+                    sources=(), seconds=None):
+    """Write the updated artifacts as a new version; returns its directory."""
+    from readmission.artifacts import load_artifacts
+    from readmission.train import export_artifacts
+
+    parent = load_artifacts(model_dir).version
+    target = checkpoint_dir(model_dir) / _next_version(model_dir)
+    export_artifacts(online.export_model(), online.scaler, target, threshold)
+    meta = {
+        "version":    target.name,
+        "parent":     parent,
+        "created":    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sources":    [str(s) for s in sources],
+        "rows":       online.rows,
+        "steps":      online.steps,
+        "seconds":    seconds,
+        "scaler_samples_seen": int(np.max(online.scaler.n_samples_seen_)),
+        "settings":   {"C": online.C, "lr": online.lr, "batch_size": online.batch_size,
+                       "epochs": online.epochs},
+        "prequential": online.metrics.summary(),
+    }
+    (target / "meta.json").write_text(json.dumps(meta, indent=2))
+    return target
+
+
+def publish(checkpoint, model_dir=config.MODEL_DIR):
+    """Make a checkpoint the live model of `model_dir` (picked up by the registry).
+
+    Rewrites the model_dir/CURRENT pointer with one os.replace; loaders read
+    the pointer once and every artifact from that directory, so they see the
+    old version or the new one, never a mix.
+    """
+    model_dir = Path(model_dir)
+    if not (Path(checkpoint) / "model.pkl").exists():
+        raise FileNotFoundError(f"{checkpoint}: not a checkpoint")
+    tmp = model_dir / f".{CURRENT_FILE}.tmp{os.getpid()}"
+    tmp.write_text(Path(os.path.relpath(checkpoint, model_dir)).as_posix() + "\n")
+    os.replace(tmp, model_dir / CURRENT_FILE)
+    return model_dir
+
+
+def update(sources, model_dir=config.MODEL_DIR, chunksize=DEFAULT_CHUNKSIZE, publish_=True,
+           progress=None, **settings):
+    """Stream labelled files through OnlineLogistic and checkpoint the result.
+
+    Returns (online, checkpoint directory).
+    """
+    from readmission.artifacts import load_artifacts
+    from readmission.batch import iter_chunks
+
+    threshold = load_artifacts(model_dir).threshold
+    online    = OnlineLogistic.from_model_dir(model_dir, **settings)
+    columns   = set(online.encoder.numeric) | set(online.encoder.categorical) | {TARGET}
+
+    start = time.perf_counter()
+    for source in sources:
+        for chunk in iter_chunks(source, chunksize, columns):
+            online.partial_fit(chunk, threshold)
+            if progress:
+                progress(online)
+    seconds = time.perf_counter() - start
+
+    target = save_checkpoint(online, model_dir, threshold, sources, round(seconds, 3))
+    if publish_:
+        publish(target, model_dir)
+    return online, target
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the model from new labelled outcomes.")
+    parser.add_argument("inputs", nargs="*", help="CSV or Parquet files with the dataset schema")
+    parser.add_argument("--model-dir", default=str(config.MODEL_DIR))
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--lr", type=float, default=DEFAULT_LR, help="SGD learning rate")
+    parser.add_argument("--epochs", type=int, default=1, help="passes over each chunk")
+    parser.add_argument("--C", type=float, default=None, help="inverse L2 strength (default: the model's)")
+    parser.add_argument("--random-state", type=int, default=0)
+    parser.add_argument("--no-publish", action="store_true",
+                        help="write the checkpoint but leave model/ unchanged")
+    parser.add_argument("--restore", metavar="VERSION", help="publish an earlier checkpoint, e.g. v0003")
+    parser.add_argument("--list", action="store_true", help="list checkpoints")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for path in list_checkpoints(args.model_dir):
+            meta = json.loads((path / "meta.json").read_text())
+            pre  = meta["prequential"]
+            print(f"{meta['version']}  {meta['created']}  {meta['rows']:>10,} rows  "
+                  f"log-loss {pre.get('log_loss', float('nan')):.4f}")
+        return 0
+    if args.restore:
+        publish(checkpoint_dir(args.model_dir) / args.restore, args.model_dir)
+        print(f"Published {args.restore} to {args.model_dir}")
+        return 0
+    if not args.inputs:
+        parser.error("no input files")
+
+    online, target = update(
+        args.inputs, args.model_dir, args.chunksize, publish_=not args.no_publish,
+        C=args.C, lr=args.lr, batch_size=args.batch_size, epochs=args.epochs,
+        random_state=args.random_state,
+    )
+    meta = json.loads((target / "meta.json").read_text())
+    pre  = meta["prequential"]
+    print(f"Updated on {online.rows:,} rows in {meta['seconds']:.2f}s -> {target}"
+          + ("" if args.no_publish else f" (published to {args.model_dir})"))
+    if pre["rows"]:
+        print("Prequential: log-loss {log_loss:.4f}  accuracy {accuracy:.3f}  precision {precision:.3f}  "
+              "recall {recall:.3f}".format(**pre))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
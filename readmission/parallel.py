@@ -0,0 +1,245 @@
+# ============================================
+# Multi-process sharded batch scoring
+#
+# Large discharge files are split into shards
+# (newline-aligned byte ranges for CSV, row-group
+# ranges for Parquet) and scored in a process
+# pool.  The scorer is loaded once in the parent
+# and reaches the workers through fork
+# inheritance (copy-on-write), so nothing is
+# re-unpickled per worker or per shard.  On
+# platforms without fork each worker loads the
+# artifacts once in its initializer instead.
+#
+# Every shard is written to its own part file;
+# the parent stitches the parts together in
+# input order as they complete.  With a drift
+# monitor each shard fills its own and the
+# parent merges them.
+#
+# Used by:  python -m readmission.batch ... --workers N
+# Note: CSV sharding assumes no quoted newlines
+# inside fields, which holds for this schema.
+# ============================================
+import io
+import math
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from readmission import config
+from readmission.dataset import coerce_input, input_dtypes
+from readmission.explain import explainer_for
+from readmission.monitoring import StreamingMonitor
+from readmission.batch import (
+    DEFAULT_CHUNKSIZE,
+    DEFAULT_ID_COLUMN,
+    _is_parquet,
+    load_policy,
+    load_scorer,
+    needed_columns,
+    score_frame,
+)
+
+
+DEFAULT_SHARD_BYTES = 64 << 20   # keeps per-worker memory bounded
+
+# Set in the parent before the pool forks; read by workers.
+_SCORER = None
+
+
+# ============================================
+# Shard planning
+# ============================================
+def plan_csv_shards(path, n_shards):
+    """Split a CSV into newline-aligned (start, end) byte ranges after the header."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header     = f.readline()
+        data_start = f.tell()
+        span       = size - data_start
+        cuts       = [data_start]
+        for i in range(1, n_shards):
+            f.seek(data_start + span * i // n_shards)
+            f.readline()                      # move to the next full line
+            cuts.append(min(f.tell(), size))
+        cuts.append(size)
+
+    names  = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+    ranges = [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+    return names, ranges
+
+
+def plan_parquet_shards(path, n_shards):
+    import pyarrow.parquet as pq
+
+    n_groups = pq.ParquetFile(path).num_row_groups
+    n_shards = max(1, min(n_shards, n_groups))
+    bounds   = [n_groups * i // n_shards for i in range(n_shards + 1)]
+    return [list(range(a, b)) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+# ============================================
+# Worker side
+# ============================================
+def _init_worker(model_dir, per_hospital):
+    global _SCORER
+    if _SCORER is None:
+        _SCORER = load_scorer(model_dir, per_hospital)
+
+
+def _read_csv_range(path, start, end, names, columns, chunksize):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    reader = pd.read_csv(io.BytesIO(data), header=None, names=names, dtype=input_dtypes(columns),
+                         usecols=lambda c: c in columns, chunksize=chunksize)
+    for chunk in reader:
+        yield coerce_input(chunk)
+
+
+def _read_parquet_groups(path, groups, columns, chunksize):
+    import pyarrow.parquet as pq
+
+    pf   = pq.ParquetFile(path)
+    cols = [c for c in columns if c in pf.schema_arrow.names]
+    for batch in pf.iter_batches(batch_size=chunksize, row_groups=groups, columns=cols):
+        yield coerce_input(batch.to_pandas())
+
+
+def _score_shard(task):
+    (index, source, spec, names, part_dir, out_parquet,
+     policy, id_column, chunksize, explain, baseline) = task
+
+    columns = needed_columns(_SCORER, id_column)
+    if spec[0] == "csv":
+        chunks = _read_csv_range(source, spec[1], spec[2], names, columns, chunksize)
+    else:
+        chunks = _read_parquet_groups(source, spec[1], columns, chunksize)
+
+    part    = Path(part_dir) / f"part-{index:06d}.{'parquet' if out_parquet else 'csv'}"
+    rows    = 0
+    writer  = None
+    header  = None
+    monitor = None if baseline is None else StreamingMonitor(baseline)
+    for chunk in chunks:
+        out  = score_frame(_SCORER, chunk, policy, id_column, explain, monitor)
+        rows += len(out)
+        header = list(out.columns)
+        if out_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(out, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(part, table.schema)
+            writer.write_table(table)
+        else:
+            out.to_csv(part, mode="a", header=False, index=False)
+    if writer is not None:
+        writer.close()
+    return index, rows, str(part) if rows else None, header, monitor
+
+
+# ============================================
+# Parent side
+# ============================================
+def score_file_parallel(input_path, output_path, workers=None, model_dir=config.MODEL_DIR,
+                        chunksize=DEFAULT_CHUNKSIZE, threshold=None,
+                        id_column=DEFAULT_ID_COLUMN, input_format=None, output_format=None,
+                        shard_bytes=DEFAULT_SHARD_BYTES, progress=None, explain=0, monitor=None,
+                        per_hospital=False):
+    """Parallel counterpart of batch.score_file; returns (rows_scored, seconds).
+
+    Shard statistics are merged into `monitor` when one is given.
+    """
+    global _SCORER
+
+    workers     = workers or os.cpu_count() or 1
+    in_parquet  = _is_parquet(input_path, input_format)
+    out_parquet = _is_parquet(output_path, output_format)
+
+    # At least a few shards per worker so uneven shards balance out
+    n_shards = max(workers * 4, math.ceil(os.path.getsize(input_path) / shard_bytes))
+    if in_parquet:
+        names = None
+        specs = [("parquet", groups) for groups in plan_parquet_shards(input_path, n_shards)]
+    else:
+        names, ranges = plan_csv_shards(input_path, n_shards)
+        specs = [("csv", a, b) for a, b in ranges]
+
+    start = time.perf_counter()
+    try:
+        ctx = mp.get_context("fork")
+    except ValueError:
+        ctx = mp.get_context()
+    else:
+        _SCORER = load_scorer(model_dir, per_hospital)  # inherited by the forked workers
+        if explain:
+            explainer_for(_SCORER)                      # reference row built once, inherited too
+
+    policy   = load_policy(model_dir, threshold, per_hospital)
+    rows     = 0
+    part_dir = tempfile.mkdtemp(prefix="readmission-shards-", dir=Path(output_path).parent)
+    tasks    = [
+        (i, str(input_path), spec, names, part_dir, out_parquet, policy, id_column, chunksize,
+         explain, None if monitor is None else monitor.baseline)
+        for i, spec in enumerate(specs)
+    ]
+    try:
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(str(model_dir), per_hospital)) as pool, \
+                _PartConcatenator(output_path, out_parquet) as sink:
+            for _, n, part, header, shard_monitor in pool.imap(_score_shard, tasks):
+                if part is not None:
+                    sink.append(part, header)
+                if shard_monitor is not None:
+                    monitor.merge(shard_monitor)
+                rows += n
+                if progress:
+                    progress(rows, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+    return rows, time.perf_counter() - start
+
+
+class _PartConcatenator:
+    """Append finished part files to the final output, in order."""
+
+    def __init__(self, path, parquet):
+        self.path    = Path(path)
+        self.parquet = parquet
+        self._writer = None
+        self._file   = None
+
+    def append(self, part, header):
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(part)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            if self._file is None:
+                self._file = open(self.path, "wb")
+                self._file.write((",".join(header) + "\n").encode())
+            with open(part, "rb") as src:
+                shutil.copyfileobj(src, self._file, 1 << 20)
+        os.remove(part)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        elif not self.parquet and not self.path.exists() and exc_type is None:
+            # Empty input: still leave a file with just the header (not after a failed run)
+            pd.DataFrame(columns=["probability", "prediction", "risk_tier"]).to_csv(self.path, index=False)
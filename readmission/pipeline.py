@@ -0,0 +1,85 @@
+# ============================================
+# Content-addressed stage cache
+#
+# A pipeline is a small DAG of stages.  Each
+# stage's cache key is a SHA-256 over its name,
+# code version, parameters and the keys of its
+# inputs - so keys are known before anything
+# runs.  Stages are evaluated lazily: if a
+# stage's output is already on disk, none of its
+# upstream stages are loaded or recomputed.
+# ============================================
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import joblib
+
+
+class Pipeline:
+    def __init__(self, cache_dir, enabled=True, log=print):
+        self.cache_dir = Path(cache_dir)
+        self.enabled   = enabled
+        self.log       = log or (lambda *a, **k: None)
+        self.timings   = {}
+
+    def stage(self, name, fn, inputs=(), params=None, version="1", cache=True):
+        """Declare a stage; `fn(*input_values, **params)` produces its output."""
+        return Stage(self, name, fn, tuple(inputs), dict(params or {}), version, cache)
+
+
+class Stage:
+    def __init__(self, pipeline, name, fn, inputs, params, version, cache):
+        self.pipeline = pipeline
+        self.name     = name
+        self.fn       = fn
+        self.inputs   = inputs
+        self.params   = params
+        self.cache    = cache
+        payload = {
+            "stage":   name,
+            "version": version,
+            "params":  params,
+            "inputs":  [s.key for s in inputs],
+        }
+        blob     = json.dumps(payload, sort_keys=True, default=str).encode()
+        self.key = hashlib.sha256(blob).hexdigest()
+        self._value    = None
+        self._computed = False
+
+    @property
+    def path(self):
+        return self.pipeline.cache_dir / f"{self.name}-{self.key[:16]}.joblib"
+
+    def value(self):
+        if self._computed:
+            return self._value
+
+        pipe  = self.pipeline
+        start = time.perf_counter()
+        use_cache = pipe.enabled and self.cache
+        if use_cache and self.path.exists():
+            self._value = joblib.load(self.path)
+            status = "cached"
+        else:
+            args        = [s.value() for s in self.inputs]
+            start       = time.perf_counter()      # exclude upstream time
+            self._value = self.fn(*args, **self.params)
+            status      = "ran"
+            if use_cache:
+                _atomic_dump(self._value, self.path)
+
+        elapsed = time.perf_counter() - start
+        pipe.timings[self.name] = (status, elapsed)
+        pipe.log(f"  {self.name:<10} {status:<7} {elapsed:8.2f}s  [{self.key[:10]}]")
+        self._computed = True
+        return self._value
+
+
+def _atomic_dump(value, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    joblib.dump(value, tmp)
+    os.replace(tmp, path)
@@ -0,0 +1,227 @@
+# ============================================
+# Memory-bounded minority oversampling
+#
+# imblearn's SMOTE fits an exact nearest-
+# neighbour model on the minority class and
+# builds the synthetic rows through several
+# temporary copies.  blocked_smote() does the
+# same interpolation with
+#
+#   - a float32 neighbour search over blocks of
+#     minority rows (block x candidates distance
+#     tiles, searched in parallel threads)
+#   - approximate beyond MAX_CANDIDATES minority
+#     rows: neighbours are drawn from a fixed
+#     random subset of candidates
+#   - synthetic rows written in chunks straight
+#     into one preallocated output matrix
+#
+# resample() is the single entry point used by
+# the training pipeline and the search:
+#   "smote"   imblearn SMOTE (notebook behaviour)
+#   "blocked" blocked_smote
+#   "none"    no resampling - rely on
+#             class_weight="balanced" instead
+#
+# Benchmark against the notebook path:
+#   python -m readmission.resampling --repeat 20
+# ============================================
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from joblib import Parallel, delayed
+
+
+METHODS = ("smote", "blocked", "none")
+
+# Above this many minority rows the neighbour search goes approximate
+MAX_CANDIDATES = 10_000
+
+
+def resample(X, y, method="smote", random_state=42, **kwargs):
+    """Balance (X, y) with the named method; returns (X_res, y_res)."""
+    if method == "smote":
+        from imblearn.over_sampling import SMOTE
+
+        return SMOTE(random_state=random_state, **kwargs).fit_resample(X, y)
+    if method == "blocked":
+        return blocked_smote(X, y, random_state=random_state, **kwargs)
+    if method == "none":
+        return X, y
+    raise ValueError(f"unknown resampling method {method!r}")
+
+
+# ============================================
+# Blocked neighbour search
+# ============================================
+def _block_neighbors(block, candidates, cand_sq, k, offset, self_match):
+    d = cand_sq[None, :] - 2.0 * (block @ candidates.T)
+    if self_match:
+        # Exclude each row itself (same ordering as `candidates`)
+        d[np.arange(len(block)), offset + np.arange(len(block))] = np.inf
+    idx   = np.argpartition(d, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(d, idx, axis=1).argsort(axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1).astype(np.int32)
+
+
+def minority_neighbors(Xm, k=5, block_size=512, max_candidates=None, n_jobs=-1, random_state=42):
+    """k nearest minority neighbours of every minority row, as an (m, k) index table.
+
+    With `max_candidates`, neighbours are searched among that many randomly
+    chosen minority rows only (approximate, O(m * max_candidates)).
+    """
+    m = len(Xm)
+    if max_candidates is not None and max_candidates < m:
+        rng     = np.random.default_rng(random_state)
+        cand_ix = np.sort(rng.choice(m, max_candidates, replace=False))
+    else:
+        cand_ix = None
+    exact      = cand_ix is None
+    candidates = Xm if exact else Xm[cand_ix]
+    cand_sq    = np.einsum("ij,ij->i", candidates, candidates)
+    # Exact: self excluded in the tile.  Approximate: one spare, dropped below.
+    k_search   = min(k, m - 1) if exact else min(k + 1, len(candidates))
+
+    blocks = [(lo, min(lo + block_size, m)) for lo in range(0, m, block_size)]
+    parts  = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_block_neighbors)(Xm[lo:hi], candidates, cand_sq, k_search, lo, exact)
+        for lo, hi in blocks
+    )
+    nn = np.concatenate(parts)
+    if not exact:
+        nn   = cand_ix[nn]
+        keep = np.argsort(nn == np.arange(m)[:, None], axis=1, kind="stable")[:, :k_search - 1]
+        nn   = np.take_along_axis(nn, keep, axis=1)
+    return nn
+
+
+# ============================================
+# Oversampling
+# ============================================
+def blocked_smote(X, y, k_neighbors=5, block_size=512, chunk_size=65536,
+                  max_candidates=MAX_CANDIDATES, n_jobs=-1, random_state=42):
+    """SMOTE with a blocked float32 neighbour search and chunked generation.
+
+    Neighbour search is exact up to `max_candidates` minority rows and
+    approximate beyond (None: always exact).  Accepts a dense array or a
+    scipy sparse matrix; the output keeps X's float dtype, original rows
+    first and synthetic minority rows appended.
+    """
+    y        = np.asarray(y)
+    classes, counts = np.unique(y, return_counts=True)
+    minority = classes[counts.argmin()]
+    n_new    = counts.max() - counts.min()
+    if n_new == 0:
+        return X, y
+
+    sparse   = hasattr(X, "tocsr")
+    min_rows = np.flatnonzero(y == minority)
+    Xm       = X[min_rows].toarray() if sparse else np.asarray(X[min_rows])
+    Xm32     = np.ascontiguousarray(Xm, dtype=np.float32)
+    nn       = minority_neighbors(Xm32, k_neighbors, block_size, max_candidates, n_jobs, random_state)
+
+    rng   = np.random.default_rng(random_state)
+    base  = rng.integers(0, len(min_rows), n_new)
+    pick  = nn[base, rng.integers(0, nn.shape[1], n_new)]
+    gap   = rng.random(n_new, dtype=np.float32)[:, None]
+
+    n, d  = X.shape
+    dtype = X.dtype if np.issubdtype(X.dtype, np.floating) else np.float64
+    y_res = np.concatenate([y, np.full(n_new, minority, dtype=y.dtype)])
+    if sparse:
+        from scipy import sparse as sp
+
+        synth = np.empty((n_new, d), dtype=dtype)
+        _interpolate(Xm, base, pick, gap, synth, chunk_size)
+        return sp.vstack([X, sp.csr_matrix(synth)], format="csr"), y_res
+
+    X_res = np.empty((n + n_new, d), dtype=dtype, order="F")
+    X_res[:n] = X
+    _interpolate(Xm, base, pick, gap, X_res[n:], chunk_size)
+    return X_res, y_res
+
+
+def _interpolate(Xm, base, pick, gap, out, chunk_size):
+    for lo in range(0, len(base), chunk_size):
+        hi = min(lo + chunk_size, len(base))
+        a  = Xm[base[lo:hi]]
+        out[lo:hi] = a + gap[lo:hi] * (Xm[pick[lo:hi]] - a)
+
+
+# ============================================
+# Benchmark
+# ============================================
+def _tile(X, y, repeat, random_state):
+    if repeat <= 1:
+        return X, y
+    # Larger history: repeated rows with small numeric jitter (no exact ties)
+    rng = np.random.default_rng(random_state)
+    X   = np.tile(np.asarray(X), (repeat, 1))
+    X  += rng.normal(0, 1e-3, X.shape) * (X % 1 != 0)
+    return X, np.tile(np.asarray(y), repeat)
+
+
+def benchmark(split, methods=METHODS, repeat=1, threshold=0.31, random_state=42,
+              postprocess=None, log=print):
+    """Time each method on the training split and score the refitted model on the test split.
+
+    `postprocess(X_res)` is applied to resampled matrices before fitting.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import precision_score, recall_score
+
+    X, y = _tile(split["X_train"], split["y_train"], repeat, random_state)
+    log(f"Training rows: {len(y):,}  (minority {int((y == 1).sum()):,})")
+    log(f"{'method':<8} {'resample s':>10} {'peak MB':>8} {'rows out':>10} {'fit s':>7} "
+        f"{'recall':>7} {'precision':>9}")
+    results = []
+    for method in methods:
+        tracemalloc.start()
+        start  = time.perf_counter()
+        Xr, yr = resample(X, y, method, random_state)
+        elapsed = time.perf_counter() - start
+        peak    = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        if postprocess is not None and method != "none":
+            postprocess(Xr)
+
+        start = time.perf_counter()
+        model = LogisticRegression(max_iter=1000, class_weight="balanced").fit(Xr, yr)
+        fit_s = time.perf_counter() - start
+        pred  = (model.predict_proba(np.asarray(split["X_test"]))[:, 1] >= threshold).astype(int)
+        row = {
+            "method":    method,
+            "seconds":   elapsed,
+            "peak_mb":   peak,
+            "rows":      len(yr),
+            "fit_s":     fit_s,
+            "recall":    recall_score(split["y_test"], pred),
+            "precision": precision_score(split["y_test"], pred),
+        }
+        log(f"{method:<8} {elapsed:>10.2f} {peak:>8.0f} {len(yr):>10,} {fit_s:>7.2f} "
+            f"{row['recall']:>7.3f} {row['precision']:>9.3f}")
+        results.append(row)
+    return results
+
+
+def main(argv=None):
+    from readmission import config
+    from readmission.train import INTEGER_COLUMNS, _truncate_columns, build_pipeline
+
+    parser = argparse.ArgumentParser(description="Compare resampling methods on the training split.")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--repeat", type=int, default=1, help="tile the training split N times")
+    parser.add_argument("--threshold", type=float, default=config.OPTIMAL_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    _, stages = build_pipeline(log=None)
+    benchmark(stages["split"].value(), args.methods, args.repeat, args.threshold,
+              postprocess=lambda X: _truncate_columns(X, INTEGER_COLUMNS))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# ============================================
+# Result assembly
+#
+# Turns an array of readmission probabilities
+# into everything the consumers show: binary
+# prediction at the decision threshold,
+# probability in % (rounded as on the result
+# card) and risk tier - for the whole array at
+# once.  The app, the batch CLI and the HTTP
+# service all go through assemble(), so there
+# is one definition of the tiering.
+#
+# Tiers come from the model's artifacts (by
+# default config.RISK_TIERS): a positive
+# prediction gets the first (label, cutoff %)
+# whose cutoff its rounded probability reaches;
+# negative predictions get the negative tier.
+# The rounding is percent(), which every
+# consumer displays too.  Rows whose probability
+# is NaN (a numeric field was missing) have no
+# result.
+# ============================================
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from readmission import config
+from readmission.instrumentation import STAGES
+
+
+class Results:
+    """Column arrays for a batch of scored records."""
+
+    def __init__(self, probability, prediction, probability_pct, tier_code, labels, valid):
+        self.probability     = probability          # float64
+        self.prediction      = prediction           # int8
+        self.probability_pct = probability_pct      # float64, 1 decimal
+        self.tier_code       = tier_code            # int8 index into labels
+        self.labels          = labels               # tier names
+        self.valid           = valid                # bool
+
+    def __len__(self):
+        return len(self.probability)
+
+    @property
+    def tier(self):
+        """Tier names as an object array (None where invalid)."""
+        names = np.asarray(self.labels + [None], dtype=object)
+        return names[np.where(self.valid, self.tier_code, len(self.labels))]
+
+    def to_frame(self, index=None):
+        """Nullable columns: probability, prediction (Int8), risk_tier (string)."""
+        prediction = pd.array(self.prediction, dtype="Int8")
+        tier       = pd.array(self.tier, dtype="string")
+        prediction[~self.valid] = pd.NA
+        return pd.DataFrame(
+            {"probability": self.probability, "prediction": prediction, "risk_tier": tier},
+            index=index,
+        )
+
+    def to_records(self):
+        """One JSON-ready dict per row; all fields None where invalid."""
+        cols = (self.probability.tolist(), self.probability_pct.tolist(),
+                self.prediction.tolist(), self.tier.tolist(), self.valid.tolist())
+        empty = {"probability": None, "probability_pct": None, "prediction": None, "risk_tier": None}
+        return [
+            {"probability": p, "probability_pct": pct, "prediction": pred, "risk_tier": t}
+            if ok else dict(empty)
+            for p, pct, pred, t, ok in zip(*cols)
+        ]
+
+
+class Policy(namedtuple("Policy", ["threshold", "tiers", "negative_tier"])):
+    """Decision threshold and risk tiers; assemble(probability, *policy)."""
+
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, artifacts, threshold=None):
+        """The artifacts' own threshold and tiers; an explicit `threshold` overrides."""
+        return cls(artifacts.threshold if threshold is None else threshold,
+                   artifacts.risk_tiers, artifacts.negative_tier)
+
+
+DEFAULT_POLICY = Policy(config.OPTIMAL_THRESHOLD, config.RISK_TIERS, config.NEGATIVE_TIER)
+
+
+def percent(probability):
+    """Probability in %, to 1 decimal - the one rounding rule for tiers and display."""
+    return np.round(np.asarray(probability, dtype=np.float64) * 100, 1)
+
+
+def assemble(probability, threshold=config.OPTIMAL_THRESHOLD, tiers=config.RISK_TIERS,
+             negative_tier=config.NEGATIVE_TIER):
+    """Prediction, probability % and risk tier for an array of probabilities."""
+    probability = np.asarray(probability, dtype=np.float64).reshape(-1)
+    valid       = ~np.isnan(probability)
+    prediction  = (probability >= threshold).astype(np.int8)
+    prob_pct    = percent(probability)
+
+    labels    = [label for label, _ in tiers] + [negative_tier]
+    positive  = prediction == 1
+    tier_code = np.full(len(probability), len(tiers), dtype=np.int8)
+    # Lowest tier first, so higher tiers overwrite it
+    for code in range(len(tiers) - 1, -1, -1):
+        tier_code[positive & (prob_pct >= tiers[code][1])] = code
+    return Results(probability, prediction, prob_pct, tier_code, labels, valid)
+
+
+def predict_one(artifacts, record, cache):
+    """The app's predict click: (probability, result dict) for one form record.
+
+    The probability is answered from `cache` (readmission.cache) when the same
+    record was scored by the same artifacts version.
+    """
+    with STAGES.time("predict"):
+        probability = cache.get_or_compute(
+            record, artifacts.version,
+            lambda: artifacts.scorer.predict_proba(record)[0][1],
+        )
+    with STAGES.time("assemble"):
+        result = assemble([probability], *Policy.of(artifacts)).to_records()[0]
+    return probability, result
@@ -0,0 +1,157 @@
+# ============================================
+# Closed-form scoring engine
+#
+# model.pkl is a binary LogisticRegression, so
+#   P(readmit) = sigmoid(x_scaled . coef + intercept)
+#
+# LogisticScorer reads coef_/intercept_ and the
+# scaler parameters out of the artifacts once and
+# scores whole batches with one matmul, skipping
+# sklearn's per-call input validation.  The math
+# is the same sequence of float64 operations as
+# LogisticRegression.predict_proba, so results
+# match sklearn exactly.
+#
+# Parity check against sklearn on the dataset:
+#   python -m readmission.scoring --check
+# ============================================
+import argparse
+import sys
+
+import numpy as np
+from scipy.special import expit
+
+from readmission.encoder import FeatureEncoder
+from readmission.instrumentation import STAGES
+
+
+class LogisticScorer:
+    """Vectorized scorer for a fitted binary LogisticRegression."""
+
+    def __init__(self, coef, intercept, encoder):
+        coef = np.asarray(coef, dtype=np.float64)
+        if coef.ndim == 1:
+            coef = coef.reshape(1, -1)
+        if coef.shape != (1, encoder.n_features):
+            raise ValueError(
+                f"Expected coefficients of shape (1, {encoder.n_features}), got {coef.shape}"
+            )
+        self.encoder   = encoder
+        self.coef      = coef
+        self.intercept = np.asarray(intercept, dtype=np.float64).reshape(1)
+        # Same operand layout sklearn uses: X @ coef_.T
+        self._coef_T   = self.coef.T
+
+    @classmethod
+    def from_artifacts(cls, model, scaler, columns):
+        classes = getattr(model, "classes_", None)
+        if classes is None or len(classes) != 2:
+            raise TypeError("LogisticScorer needs a fitted binary classifier with coef_/intercept_")
+        return cls(model.coef_, model.intercept_, FeatureEncoder(columns, scaler))
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        """From a readmission.bundle.Bundle (arrays stay memory-mapped)."""
+        encoder = FeatureEncoder(bundle.columns, bundle.scaler)
+        return cls(bundle.arrays["coef"], bundle.arrays["intercept"], encoder)
+
+    @property
+    def columns(self):
+        return self.encoder.columns
+
+    # ----------------------------------------
+    # Scoring on an already encoded matrix
+    # ----------------------------------------
+    def decision_matrix(self, X):
+        scores = X @ self._coef_T + self.intercept
+        return scores.reshape(-1)
+
+    def score_matrix(self, X):
+        """Positive-class probability for each row of an encoded matrix."""
+        scores = self.decision_matrix(X)
+        return expit(scores, out=scores)
+
+    # ----------------------------------------
+    # Scoring raw records (see FeatureEncoder)
+    # ----------------------------------------
+    def score(self, records):
+        """Positive-class probability, shape (n_rows,)."""
+        with STAGES.time("encode"):
+            X = self.encoder.transform(records)
+        with STAGES.time("model"):
+            return self.score_matrix(X)
+
+    def predict_proba(self, records):
+        """Same layout as LogisticRegression.predict_proba: (n_rows, 2)."""
+        prob = self.score(records)
+        return np.stack([1 - prob, prob], axis=1)
+
+
+def build_scorer(model, scaler, columns):
+    """Scorer for whichever model model.pkl holds.
+
+    Linear models get the closed-form LogisticScorer; DecisionTree /
+    RandomForest / GradientBoosting classifiers are compiled into a
+    TreeScorer (readmission.tree_compiler).
+    """
+    if hasattr(model, "coef_"):
+        return LogisticScorer.from_artifacts(model, scaler, columns)
+
+    from readmission.tree_compiler import TreeScorer, is_compilable
+
+    if is_compilable(model):
+        return TreeScorer.from_artifacts(model, scaler, columns)
+    raise TypeError(f"no fast scorer for {type(model).__name__}")
+
+
+def check_sklearn_parity(scorer, model, X):
+    """Return the max absolute difference between scorer and sklearn on X."""
+    import pandas as pd
+
+    expected = model.predict_proba(pd.DataFrame(X, columns=scorer.columns))
+    prob     = scorer.score_matrix(X)
+    actual   = np.stack([1 - prob, prob], axis=1)
+    return float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    import joblib
+    import pandas as pd
+
+    from readmission import config
+
+    parser = argparse.ArgumentParser(description="Closed-form logistic regression scorer.")
+    parser.add_argument("--check", action="store_true",
+                        help="compare against sklearn predict_proba on the dataset")
+    parser.add_argument("--data", default=str(config.DATASET_PATH))
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="allowed max abs difference (default: exact)")
+    args = parser.parse_args(argv)
+
+    if not args.check:
+        parser.print_help()
+        return 0
+
+    model   = joblib.load(config.MODEL_PATH)
+    scaler  = joblib.load(config.SCALER_PATH)
+    columns = joblib.load(config.COLUMNS_PATH)
+    scorer  = LogisticScorer.from_artifacts(model, scaler, columns)
+
+    df = pd.read_csv(args.data).dropna(subset=list(scaler.feature_names_in_))
+    X  = scorer.encoder.transform(df)
+
+    # Batch parity and single-row parity (the app's shape: [0][1])
+    diff = check_sklearn_parity(scorer, model, X)
+    row  = scorer.predict_proba(df.iloc[0].to_dict())[0][1]
+    ref  = model.predict_proba(pd.DataFrame(X[:1], columns=columns))[0][1]
+    diff = max(diff, abs(row - ref))
+
+    print(f"rows checked: {len(X)}  max |sklearn - scorer|: {diff:.3e}")
+    return 0 if diff <= args.tolerance else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+# ============================================
+# Hyperparameter search
+#
+# Faster replacement for the notebook's
+# exhaustive GridSearchCV runs:
+#
+#   - random_search: sampled candidates, stops
+#     when the time budget is spent
+#   - successive_halving: every candidate starts
+#     on a small resource (training rows, or e.g.
+#     n_estimators) and only the best 1/factor
+#     survive to the next, larger round
+#
+# Stratified folds come from the shared fold
+# cache (readmission.folds): built and resampled
+# once, memory-mapped by every later search, and
+# shared by every candidate; (candidate, fold)
+# fits run in parallel through joblib.  Results mirror
+# GridSearchCV: best_params_, best_score_,
+# best_estimator_, cv_results_.
+#
+# Usage:
+#   python -m readmission.search --model decision_tree
+#   python -m readmission.search --model gradient_boosting --strategy random --budget 120
+# ============================================
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+from sklearn.tree import DecisionTreeClassifier
+
+from readmission.folds import FoldCache, build_folds
+from readmission.resampling import METHODS
+
+
+# Search spaces from the notebook's GridSearchCV cells
+MODEL_SPACES = {
+    "decision_tree": {
+        "label":     "Decision Tree",
+        "estimator": lambda: DecisionTreeClassifier(random_state=42),
+        "params": {
+            "max_depth":         [3, 5, 8, 12],
+            "min_samples_split": [5, 10, 20],
+            "min_samples_leaf":  [5, 10, 20],
+            "class_weight":      ["balanced"],
+        },
+        "resource": "n_samples",
+    },
+    "random_forest": {
+        "label":     "Random Forest",
+        "estimator": lambda: RandomForestClassifier(random_state=42),
+        "params": {
+            "n_estimators":      [100, 200, 300],
+            "max_depth":         [5, 8, 12],
+            "min_samples_split": [5, 10],
+            "min_samples_leaf":  [2, 5],
+            "class_weight":      ["balanced"],
+        },
+        "resource": "n_samples",
+    },
+    "gradient_boosting": {
+        "label":     "Gradient Boosting",
+        "estimator": lambda: GradientBoostingClassifier(random_state=42),
+        "params": {
+            "n_estimators":  [100, 200],
+            "learning_rate": [0.01, 0.05, 0.1],
+            "max_depth":     [3, 5, 8],
+        },
+        "resource": "n_samples",
+    },
+}
+
+
+# ============================================
+# Evaluation
+# ============================================
+def _fit_and_score(estimator, params, fold, scorer, n_samples=None, resource_param=None, resource=None):
+    est = clone(estimator).set_params(**params)
+    if resource_param is not None:
+        est.set_params(**{resource_param: resource})
+    X, y = fold.X_train, fold.y_train
+    if n_samples is not None and n_samples < len(y):
+        X, y = X[:n_samples], y[:n_samples]
+    start = time.perf_counter()
+    est.fit(X, y)
+    fit_time = time.perf_counter() - start
+    return scorer(est, fold.X_val, fold.y_val), fit_time
+
+
+def _evaluate(estimator, candidates, folds, scorer, n_jobs, **resource):
+    tasks = [(i, f) for i in range(len(candidates)) for f in range(len(folds))]
+    out = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_score)(estimator, candidates[i], folds[f], scorer, **resource)
+        for i, f in tasks
+    )
+    scores    = np.zeros((len(candidates), len(folds)))
+    fit_times = np.zeros_like(scores)
+    for (i, f), (score, fit_time) in zip(tasks, out):
+        scores[i, f]    = score
+        fit_times[i, f] = fit_time
+    return scores, fit_times
+
+
+class SearchResult:
+    """GridSearchCV-style summary of a search."""
+
+    def __init__(self, rows, best_params, best_score, best_estimator, elapsed):
+        self.cv_results_     = pd.DataFrame(rows)
+        self.best_params_    = best_params
+        self.best_score_     = best_score
+        self.best_estimator_ = best_estimator
+        self.n_candidates_   = self.cv_results_["params"].astype(str).nunique() if rows else 0
+        self.elapsed_        = elapsed
+
+
+def _finish(estimator, rows, X, y, resample, random_state, refit, start, integer_columns=()):
+    final = max(rows, key=lambda r: (r["resource"], r["mean_test_score"]))
+    final_rows = [r for r in rows if r["resource"] == final["resource"]]
+    best = max(final_rows, key=lambda r: r["mean_test_score"])
+
+    best_estimator = None
+    if refit:
+        from readmission.train import resample_data
+
+        # Resampled exactly like the CV folds (integer columns truncated)
+        split = {"X_train": np.asarray(X, dtype=np.float64), "y_train": np.asarray(y)}
+        X_fit, y_fit = resample_data(split, resample, random_state, integer_columns)
+        best_estimator = clone(estimator).set_params(**best["params"]).fit(X_fit, y_fit)
+    return SearchResult(rows, best["params"], best["mean_test_score"], best_estimator,
+                        time.perf_counter() - start)
+
+
+def _rows(candidates, scores, fit_times, round_no, resource):
+    return [
+        {
+            "params":          params,
+            "round":           round_no,
+            "resource":        resource,
+            "mean_test_score": float(scores[i].mean()),
+            "std_test_score":  float(scores[i].std()),
+            "mean_fit_time":   float(fit_times[i].mean()),
+        }
+        for i, params in enumerate(candidates)
+    ]
+
+
+# ============================================
+# Strategies
+# ============================================
+def random_search(estimator, param_space, X, y, n_iter=20, time_budget=None, scoring="recall",
+                  cv=5, resample="smote", n_jobs=-1, random_state=42, refit=True, folds=None,
+                  integer_columns=()):
+    """Evaluate up to `n_iter` sampled candidates, stopping once `time_budget` seconds pass.
+
+    `integer_columns` are truncated after resampling, in the folds and the refit.
+    """
+    start    = time.perf_counter()
+    folds    = folds if folds is not None else build_folds(X, y, cv, resample, random_state,
+                                                           integer_columns)
+    scorer   = get_scorer(scoring)
+    n_total  = _space_size(param_space)
+    sampler  = (list(ParameterGrid(param_space)) if n_total is not None and n_total <= n_iter
+                else list(ParameterSampler(param_space, n_iter, random_state=random_state)))
+    n_jobs_eff = max(1, n_jobs if n_jobs > 0 else _cpu_count())
+
+    rows = []
+    for lo in range(0, len(sampler), n_jobs_eff):
+        if time_budget is not None and rows and time.perf_counter() - start > time_budget:
+            break
+        batch = sampler[lo:lo + n_jobs_eff]
+        scores, fit_times = _evaluate(estimator, batch, folds, scorer, n_jobs)
+        rows += _rows(batch, scores, fit_times, 0, 0)
+    return _finish(estimator, rows, X, y, resample, random_state, refit, start, integer_columns)
+
+
+def successive_halving(estimator, param_space, X, y, factor=3, resource="n_samples",
+                       min_resources=None, max_resources=None, n_candidates=None,
+                       time_budget=None, scoring="recall", cv=5, resample="smote",
+                       n_jobs=-1, random_state=42, refit=True, folds=None, integer_columns=()):
+    """Successive halving over a grid (or `n_candidates` samples of it).
+
+    `resource` is "n_samples" (rows of each resampled training fold) or the
+    name of an estimator parameter such as "n_estimators".  `integer_columns`
+    as in random_search.
+    """
+    start  = time.perf_counter()
+    folds  = folds if folds is not None else build_folds(X, y, cv, resample, random_state,
+                                                         integer_columns)
+    scorer = get_scorer(scoring)
+
+    if n_candidates is None:
+        candidates = list(ParameterGrid(param_space))
+    else:
+        candidates = list(ParameterSampler(param_space, n_candidates, random_state=random_state))
+
+    if resource == "n_samples":
+        max_resources = max_resources or min(len(f.y_train) for f in folds)
+    elif max_resources is None:
+        raise ValueError("max_resources is required when resource is an estimator parameter")
+    n_rounds = max(1, math.ceil(math.log(len(candidates), factor)) + 1) if len(candidates) > 1 else 1
+    if min_resources is None:
+        min_resources = max(1, int(max_resources / factor ** (n_rounds - 1)))
+
+    rows = []
+    for round_no in range(n_rounds):
+        r = int(min(max_resources, min_resources * factor ** round_no))
+        if round_no == n_rounds - 1:
+            r = int(max_resources)
+        kwargs = ({"n_samples": r} if resource == "n_samples"
+                  else {"resource_param": resource, "resource": r})
+        scores, fit_times = _evaluate(estimator, candidates, folds, scorer, n_jobs, **kwargs)
+        round_rows = _rows(candidates, scores, fit_times, round_no, r)
+        rows += round_rows
+
+        over_budget = time_budget is not None and time.perf_counter() - start > time_budget
+        if len(candidates) == 1 or round_no == n_rounds - 1 or over_budget:
+            break
+        keep = max(1, len(candidates) // factor)
+        order = np.argsort([-row["mean_test_score"] for row in round_rows], kind="stable")
+        candidates = [candidates[i] for i in order[:keep]]
+
+    if resource != "n_samples":
+        # Report (and refit) the resource value as a regular parameter
+        for row in rows:
+            row["params"] = {**row["params"], resource: row["resource"]}
+    return _finish(estimator, rows, X, y, resample, random_state, refit, start, integer_columns)
+
+
+def _space_size(param_space):
+    try:
+        return len(ParameterGrid(param_space))
+    except TypeError:                        # contains continuous distributions
+        return None
+
+
+def _cpu_count():
+    import os
+
+    return os.cpu_count() or 1
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    from readmission.train import INTEGER_COLUMNS, build_pipeline
+
+    parser = argparse.ArgumentParser(description="Hyperparameter search for the candidate models.")
+    parser.add_argument("--model", choices=sorted(MODEL_SPACES), default="decision_tree")
+    parser.add_argument("--strategy", choices=["halving", "random"], default="halving")
+    parser.add_argument("--budget", type=float, default=None, help="time budget in seconds")
+    parser.add_argument("--n-iter", type=int, default=20, help="random search candidates")
+    parser.add_argument("--factor", type=int, default=3, help="halving elimination factor")
+    parser.add_argument("--scoring", default="recall")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--resample", choices=METHODS, default="smote")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args(argv)
+
+    _, stages = build_pipeline(log=None)
+    split = stages["split"].value()
+    X, y  = split["X_train"], split["y_train"]
+    folds = FoldCache(cv=args.cv, resample=args.resample, integer_columns=INTEGER_COLUMNS).get(X, y)
+
+    space = MODEL_SPACES[args.model]
+    common = dict(time_budget=args.budget, scoring=args.scoring, cv=args.cv, resample=args.resample,
+                  n_jobs=args.n_jobs, folds=folds, integer_columns=INTEGER_COLUMNS)
+    if args.strategy == "halving":
+        result = successive_halving(space["estimator"](), space["params"], X, y,
+                                    factor=args.factor, resource=space["resource"], **common)
+    else:
+        result = random_search(space["estimator"](), space["params"], X, y, n_iter=args.n_iter, **common)
+
+    print(f"Evaluated {result.n_candidates_} candidates in {result.elapsed_:.1f}s")
+    print(f"Best {space['label']} Parameters:")
+    print(result.best_params_)
+    print(f"Best CV {args.scoring}: {result.best_score_:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+# ============================================
+# HTTP scoring service (asyncio, stdlib only)
+#
+# A small JSON endpoint for programmatic callers
+# such as the EHR integration, running alongside
+# the Streamlit UI.  Concurrent requests are
+# gathered into micro-batches (up to --max-batch
+# records or --max-delay-ms, whichever comes
+# first) and each batch is scored with a single
+# vectorized LogisticScorer call.
+#
+# Endpoints:
+#   POST /predict   one record, a list of records,
+#                   or {"records": [...]}
+#   GET  /metrics   latency percentiles, throughput,
+#                   per-stage timings
+#   GET  /metrics/prometheus
+#                   stage histograms as Prometheus text
+#   GET  /debug/profile[?format=collapsed]
+#                   sampling profiler (--profile)
+#   GET  /monitor   input drift / calibration report
+#                   (readmission.monitoring)
+#   GET  /hospitals routed hospitals and model cache
+#                   stats (--per-hospital)
+#   GET  /health
+#
+# Usage:
+#   python -m readmission.service --port 8000
+#   python -m readmission.service --profile
+#   python -m readmission.service --per-hospital   # route by hospital_id
+# ============================================
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from readmission import config
+from readmission.artifacts import load_artifacts
+from readmission.dataset import coerce_record
+from readmission.instrumentation import PROFILER, STAGES, maybe_start_profiler
+from readmission.hospitals import router_for
+from readmission.monitoring import monitor_for
+from readmission.results import DEFAULT_POLICY, Policy, assemble
+
+
+MAX_BODY_BYTES = 8 << 20
+
+
+# ============================================
+# Micro-batching
+# ============================================
+class MicroBatcher:
+    """Coalesce concurrent scoring requests into one vectorized call."""
+
+    def __init__(self, scorer_fn, max_batch=256, max_delay_ms=2.0,
+                 policy_fn=lambda: DEFAULT_POLICY, monitor_fn=None):
+        self.scorer_fn  = scorer_fn         # () -> current LogisticScorer
+        self.policy_fn  = policy_fn         # () -> current results.Policy
+        self.monitor_fn = monitor_fn        # scorer -> StreamingMonitor or None
+        self.max_batch  = max_batch
+        self.max_delay  = max_delay_ms / 1000.0
+        self.stats      = ServiceStats()
+        self._queue     = None
+        self._task      = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task  = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, records):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size     = len(pending[0][0])
+            deadline = loop.time() + self.max_delay
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._score(pending)
+
+    def _score(self, pending):
+        records = [r for recs, _ in pending for r in recs]
+        try:
+            with STAGES.time("batch"):
+                results = self.score_records(records)
+        except Exception as exc:
+            if len(pending) == 1:
+                _, future = pending[0]
+                if not future.done():
+                    future.set_exception(exc)
+                return
+            # Re-score each request on its own, so only the one that
+            # cannot be scored fails
+            for item in pending:
+                self._score([item])
+            return
+        self.stats.record_batch()
+        offset = 0
+        for recs, future in pending:
+            if not future.done():
+                future.set_result(results[offset:offset + len(recs)])
+            offset += len(recs)
+
+    def score_records(self, records):
+        scorer    = self.scorer_fn()
+        policy    = self.policy_fn()
+        threshold = policy.threshold        # None: each record's hospital threshold
+        monitor   = self.monitor_fn(scorer) if self.monitor_fn else None
+        X         = None
+        if monitor is not None:
+            with STAGES.time("encode"):
+                X = scorer.encoder.transform(records)
+        if X is not None and hasattr(scorer, "score_matrix"):
+            with STAGES.time("model"):
+                probability = scorer.score_matrix(X)
+        elif threshold is None:
+            # Routed (readmission.hospitals): each hospital model encodes its own rows
+            probability, threshold = scorer.score_with_thresholds(records)
+        else:
+            probability = scorer.score(records)
+        if monitor is not None:
+            with STAGES.time("monitor"):
+                monitor.observe(X, probability)
+        # NaN probabilities (a numeric field was null) come back as all-None
+        with STAGES.time("assemble"):
+            return assemble(probability, threshold, policy.tiers, policy.negative_tier).to_records()
+
+
+class ServiceStats:
+    """Rolling latency window plus lifetime throughput counters."""
+
+    def __init__(self, window=10_000):
+        self.started   = time.monotonic()
+        self.latencies = deque(maxlen=window)
+        self.requests  = 0
+        self.records   = 0
+        self.batches   = 0
+        self.errors    = 0
+
+    def record_request(self, seconds, n_records):
+        self.latencies.append(seconds)
+        self.requests += 1
+        self.records  += n_records
+
+    def record_batch(self):
+        self.batches += 1
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        lat_ms = np.asarray(self.latencies) * 1000.0
+        p50, p90, p99 = np.percentile(lat_ms, [50, 90, 99]) if len(lat_ms) else (0.0, 0.0, 0.0)
+        return {
+            "uptime_s":            round(uptime, 3),
+            "requests":            self.requests,
+            "records":             self.records,
+            "batches":             self.batches,
+            "errors":              self.errors,
+            "mean_batch_records":  round(self.records / self.batches, 2) if self.batches else 0.0,
+            "requests_per_s":      round(self.requests / uptime, 2) if uptime else 0.0,
+            "records_per_s":       round(self.records / uptime, 2) if uptime else 0.0,
+            "latency_ms": {
+                "p50": round(float(p50), 3),
+                "p90": round(float(p90), 3),
+                "p99": round(float(p99), 3),
+                "window": len(lat_ms),
+            },
+        }
+
+
+# ============================================
+# HTTP layer
+# ============================================
+class ScoringService:
+    def __init__(self, model_dir=config.MODEL_DIR, max_batch=256, max_delay_ms=2.0,
+                 threshold=None, monitoring=True, per_hospital=False):
+        self.model_dir  = model_dir
+        self.router     = router_for(str(model_dir)) if per_hospital else None
+        self.threshold  = threshold         # None: the model's own
+        self.monitoring = monitoring and config.DATASET_PATH.exists()
+        self.monitor    = None
+        self._monitored = None              # scorer the monitor's baseline was built for
+        self.batcher    = MicroBatcher(self._scorer, max_batch, max_delay_ms, self._policy,
+                                       self._monitor if self.monitoring else None)
+
+    def _scorer(self):
+        # Registry lookup: picks up retrained artifacts without a restart
+        if self.router is not None:
+            return self.router
+        return load_artifacts(self.model_dir).scorer
+
+    def _policy(self, routed=True):
+        # Threshold and tiers stored with the (current) model; routed
+        # records use their hospital's threshold unless one was given
+        policy = Policy.of(load_artifacts(self.model_dir), self.threshold)
+        if routed and self.router is not None and self.threshold is None:
+            policy = policy._replace(threshold=None)
+        return policy
+
+    def _monitor(self, scorer):
+        # A retrained model gets a fresh baseline (its encoder may differ);
+        # a router is keyed on its global model
+        key = getattr(scorer, "fallback", scorer)
+        if key is not self._monitored:
+            self.monitor    = monitor_for(scorer, threshold=self._policy(routed=False).threshold)
+            self._monitored = key
+        return self.monitor
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self.route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        path, _, query = path.partition("?")
+        if path == "/predict" and method == "POST":
+            return await self.predict(body)
+        if path == "/metrics" and method == "GET":
+            return 200, {**self.batcher.stats.snapshot(), "stages": STAGES.snapshot()}
+        if path == "/metrics/prometheus" and method == "GET":
+            return 200, STAGES.to_prometheus()
+        if path == "/debug/profile" and method == "GET":
+            if "format=collapsed" in query:
+                return 200, PROFILER.collapsed()
+            return 200, {"running": PROFILER.running, "samples": PROFILER.samples,
+                         "top": PROFILER.top(25)}
+        if path == "/monitor" and method == "GET":
+            if not self.monitoring:
+                return 404, {"error": "monitoring is disabled"}
+            return 200, self._monitor(self._scorer()).report()
+        if path == "/hospitals" and method == "GET":
+            if self.router is None:
+                return 404, {"error": "per-hospital routing is disabled"}
+            return 200, {"hospitals": sorted(self.router.hospitals(), key=int), **self.router.stats()}
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "model_version": load_artifacts(self.model_dir).version}
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def predict(self, body):
+        start = time.perf_counter()
+        try:
+            payload = json.loads(body or b"null")
+            if isinstance(payload, dict) and "records" in payload:
+                records, single = payload["records"], False
+            elif isinstance(payload, dict):
+                records, single = [payload], True
+            else:
+                records, single = payload, False
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                raise ValueError("expected a record object, a list of records, or {\"records\": [...]}")
+            # Checked per request, before batching: numerics as in batch
+            # files (coerce_input), anything unusable is this request's 400
+            records = [coerce_record(r) for r in records]
+            results = await self.batcher.submit(records) if records else []
+        except (ValueError, TypeError) as exc:
+            self.batcher.stats.errors += 1
+            return 400, {"error": str(exc)}
+        except Exception as exc:
+            self.batcher.stats.errors += 1
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+        elapsed = time.perf_counter() - start
+        self.batcher.stats.record_request(elapsed, len(records))
+        STAGES.observe("request", elapsed)
+        if single:
+            return 200, results[0]
+        return 200, {"results": results}
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        scorer = self._scorer()              # load artifacts before accepting traffic
+        if self.monitoring:
+            self._monitor(scorer)            # and the drift baseline
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Scoring service listening on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        return None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY_BYTES:
+        raise ConnectionError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+def _write_response(writer, status, payload, keep_alive):
+    # str payloads are plain-text exports (Prometheus, collapsed stacks)
+    if isinstance(payload, str):
+        body, ctype = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, ctype = json.dumps(payload).encode(), "application/json"
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: {ctype}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode() + body)
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model-dir", default=str(config.MODEL_DIR))
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="max records scored per vectorized call")
+    parser.add_argument("--max-delay-ms", type=float, default=2.0,
+                        help="max time a request waits for a batch to fill")
+    parser.add_argument("--threshold", type=float,
+                        help="decision threshold (default: the one stored with the model)")
+    parser.add_argument("--per-hospital", action="store_true",
+                        help="score each record with its hospital's model (readmission.hospitals)")
+    parser.add_argument("--no-monitor", action="store_true",
+                        help="do not keep drift statistics (GET /monitor)")
+    parser.add_argument("--profile", action="store_true",
+                        help="run the sampling profiler (also READMISSION_PROFILE=1)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        PROFILER.start()
+    else:
+        maybe_start_profiler()
+    service = ScoringService(args.model_dir, args.max_batch, args.max_delay_ms, args.threshold,
+                             monitoring=not args.no_monitor, per_hospital=args.per_hospital)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# ============================================
+# Synthetic discharge lists
+#
+# Generates records with the exact schema of
+# dataset/readmission_dataset.csv at any scale
+# (10k .. 10M+ rows) for benchmarking.  Rows are
+# bootstrapped from the real dataset, so the
+# joint distribution and the label signal are
+# realistic.  The integer numerics then get a
+# small clipped jitter, so large sets are not
+# made of exact duplicates.  Missing values keep
+# their original rate.
+#
+# Output is generated and written in chunks, so
+# memory stays flat however many rows you ask
+# for.  The same (n_rows, random_state) always
+# gives the same data.
+#
+# Usage:
+#   python -m readmission.synthetic 1000000 /tmp/discharges_1m.parquet
+#   python -m readmission.synthetic 100000 /tmp/discharges_100k.csv --seed 7
+# ============================================
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from readmission import config
+from readmission.dataset import load_dataset
+
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+# Integer numerics and their jitter half-width
+JITTER = {
+    "age":                  2,
+    "num_prior_admissions": 0,
+    "time_in_hospital":     1,
+    "num_lab_procedures":   3,
+    "num_medications":      2,
+}
+
+
+def _jitter(values, width, lo, hi, rng):
+    """values + U{-width..width}, clipped to [lo, hi]; NaN stays NaN."""
+    out = np.asarray(values, dtype=np.float64)
+    if width:
+        out = np.clip(out + rng.integers(-width, width + 1, size=len(out)), lo, hi)
+    return out
+
+
+def iter_synthetic(n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, random_state=0, source=config.DATASET_PATH):
+    """Yield DataFrames (dataset schema dtypes) totalling `n_rows` rows."""
+    base   = load_dataset(source)
+    bounds = {c: (float(base[c].min()), float(base[c].max())) for c in JITTER}
+    seeds  = np.random.SeedSequence(random_state).spawn(max(1, -(-n_rows // chunk_rows)))
+
+    start = 0
+    for seed in seeds:
+        n = min(chunk_rows, n_rows - start)
+        if n <= 0:
+            break
+        rng   = np.random.default_rng(seed)
+        chunk = base.take(rng.integers(0, len(base), size=n)).reset_index(drop=True)
+        for col, width in JITTER.items():
+            values = _jitter(chunk[col].to_numpy(dtype=np.float64, na_value=np.nan),
+                             width, *bounds[col], rng)
+            chunk[col] = pd.Series(values).astype(chunk[col].dtype)       # NaN -> <NA>
+        chunk["patient_id"] = np.arange(start + 1, start + n + 1, dtype=chunk["patient_id"].dtype)
+        start += n
+        yield chunk
+
+
+def generate(n_rows, random_state=0, source=config.DATASET_PATH):
+    """All `n_rows` synthetic rows as one DataFrame."""
+    return pd.concat(list(iter_synthetic(n_rows, random_state=random_state, source=source)),
+                     ignore_index=True)
+
+
+def write_synthetic(path, n_rows, random_state=0, chunk_rows=DEFAULT_CHUNK_ROWS,
+                    source=config.DATASET_PATH):
+    """Stream `n_rows` synthetic rows to a .csv or .parquet file."""
+    from readmission.batch import ChunkWriter
+
+    path = Path(path)
+    with ChunkWriter(path) as writer:
+        for chunk in iter_synthetic(n_rows, chunk_rows, random_state, source):
+            writer.write(chunk)
+    return path
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic discharge list.")
+    parser.add_argument("rows", type=int, help="number of rows, e.g. 10000 .. 10000000")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path  = write_synthetic(args.output, args.rows, args.seed, args.chunk_rows)
+    print(f"Wrote {args.rows:,} rows to {path} in {time.perf_counter() - start:.1f}s "
+          f"({path.stat().st_size / 1e6:,.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+# ============================================
+# Reproducible training pipeline
+#
+# The notebook's training path as explicit,
+# cached stages:
+#
+#   load -> clean -> fit_scaler -> design
+#        -> split -> resample -> fit -> evaluate
+#
+# and finally export of model.pkl / scaler.pkl /
+# columns.pkl in the exact form app.py consumes,
+# plus the single-file model.bundle.
+# The raw CSV is read through the typed dataset
+# loader (readmission.dataset); the design stage
+# encodes and scales the selected features in
+# one pass into a single float64 / float32 (or
+# CSR) matrix (readmission.design) instead of a
+# dense int64 get_dummies frame.  Every later
+# stage's output is cached under .cache/pipeline,
+# keyed by a content hash of the dataset, the
+# stage parameters and its inputs - so changing
+# only model hyperparameters reuses the cached
+# encoded / resampled training data.
+#
+# Usage:
+#   python -m readmission.train
+#   python -m readmission.train --C 0.5 --output-dir /tmp/model
+#   python -m readmission.train --dtype float32 --sparse   # large histories
+#   python -m readmission.train --per-hospital             # + one model per hospital_id
+# ============================================
+import argparse
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from readmission import config
+from readmission.artifacts import CURRENT_FILE, file_digest
+from readmission.bundle import build_from_pickles
+from readmission.dataset import load_dataset
+from readmission.design import build_design_matrix
+from readmission.evaluation import threshold_sweep
+from readmission.pipeline import Pipeline
+from readmission.resampling import METHODS, resample
+
+
+TARGET = "readmitted_within_30days"
+
+DROP_COLUMNS = ["patient_id", "days_to_readmission"]
+
+# Same order as the notebook's StandardScaler cell
+SCALED_COLUMNS = ["age", "num_lab_procedures", "num_medications", "time_in_hospital", "num_prior_admissions"]
+
+# Features kept after the Pearson / chi-square selection
+# (final_df1 in the notebook, minus the target) - this is
+# the list saved as columns.pkl.
+FEATURE_COLUMNS = [
+    "age", "num_prior_admissions", "time_in_hospital", "num_lab_procedures",
+    "num_medications", "has_comorbidity", "gender_Male", "gender_Other",
+    "admission_type_Emergency", "admission_type_Urgent",
+    "primary_diagnosis_code_E78", "primary_diagnosis_code_F32",
+    "primary_diagnosis_code_G47", "primary_diagnosis_code_I10",
+    "primary_diagnosis_code_I25", "primary_diagnosis_code_J45",
+    "primary_diagnosis_code_K21", "primary_diagnosis_code_M54",
+    "primary_diagnosis_code_N39", "discharge_disposition_Home",
+    "discharge_disposition_Rehabilitation", "discharge_disposition_Transfer",
+    "insurance_type_Medicare", "insurance_type_Private", "insurance_type_Self-pay",
+]
+
+# Positions of the 0/1 (unscaled) features in FEATURE_COLUMNS
+INTEGER_COLUMNS = [i for i, c in enumerate(FEATURE_COLUMNS) if c not in SCALED_COLUMNS]
+
+CACHE_DIR = config.PROJECT_ROOT / ".cache" / "pipeline"
+
+
+# ============================================
+# Stage functions
+# ============================================
+def load_data(path, sha256=None):
+    # Typed load, memory-mapped from the .npy dataset cache
+    return load_dataset(path)
+
+
+def clean_data(df):
+    df = df.drop(columns=DROP_COLUMNS).dropna()
+    # No missing values left: back to plain compact ints
+    df["num_medications"]    = df["num_medications"].astype("int16")
+    df["num_lab_procedures"] = df["num_lab_procedures"].astype("int16")
+    return df
+
+
+def fit_scaler(df):
+    from sklearn.preprocessing import StandardScaler
+
+    return StandardScaler().fit(df[SCALED_COLUMNS].astype(np.float64))
+
+
+def design_data(df, scaler, features, dtype, sparse):
+    X = build_design_matrix(df, features, scaler, dtype=np.dtype(dtype), sparse=sparse)
+    return {"X": X, "y": df[TARGET].to_numpy()}
+
+
+def split_data(design, test_size, random_state):
+    from sklearn.model_selection import train_test_split
+
+    X, y = design["X"], design["y"]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=y
+    )
+    return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+
+
+def resample_data(split, method, random_state, integer_columns=()):
+    X, y = resample(split["X_train"], split["y_train"], method, random_state)
+    if method != "none":
+        _truncate_columns(X, integer_columns)
+    return X, y
+
+
+def _truncate_columns(X, columns):
+    # SMOTE on the notebook's DataFrame cast synthetic rows back to the
+    # int64 dummy dtypes, truncating interpolated indicators - keep that.
+    if not len(columns):
+        return
+    if hasattr(X, "tocsr"):
+        mask = np.isin(X.indices, columns)
+        X.data[mask] = np.trunc(X.data[mask])
+        X.eliminate_zeros()
+    else:
+        X[:, columns] = np.trunc(X[:, columns])
+
+
+def fit_model(resampled, C, max_iter, class_weight):
+    from sklearn.linear_model import LogisticRegression
+
+    X, y  = resampled
+    model = LogisticRegression(C=C, max_iter=max_iter, class_weight=class_weight)
+    return model.fit(X, y)
+
+
+def evaluate_model(model, split, threshold):
+    y_prob = model.predict_proba(split["X_test"])[:, 1]
+    row    = threshold_sweep(split["y_test"], y_prob, [threshold]).iloc[0]
+    return {
+        "threshold": threshold,
+        "accuracy":  float(row["accuracy"]),
+        "precision": float(row["precision"]),
+        "recall":    float(row["recall"]),
+        "f1":        float(row["f1"]),
+    }
+
+
+# ============================================
+# Pipeline definition
+# ============================================
+def build_pipeline(data_path=config.DATASET_PATH, cache_dir=CACHE_DIR, use_cache=True,
+                   dtype="float64", sparse=False,
+                   test_size=0.2, random_state=42, resample="smote",
+                   C=1.0, max_iter=1000, class_weight="balanced",
+                   threshold=config.OPTIMAL_THRESHOLD, log=print):
+    """Declare all stages; returns (pipeline, stages dict). Nothing runs yet."""
+    pipe = Pipeline(cache_dir, enabled=use_cache, log=log)
+    s = {}
+    s["load"]       = pipe.stage("load", load_data,
+                                 params={"path": str(data_path), "sha256": file_digest(data_path)},
+                                 version="2", cache=False)
+    s["clean"]      = pipe.stage("clean", clean_data, [s["load"]])
+    s["fit_scaler"] = pipe.stage("fit_scaler", fit_scaler, [s["clean"]])
+    s["design"]     = pipe.stage("design", design_data, [s["clean"], s["fit_scaler"]],
+                                 params={"features": FEATURE_COLUMNS, "dtype": dtype, "sparse": sparse})
+    s["split"]      = pipe.stage("split", split_data, [s["design"]],
+                                 params={"test_size": test_size, "random_state": random_state},
+                                 version="2")
+    s["resample"]   = pipe.stage("resample", resample_data, [s["split"]],
+                                 params={"method": resample, "random_state": random_state,
+                                         "integer_columns": INTEGER_COLUMNS})
+    s["fit"]        = pipe.stage("fit", fit_model, [s["resample"]],
+                                 params={"C": C, "max_iter": max_iter, "class_weight": class_weight})
+    s["evaluate"]   = pipe.stage("evaluate", evaluate_model, [s["fit"], s["split"]],
+                                 params={"threshold": threshold}, version="2")
+    return pipe, s
+
+
+def export_artifacts(model, scaler, output_dir=config.MODEL_DIR, threshold=config.OPTIMAL_THRESHOLD):
+    """Write model.pkl / scaler.pkl / columns.pkl exactly as the notebook did,
+    plus the model.bundle built from them.  They become the live model: a
+    published online checkpoint (readmission.online) is unpinned."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if not hasattr(model, "feature_names_in_"):
+        # Fitted on a bare matrix: record the names a DataFrame fit would have
+        model.feature_names_in_ = np.asarray(FEATURE_COLUMNS, dtype=object)
+    joblib.dump(model, output_dir / "model.pkl")
+    joblib.dump(scaler, output_dir / "scaler.pkl")
+    joblib.dump(list(FEATURE_COLUMNS), output_dir / "columns.pkl")
+    build_from_pickles(output_dir, threshold=threshold)
+    (output_dir / CURRENT_FILE).unlink(missing_ok=True)
+    return output_dir
+
+
+# ============================================
+# CLI
+# ============================================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Train the readmission model and export artifacts.")
+    parser.add_argument("--data", default=str(config.DATASET_PATH))
+    parser.add_argument("--output-dir", default=str(config.MODEL_DIR))
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR))
+    parser.add_argument("--no-cache", action="store_true", help="recompute every stage")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="design matrix dtype")
+    parser.add_argument("--sparse", action="store_true", help="CSR design matrix")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--resample", choices=METHODS, default="smote",
+                        help="blocked: memory-bounded SMOTE; none: class weights only")
+    parser.add_argument("--C", type=float, default=1.0)
+    parser.add_argument("--max-iter", type=int, default=1000)
+    parser.add_argument("--class-weight", choices=["balanced", "none"], default="balanced")
+    parser.add_argument("--threshold", type=float, default=config.OPTIMAL_THRESHOLD)
+    parser.add_argument("--no-export", action="store_true", help="train and evaluate only")
+    parser.add_argument("--per-hospital", action="store_true",
+                        help="also fit one model per hospital_id (readmission.hospitals)")
+    parser.add_argument("--workers", type=int, default=-1,
+                        help="processes for --per-hospital (-1 = one per CPU)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    pipe, stages = build_pipeline(
+        data_path=args.data,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        dtype=args.dtype,
+        sparse=args.sparse,
+        test_size=args.test_size,
+        random_state=args.random_state,
+        resample=args.resample,
+        C=args.C,
+        max_iter=args.max_iter,
+        class_weight=None if args.class_weight == "none" else args.class_weight,
+        threshold=args.threshold,
+    )
+
+    print("Stages:")
+    metrics = stages["evaluate"].value()
+    print("Test metrics @ threshold {threshold}: accuracy {accuracy:.3f}  precision {precision:.3f}  "
+          "recall {recall:.3f}  f1 {f1:.3f}".format(**metrics))
+
+    if not args.no_export:
+        out = export_artifacts(stages["fit"].value(), stages["fit_scaler"].value(), args.output_dir,
+                               args.threshold)
+        print(f"Artifacts written to {out}")
+
+    if args.per_hospital and not args.no_export:
+        from readmission.hospitals import format_index, train_hospital_models
+
+        index = train_hospital_models(
+            stages["load"].value(), args.output_dir, args.workers,
+            test_size=args.test_size, random_state=args.random_state, resample=args.resample,
+            C=args.C, max_iter=args.max_iter,
+            class_weight=None if args.class_weight == "none" else args.class_weight,
+            threshold=args.threshold,
+        )
+        print(format_index(index))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+# ============================================
+# Tree-ensemble compiler
+#
+# sklearn's RandomForest / GradientBoosting
+# predict_proba dispatches every tree
+# separately, so a single app prediction with
+# the notebook's 300-tree forest costs tens of
+# milliseconds.  compile_ensemble() flattens all
+# trees of a fitted model into one set of
+# contiguous node arrays
+#
+#   feature, threshold, left, right, value
+#
+# with leaves pointing at themselves, so a batch
+# is evaluated by max_depth vectorized steps
+# that advance every (row, tree) pair at once.
+# Shallow ensembles (the forest is depth 8, the
+# boosted trees depth 3) are additionally padded
+# to complete binary trees, where a step is just
+# pos = 2 * pos + 1 + (x > threshold).
+#
+# Same arithmetic as sklearn: inputs are cast to
+# float32 before the threshold comparisons,
+# forests average the per-tree class fractions,
+# boosting adds learning_rate * leaf values to
+# the init log-odds and applies expit.
+#
+# Rows with a NaN feature (a missing numeric
+# field) get a NaN probability, as with the
+# logistic scorer, instead of whatever leaf the
+# failed comparisons lead to.
+#
+# Parity and latency against sklearn:
+#   python -m readmission.tree_compiler --model random_forest
+#   python -m readmission.tree_compiler --model gradient_boosting
+# ============================================
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy.special import expit
+
+from readmission.encoder import FeatureEncoder
+from readmission.instrumentation import STAGES
+
+
+# Cap on (rows x trees) node ids held per block
+BLOCK_NODES = 1 << 15
+
+# Shallow ensembles are also laid out as complete
+# binary trees (no child-pointer lookups) while
+# n_trees * 2**max_depth stays below this
+PERFECT_MAX_DEPTH = 12
+PERFECT_MAX_NODES = 1 << 22
+
+
+class CompiledEnsemble:
+    """Flattened binary tree ensemble; score_matrix() gives P(class 1)."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 kind, scale=1.0, init_raw=0.0):
+        self.feature   = feature
+        self.threshold = threshold
+        self.left      = left
+        self.right     = right
+        self.value     = value
+        self.roots     = roots
+        self.max_depth = max_depth
+        self.kind      = kind              # "forest" or "boosting"
+        self.scale     = scale             # forest: 1 / n_trees
+        self.init_raw  = init_raw          # boosting: prior log-odds
+        self.perfect   = None
+        if max_depth <= PERFECT_MAX_DEPTH and len(roots) << max_depth <= PERFECT_MAX_NODES:
+            self.perfect = self._perfect_layout()
+
+    def _perfect_layout(self):
+        """Each tree padded to a complete binary tree of depth max_depth.
+
+        Leaves above the bottom level point at themselves, so padding
+        positions repeat them.  Returns (feature, threshold) of shape
+        (n_trees, 2**depth - 1) and leaf values of shape (n_trees, 2**depth).
+        """
+        nodes = self.roots[:, None]
+        feature, threshold = [], []
+        for _ in range(self.max_depth):
+            feature.append(self.feature[nodes])
+            threshold.append(self.threshold[nodes])
+            nodes = np.stack([self.left[nodes], self.right[nodes]], axis=2).reshape(len(self.roots), -1)
+        return (np.concatenate(feature, axis=1), np.concatenate(threshold, axis=1),
+                self.value[nodes])
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def apply(self, X):
+        """Leaf node id (global) reached by each row in each tree: (n_rows, n_trees)."""
+        X     = np.ascontiguousarray(X, dtype=np.float32)
+        rows  = np.arange(len(X), dtype=np.int64)[:, None] * X.shape[1]
+        nodes = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            go_left = np.take(X, rows + np.take(self.feature, nodes)) <= np.take(self.threshold, nodes)
+            nodes   = np.where(go_left, np.take(self.left, nodes), np.take(self.right, nodes))
+        return nodes
+
+    def _leaf_values(self, X):
+        if self.perfect is None:
+            return self.value[self.apply(X)]
+        # Implicit layout: the children of position i are 2i+1 and 2i+2
+        feature, threshold, leaf_value = self.perfect
+        X     = np.ascontiguousarray(X, dtype=np.float32)
+        flat  = X.reshape(-1)
+        row0  = np.arange(len(X), dtype=np.int64)[:, None] * X.shape[1]
+        inner = feature.shape[1]
+        base  = np.arange(self.n_trees, dtype=np.int64) * inner
+        pos   = np.zeros((len(X), self.n_trees), dtype=np.int64)
+        for _ in range(self.max_depth):
+            g   = base + pos
+            x   = np.take(flat, row0 + np.take(feature, g))
+            pos = 2 * pos + 2 - (x <= np.take(threshold, g))
+        leaf = pos - inner + np.arange(self.n_trees, dtype=np.int64) * (inner + 1)
+        return np.take(leaf_value, leaf)
+
+    def raw_matrix(self, X):
+        """Forest: mean positive fraction.  Boosting: raw log-odds."""
+        X     = np.asarray(X)
+        out   = np.empty(len(X))
+        block = max(1, BLOCK_NODES // self.n_trees)
+        for lo in range(0, len(X), block):
+            out[lo:lo + block] = self._leaf_values(X[lo:lo + block]).sum(axis=1)
+        if self.kind == "forest":
+            out *= self.scale
+        else:
+            out += self.init_raw
+        return out
+
+    def score_matrix(self, X):
+        """Positive-class probability for each row of an encoded matrix (NaN if incomplete)."""
+        X    = np.asarray(X)
+        raw  = self.raw_matrix(X)
+        prob = raw if self.kind == "forest" else expit(raw, out=raw)
+        prob[np.isnan(X).any(axis=1)] = np.nan
+        return prob
+
+
+# ============================================
+# Compilation
+# ============================================
+def _flatten(trees, leaf_values):
+    """Concatenate sklearn Tree objects into global node arrays."""
+    sizes   = np.array([t.node_count for t in trees])
+    offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+    n       = int(sizes.sum())
+
+    feature   = np.zeros(n, dtype=np.int32)
+    threshold = np.full(n, np.inf)
+    left      = np.arange(n, dtype=np.int32)
+    right     = np.arange(n, dtype=np.int32)
+    value     = np.zeros(n)
+    max_depth = 0
+    for tree, off, values in zip(trees, offsets, leaf_values):
+        sl     = slice(off, off + tree.node_count)
+        inner  = tree.children_left != -1          # sklearn's TREE_LEAF
+        ids    = np.arange(off, off + tree.node_count, dtype=np.int32)
+        feature[sl]   = np.where(inner, tree.feature, 0)
+        threshold[sl] = np.where(inner, tree.threshold, np.inf)
+        left[sl]      = np.where(inner, tree.children_left + off, ids)
+        right[sl]     = np.where(inner, tree.children_right + off, ids)
+        value[sl]     = values
+        max_depth     = max(max_depth, tree.max_depth)
+    return feature, threshold, left, right, value, offsets.astype(np.int32), max_depth
+
+
+def _class_fraction(tree):
+    # DecisionTreeClassifier.predict_proba: normalized class weights
+    v    = tree.value[:, 0, :]
+    norm = v.sum(axis=1)
+    norm[norm == 0] = 1
+    return v[:, 1] / norm
+
+
+def compile_ensemble(model):
+    """Compile a fitted binary DecisionTree / RandomForest / GradientBoosting classifier."""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    if len(getattr(model, "classes_", ())) != 2:
+        raise TypeError("compile_ensemble needs a fitted binary classifier")
+
+    if isinstance(model, (RandomForestClassifier, DecisionTreeClassifier)):
+        trees  = [e.tree_ for e in getattr(model, "estimators_", [model])]
+        values = [_class_fraction(t) for t in trees]
+        arrays = _flatten(trees, values)
+        return CompiledEnsemble(*arrays, kind="forest", scale=1.0 / len(trees))
+
+    if isinstance(model, GradientBoostingClassifier):
+        trees  = [e.tree_ for e in model.estimators_[:, 0]]
+        values = [model.learning_rate * t.value[:, 0, 0] for t in trees]
+        arrays = _flatten(trees, values)
+        init   = float(model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0, 0])
+        return CompiledEnsemble(*arrays, kind="boosting", init_raw=init)
+
+    raise TypeError(f"cannot compile {type(model).__name__}")
+
+
+def is_compilable(model):
+    return type(model).__name__ in ("DecisionTreeClassifier", "RandomForestClassifier",
+                                    "GradientBoostingClassifier")
+
+
+# ============================================
+# Scorer (same interface as LogisticScorer)
+# ============================================
+class TreeScorer:
+    """Raw-record scorer for a compiled tree ensemble."""
+
+    def __init__(self, compiled, encoder):
+        self.compiled = compiled
+        self.encoder  = encoder
+
+    @classmethod
+    def from_artifacts(cls, model, scaler, columns):
+        return cls(compile_ensemble(model), FeatureEncoder(columns, scaler))
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        a, p = bundle.arrays, bundle.header["params"]
+        compiled = CompiledEnsemble(a["feature"], a["threshold"], a["left"], a["right"], a["value"],
+                                    a["roots"], p["max_depth"], p["kind"], p["scale"], p["init_raw"])
+        return cls(compiled, FeatureEncoder(bundle.columns, bundle.scaler))
+
+    @property
+    def columns(self):
+        return self.encoder.columns
+
+    def score_matrix(self, X):
+        return self.compiled.score_matrix(X)
+
+    def score(self, records):
+        with STAGES.time("encode"):
+            X = self.encoder.transform(records)
+        with STAGES.time("model"):
+            return self.score_matrix(X)
+
+    def predict_proba(self, records):
+        prob = self.score(records)
+        return np.stack([1 - prob, prob], axis=1)
+
+
+def check_sklearn_parity(compiled, model, X):
+    """Max absolute difference of P(class 1) against sklearn on X."""
+    expected = model.predict_proba(np.asarray(X, dtype=np.float64))[:, 1]
+    return float(np.max(np.abs(expected - compiled.score_matrix(X)))) if len(X) else 0.0
+
+
+# ============================================
+# CLI
+# ============================================
+def main(argv=None):
+    from readmission.evaluation import NOTEBOOK_MODELS
+    from readmission.train import build_pipeline
+
+    choices = ["decision_tree", "random_forest", "gradient_boosting"]
+    parser = argparse.ArgumentParser(description="Compile a tree ensemble and compare it with sklearn.")
+    parser.add_argument("--model", choices=choices, default="random_forest")
+    parser.add_argument("--tolerance", type=float, default=1e-12)
+    args = parser.parse_args(argv)
+
+    _, stages = build_pipeline(log=None)
+    X_fit, y_fit = stages["resample"].value()
+    X_test = np.asarray(stages["split"].value()["X_test"], dtype=np.float64)
+
+    label, factory = NOTEBOOK_MODELS[args.model]
+    model = factory().fit(np.asarray(X_fit), np.asarray(y_fit))
+
+    start    = time.perf_counter()
+    compiled = compile_ensemble(model)
+    print(f"{label}: {compiled.n_trees} trees, {compiled.n_nodes:,} nodes, depth {compiled.max_depth}, "
+          f"compiled in {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    diff = check_sklearn_parity(compiled, model, X_test)
+    print(f"Max |P(readmit) diff| vs sklearn over {len(X_test):,} rows: {diff:.3e}")
+
+    for name, fn in (("sklearn", lambda X: model.predict_proba(X)[:, 1]),
+                     ("compiled", compiled.score_matrix)):
+        fn(X_test[:1])
+        start = time.perf_counter()
+        for i in range(50):
+            fn(X_test[i:i + 1])
+        single = (time.perf_counter() - start) / 50
+        start = time.perf_counter()
+        fn(X_test)
+        batch = time.perf_counter() - start
+        print(f"{name:<9} single row {single * 1e3:7.2f} ms   batch {len(X_test):,} rows "
+              f"{batch * 1e3:8.1f} ms")
+    return 0 if diff <= args.tolerance else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from readmission import config
+
+
+@pytest.fixture(scope="session")
+def design():
+    """(X_train, y_train, X_test) of the training pipeline's split, without resampling."""
+    if not config.DATASET_PATH.exists():
+        pytest.skip("dataset not available")
+    from readmission.train import FEATURE_COLUMNS, clean_data, design_data, fit_scaler, load_data, split_data
+
+    df    = clean_data(load_data(config.DATASET_PATH))
+    split = split_data(design_data(df, fit_scaler(df), FEATURE_COLUMNS, "float64", False), 0.2, 42)
+    return (np.asarray(split["X_train"]), np.asarray(split["y_train"]),
+            np.asarray(split["X_test"], dtype=np.float64))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from readmission import config
+from readmission.batch import score_file
+from readmission.parallel import _PartConcatenator, score_file_parallel
+
+pytestmark = pytest.mark.skipif(not config.MODEL_PATH.exists() or not config.DATASET_PATH.exists(),
+                                reason="model artifacts or dataset not available")
+
+BAD_AGES = ["", "fifty", "200"]          # blank, unparseable, out of range
+
+
+def _write(df, path):
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope="module")
+def clean_csv(tmp_path_factory):
+    df = pd.read_csv(config.DATASET_PATH, dtype=str, keep_default_na=False).head(3000)
+    return _write(df, tmp_path_factory.mktemp("batch") / "clean.csv")
+
+
+@pytest.fixture(scope="module")
+def input_csv(clean_csv):
+    df = pd.read_csv(clean_csv, dtype=str, keep_default_na=False)
+    complete = df.index[(df != "").all(axis=1)][:len(BAD_AGES)]
+    df.loc[complete, "age"] = BAD_AGES
+    return _write(df, clean_csv.with_name("in.csv"))
+
+
+def _unscored(path):
+    return pd.read_csv(path)["probability"].isna().to_numpy()
+
+
+def test_bad_rows_are_left_unscored(clean_csv, input_csv, tmp_path):
+    score_file(clean_csv, tmp_path / "clean.csv")
+    rows, _ = score_file(input_csv, tmp_path / "out.csv")
+    before, after = _unscored(tmp_path / "clean.csv"), _unscored(tmp_path / "out.csv")
+    assert rows == len(after) == 3000
+    assert (after & ~before).sum() == len(BAD_AGES)     # exactly the bad ages, nothing else
+    assert not (before & ~after).any()
+
+
+def test_parallel_matches_serial(input_csv, tmp_path):
+    serial, parallel = tmp_path / "serial.csv", tmp_path / "parallel.csv"
+    score_file(input_csv, serial)
+    rows, _ = score_file_parallel(input_csv, parallel, workers=2, shard_bytes=64 << 10)
+    a, b = pd.read_csv(serial), pd.read_csv(parallel)
+    assert rows == len(a) == len(b)
+    pd.testing.assert_frame_equal(a.drop(columns="probability"), b.drop(columns="probability"))
+    # Shards can differ from the serial run in the last ulp (BLAS blocking)
+    np.testing.assert_allclose(a["probability"], b["probability"], rtol=1e-12)
+
+
+def test_failed_parallel_run_writes_no_empty_output(tmp_path):
+    out = tmp_path / "out.csv"
+    with pytest.raises(RuntimeError):
+        with _PartConcatenator(out, parquet=False):
+            raise RuntimeError("shard failed")
+    assert not out.exists()
+
+    with _PartConcatenator(out, parquet=False):
+        pass
+    assert out.read_text().strip() == "probability,prediction,risk_tier"
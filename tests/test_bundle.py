@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from readmission import config
+from readmission.bundle import _PREAMBLE, BundleError, _digest, build_from_pickles, read_bundle
+
+pytestmark = pytest.mark.skipif(not config.MODEL_PATH.exists(), reason="model pickles not available")
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    return build_from_pickles(config.MODEL_DIR, output=tmp_path / "model.bundle")
+
+
+def _rewrite_header(path, edit):
+    """Replace the header with edit(header), re-checksummed so only `edit` is wrong."""
+    raw = path.read_bytes()
+    magic, version, length = _PREAMBLE.unpack_from(raw)
+    start  = _PREAMBLE.size + length
+    header = json.loads(raw[_PREAMBLE.size:start])
+    body   = raw[start:]
+    header = edit(header)
+    if isinstance(header, dict):
+        header["sha256"] = _digest(header, body)
+    new = json.dumps(header).encode()
+    path.write_bytes(_PREAMBLE.pack(magic, version, len(new)) + new + body)
+
+
+def test_round_trip(bundle):
+    b = read_bundle(bundle)
+    assert b.header["kind"] == "logistic" and b.arrays["coef"].shape[1] == len(b.columns)
+
+
+@pytest.mark.parametrize("where", ["header", "body"])
+def test_tampered_bytes_are_rejected(bundle, where):
+    raw = bytearray(bundle.read_bytes())
+    pos = raw.index(b'"threshold": ') + 14 if where == "header" else len(raw) - 9
+    raw[pos] ^= 0x01
+    bundle.write_bytes(bytes(raw))
+    with pytest.raises(BundleError):
+        read_bundle(bundle)
+
+
+@pytest.mark.parametrize("keep", [0, 4, _PREAMBLE.size + 10, -8], ids=["empty", "stub", "header", "body"])
+def test_truncated_files_are_rejected(bundle, keep):
+    raw = bundle.read_bytes()
+    bundle.write_bytes(raw[:keep])
+    with pytest.raises(BundleError):
+        read_bundle(bundle)
+
+
+@pytest.mark.parametrize("edit", [
+    lambda h: {k: v for k, v in h.items() if k != "arrays"},
+    lambda h: {k: v for k, v in h.items() if k != "kind"},
+    lambda h: {**h, "risk_tiers": None},
+    lambda h: {**h, "arrays": {**h["arrays"], "coef": {**h["arrays"]["coef"], "dtype": "bogus"}}},
+    lambda h: {**h, "arrays": {k: v for k, v in h["arrays"].items() if k != "scaler_mean"}},
+    lambda h: [h],
+], ids=["no-arrays", "no-kind", "bad-tiers", "bad-dtype", "no-scaler", "not-an-object"])
+def test_malformed_headers_are_rejected(bundle, edit):
+    _rewrite_header(bundle, edit)
+    with pytest.raises(BundleError):
+        read_bundle(bundle)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from readmission.cache import PredictionCache, canonical_key
+
+
+def test_equivalent_inputs_share_a_key():
+    a = {"age": 50, "admission_type": "Emergency", "num_medications": 10.0}
+    b = {"num_medications": np.int64(10), "admission_type": " Emergency ", "age": 50.0}
+    assert canonical_key(a) == canonical_key(b)
+    assert canonical_key(a) != canonical_key({**a, "age": 50.5})
+
+
+def test_hits_misses_and_lru_eviction():
+    cache, calls = PredictionCache(maxsize=2), []
+
+    def get(age):
+        return cache.get_or_compute({"age": age}, "v1", lambda: calls.append(age) or age / 100)
+
+    assert [get(1), get(2), get(1)] == [0.01, 0.02, 0.01]
+    get(3)                                          # evicts 2, the least recently used
+    get(1), get(2)
+    assert calls == [1, 2, 3, 2]
+    assert cache.stats()["hits"] == 2 and cache.stats()["evictions"] == 2
+
+
+def test_a_new_model_version_empties_the_cache():
+    cache = PredictionCache()
+    cache.get_or_compute({"age": 50}, "v1", lambda: 0.1)
+    assert cache.get_or_compute({"age": 50}, "v2", lambda: 0.2) == 0.2
+    assert len(cache) == 1 and cache.stats()["invalidations"] == 1
+
+
+def test_negative_size_is_rejected():
+    with pytest.raises(ValueError):
+        PredictionCache(maxsize=-1)
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from readmission import config
+from readmission.dataset import coerce_input, coerce_record, load_dataset, read_csv_typed
+
+pytestmark = pytest.mark.skipif(not config.DATASET_PATH.exists(), reason="dataset not available")
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / "data.csv"
+    with open(config.DATASET_PATH) as src, open(path, "w") as dst:
+        dst.writelines(line for _, line in zip(range(1001), src))
+    return path
+
+
+def test_cached_load_matches_the_csv_parse(csv, tmp_path):
+    parsed = read_csv_typed(csv)
+    first  = load_dataset(csv, cache_root=tmp_path / "cache")
+    cached = load_dataset(csv, cache_root=tmp_path / "cache")
+    pd.testing.assert_frame_equal(first, parsed)
+    pd.testing.assert_frame_equal(cached.copy(), parsed)
+    assert isinstance(cached["age"].values, np.memmap)          # served from the .npy cache
+    assert parsed["age"].dtype == np.int8 and parsed["gender"].dtype == "category"
+    assert parsed["num_medications"].dtype == "Int16" and parsed["num_medications"].isna().any()
+
+
+def test_a_changed_source_rebuilds_the_cache(csv, tmp_path):
+    load_dataset(csv, cache_root=tmp_path / "cache")
+    lines = csv.read_text().splitlines(keepends=True)
+    csv.write_text("".join(lines[:501]))
+    os.utime(csv, ns=(0, 0))
+    assert len(load_dataset(csv, cache_root=tmp_path / "cache")) == 500
+
+
+def test_column_subset(csv, tmp_path):
+    df = load_dataset(csv, columns=["age", "gender"], cache_root=tmp_path / "cache")
+    assert list(df.columns) == ["age", "gender"]
+
+
+def test_unusable_numerics_become_missing():
+    df = coerce_input(pd.DataFrame({"age": ["50", "fifty", "200", "-1", None, "72.5"]}))
+    np.testing.assert_array_equal(df["age"], [50.0, np.nan, np.nan, np.nan, np.nan, 72.5])
+    assert coerce_record({"age": "fifty", "num_medications": "10", "gender": "Male"}) == \
+        {"age": None, "num_medications": 10.0, "gender": "Male"}
+    with pytest.raises(ValueError):
+        coerce_record({"age": [1, 2]})
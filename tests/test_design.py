@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from readmission import config
+from readmission.dataset import load_dataset
+from readmission.design import build_design_matrix
+from readmission.train import DROP_COLUMNS, FEATURE_COLUMNS, SCALED_COLUMNS, clean_data, fit_scaler
+
+pytestmark = pytest.mark.skipif(not config.DATASET_PATH.exists(), reason="dataset not available")
+
+
+@pytest.fixture(scope="module")
+def typed():
+    df = clean_data(load_dataset(config.DATASET_PATH))
+    return df, fit_scaler(df)
+
+
+def test_matches_the_notebook_get_dummies_matrix(typed):
+    df, scaler = typed
+    # The notebook: get_dummies(drop_first=True).astype(int), then the scaler cell
+    raw = pd.read_csv(config.DATASET_PATH).drop(columns=DROP_COLUMNS).dropna()
+    notebook = pd.get_dummies(raw, drop_first=True).astype(int)
+    notebook[SCALED_COLUMNS] = scaler.transform(notebook[SCALED_COLUMNS].astype(np.float64))
+
+    X = build_design_matrix(df, FEATURE_COLUMNS, scaler, dtype=np.float64)
+    np.testing.assert_allclose(X, notebook[FEATURE_COLUMNS].to_numpy(), rtol=0, atol=1e-12)
+
+
+def test_sparse_and_float32_agree_with_dense(typed):
+    df, scaler = typed
+    dense = build_design_matrix(df, FEATURE_COLUMNS, scaler, dtype=np.float64)
+    np.testing.assert_array_equal(build_design_matrix(df, FEATURE_COLUMNS, scaler, dtype=np.float64,
+                                                      sparse=True).toarray(), dense)
+    np.testing.assert_allclose(build_design_matrix(df, FEATURE_COLUMNS, scaler), dense, rtol=1e-6, atol=1e-6)
+
+
+def test_unseen_level_is_all_zeros_and_unknown_feature_fails(typed):
+    df, _ = typed
+    X = build_design_matrix(df.head(50), ["gender_Unknown", "age"])
+    assert not X[:, 0].any() and (X[:, 1] == df["age"].head(50)).all()
+    with pytest.raises(KeyError):
+        build_design_matrix(df.head(5), ["weight"])
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    average_precision_score, confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score,
+)
+
+from readmission.evaluation import ThresholdCurve, compare_models, recommend_threshold, threshold_sweep
+
+
+@pytest.fixture(scope="module")
+def scores():
+    rng  = np.random.default_rng(0)
+    y    = rng.random(2000) < 0.3
+    prob = np.clip(0.3 * y + rng.random(2000) * 0.7, 0, 1).round(2)     # rounded: many ties
+    return y.astype(int), prob
+
+
+def test_sweep_matches_sklearn_at_each_threshold(scores):
+    y, prob = scores
+    sweep = threshold_sweep(y, prob, np.linspace(0, 1, 41))
+    for row in sweep.itertuples():
+        pred = prob >= row.threshold
+        tn, fp, fn, tp = confusion_matrix(y, pred, labels=[0, 1]).ravel()
+        assert (row.tp, row.fp, row.tn, row.fn) == (tp, fp, tn, fn)
+        assert row.precision == pytest.approx(precision_score(y, pred, zero_division=0))
+        assert row.recall == pytest.approx(recall_score(y, pred))
+        assert row.f1 == pytest.approx(f1_score(y, pred, zero_division=0))
+
+
+def test_every_distinct_score_and_curve_summaries(scores):
+    y, prob = scores
+    sweep = threshold_sweep(y, prob)
+    np.testing.assert_array_equal(sweep["threshold"], np.unique(prob)[::-1])
+    curve = ThresholdCurve(y, prob)
+    assert curve.roc_auc() == pytest.approx(roc_auc_score(y, prob), abs=1e-12)
+    assert curve.average_precision() == pytest.approx(average_precision_score(y, prob), abs=1e-12)
+
+
+def test_recommended_threshold_meets_the_recall_floor(scores):
+    y, prob = scores
+    sweep = threshold_sweep(y, prob)
+    best  = recommend_threshold(sweep, min_recall=0.8)
+    ok    = sweep[sweep["recall"] >= 0.8]
+    assert best["recall"] >= 0.8 and best["precision"] == ok["precision"].max()
+    assert recommend_threshold(sweep[sweep["recall"] < 0.5], min_recall=0.8) is None
+
+    table, _ = compare_models({"m": prob}, None, y, min_recall=0.8)
+    assert table.loc[0, "Threshold"] == best["threshold"]
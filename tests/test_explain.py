@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from readmission import config
+from readmission.artifacts import ArtifactRegistry, load_artifacts
+from readmission.explain import explainer_for
+
+pytestmark = pytest.mark.skipif(not config.MODEL_PATH.exists() or not config.DATASET_PATH.exists(),
+                                reason="model artifacts or dataset not available")
+
+FORM = {
+    "age": 50, "num_lab_procedures": 40, "num_medications": 10, "time_in_hospital": 5,
+    "num_prior_admissions": 1, "admission_type": "Emergency", "discharge_disposition": "Home",
+}
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return load_artifacts(config.MODEL_DIR, ArtifactRegistry()).scorer
+
+
+def _logit(p):
+    return np.log(p / (1 - p))
+
+
+def test_contributions_sum_to_the_logit(scorer):
+    df  = pd.read_csv(config.DATASET_PATH).head(500)
+    exp = explainer_for(scorer).explain(df)
+    prob = scorer.score(df)
+    ok   = ~np.isnan(prob)
+    assert ok.any() and np.array_equal(exp.valid, ok)
+    np.testing.assert_allclose(exp.logit[ok], _logit(prob[ok]), rtol=0, atol=1e-9)
+
+
+def test_uncollected_fields_contribute_nothing(scorer):
+    exp = explainer_for(scorer, tuple(sorted(FORM))).explain(FORM)
+    for field, value in zip(exp.fields, exp.values[0]):
+        if field not in FORM:
+            assert value == 0.0, field
+    np.testing.assert_allclose(exp.logit, _logit(scorer.score(FORM)), rtol=0, atol=1e-9)
+    assert {f for f, _ in exp.drivers(0, 3, fields=FORM)} <= set(FORM)
@@ -0,0 +1,55 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from readmission import config
+from readmission.artifacts import ArtifactRegistry, load_artifacts
+from readmission.hospitals import HospitalRouter, hospitals_dir, main, train_hospital_models
+
+pytestmark = pytest.mark.skipif(not config.MODEL_PATH.exists() or not config.DATASET_PATH.exists(),
+                                reason="model artifacts or dataset not available")
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    from readmission.train import load_data
+
+    path = tmp_path_factory.mktemp("model")
+    for name in ("model.pkl", "scaler.pkl", "columns.pkl", "model.bundle"):
+        shutil.copy(config.MODEL_DIR / name, path / name)
+    df = load_data(config.DATASET_PATH)
+    train_hospital_models(df[df["hospital_id"].isin([1, 2])], path, workers=1, threshold=0.6)
+    return path
+
+
+@pytest.fixture(scope="module")
+def records():
+    df = pd.read_csv(config.DATASET_PATH).dropna().head(300)
+    df["hospital_id"] = np.resize([1, 2, 3, None], len(df))     # 3 has no model, None no id
+    return df
+
+
+def test_routes_to_the_hospital_model_else_the_global_one(model_dir, records):
+    router    = HospitalRouter(model_dir, registry=ArtifactRegistry())
+    prob, thr = router.score_with_thresholds(records)
+
+    own    = {h: load_artifacts(hospitals_dir(model_dir) / str(h), ArtifactRegistry()).scorer for h in (1, 2)}
+    glob   = load_artifacts(model_dir, ArtifactRegistry())
+    ids    = records["hospital_id"]
+    for h, scorer in own.items():
+        rows = (ids == h).to_numpy()
+        np.testing.assert_array_equal(prob[rows], scorer.score(records[rows]))
+        assert (thr[rows] == 0.6).all()
+    rest = ~ids.isin([1, 2]).to_numpy()
+    np.testing.assert_array_equal(prob[rest], glob.scorer.score(records[rest]))
+    assert (thr[rest] == glob.threshold).all()
+    assert not np.array_equal(prob[rows], glob.scorer.score(records[rows]))
+    assert router.stats()["fallbacks"] == 2                   # one lookup per group: "3" and ""
+
+
+def test_cli_rejects_an_unknown_resampling_method(capsys):
+    with pytest.raises(SystemExit):
+        main(["train", "--resample", "smoot"])
+    assert "invalid choice" in capsys.readouterr().err
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from readmission.evaluation import NOTEBOOK_MODELS
+from readmission.knn_index import KNNIndex, check_sklearn_parity
+
+
+@pytest.fixture(scope="module")
+def knn(design):
+    X, y, _ = design
+    return NOTEBOOK_MODELS["knn"][1]().fit(X, y)
+
+
+def test_matches_sklearn(knn, design):
+    diff, agreement = check_sklearn_parity(KNNIndex.from_estimator(knn), knn, design[2])
+    # float32 distances: probabilities agree to ~1e-7, predictions exactly
+    assert diff < 1e-6
+    assert agreement == 1.0
+
+
+def test_saved_index_predicts_the_same(knn, design, tmp_path):
+    index = KNNIndex.from_estimator(knn)
+    index.save(tmp_path / "knn_index")
+    loaded = KNNIndex.load(tmp_path / "knn_index")
+    np.testing.assert_array_equal(loaded.predict_proba(design[2]), index.predict_proba(design[2]))
+
+
+def test_rejects_non_manhattan_models(design):
+    from sklearn.neighbors import KNeighborsClassifier
+
+    X, y, _ = design
+    with pytest.raises(ValueError):
+        KNNIndex.from_estimator(KNeighborsClassifier(metric="euclidean").fit(X, y))
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from readmission import config
+from readmission.artifacts import ArtifactRegistry, load_artifacts
+from readmission.dataset import load_dataset
+from readmission.monitoring import MIN_RECORDS, monitor_for
+
+pytestmark = pytest.mark.skipif(not config.MODEL_PATH.exists() or not config.DATASET_PATH.exists(),
+                                reason="model artifacts or dataset not available")
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return load_artifacts(config.MODEL_DIR, ArtifactRegistry()).scorer
+
+
+@pytest.fixture(scope="module")
+def df():
+    return load_dataset(config.DATASET_PATH)
+
+
+def _monitor(scorer, df):
+    monitor = monitor_for(scorer)
+    X = scorer.encoder.transform(df)
+    monitor.observe(X, scorer.score_matrix(X))
+    return monitor
+
+
+def _report(scorer, df):
+    return _monitor(scorer, df).report()
+
+
+def test_the_baseline_population_raises_no_alerts(scorer, df):
+    assert _report(scorer, df)["alerts"] == []
+
+
+def test_a_shifted_numeric_alerts_on_psi_ks_and_mean(scorer, df):
+    shifted = df.assign(age=df["age"] + 15)
+    report  = _report(scorer, shifted)
+    alerts  = {(a["feature"], a["metric"]): a["level"] for a in report["alerts"]}
+    assert {alerts.pop(("age", m)) for m in ("psi", "ks", "mean_shift")} == {"alert"}
+    assert all(feature == "probability" for feature, _ in alerts)    # other inputs unchanged
+    assert report["numeric"]["age"]["mean"] == pytest.approx(df["age"].mean() + 15, abs=0.5)
+
+
+def test_no_alerts_below_the_minimum_sample(scorer, df):
+    shifted = df.assign(age=df["age"] + 15).head(MIN_RECORDS - 1)
+    assert _report(scorer, shifted)["alerts"] == []
+
+
+def test_merged_shards_report_like_one_monitor(scorer, df):
+    half  = len(df) // 2
+    whole = _report(scorer, df)
+    merged = _monitor(scorer, df.iloc[:half]).merge(_monitor(scorer, df.iloc[half:])).report()
+    assert merged["records"] == whole["records"] and merged["alerts"] == whole["alerts"]
+    for field, stats in whole["numeric"].items():
+        for key, value in stats.items():
+            assert merged["numeric"][field][key] == pytest.approx(value, rel=1e-9, abs=1e-12), (field, key)
@@ -0,0 +1,42 @@
+import shutil
+
+import pytest
+
+from readmission import config
+from readmission.artifacts import CURRENT_FILE, ArtifactRegistry, load_artifacts
+from readmission.online import list_checkpoints, publish, update
+
+pytestmark = pytest.mark.skipif(not config.MODEL_PATH.exists() or not config.DATASET_PATH.exists(),
+                                reason="model artifacts or dataset not available")
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    for name in ("model.pkl", "scaler.pkl", "columns.pkl", "model.bundle"):
+        shutil.copy(config.MODEL_DIR / name, tmp_path / name)
+    day = tmp_path / "day.csv"
+    with open(config.DATASET_PATH) as src, open(day, "w") as dst:
+        dst.writelines(line for _, line in zip(range(2001), src))
+    return tmp_path
+
+
+def test_update_publishes_the_checkpoint_as_one_version(model_dir):
+    before = (model_dir / "model.pkl").read_bytes()
+    base   = load_artifacts(model_dir, ArtifactRegistry()).version
+    _, checkpoint = update([model_dir / "day.csv"], model_dir)
+
+    # model/ itself is untouched; the pointer names the checkpoint
+    assert (model_dir / "model.pkl").read_bytes() == before
+    assert (model_dir / CURRENT_FILE).read_text().strip() == "checkpoints/v0001"
+    live = load_artifacts(model_dir, ArtifactRegistry())
+    assert live.version == load_artifacts(checkpoint, ArtifactRegistry()).version != base
+
+
+def test_restore_switches_back_to_an_earlier_checkpoint(model_dir):
+    update([model_dir / "day.csv"], model_dir)
+    update([model_dir / "day.csv"], model_dir)
+    first, second = list_checkpoints(model_dir)
+    assert load_artifacts(model_dir, ArtifactRegistry()).version == load_artifacts(second, ArtifactRegistry()).version
+
+    publish(first, model_dir)
+    assert load_artifacts(model_dir, ArtifactRegistry()).version == load_artifacts(first, ArtifactRegistry()).version
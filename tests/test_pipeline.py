@@ -0,0 +1,36 @@
+import pytest
+
+from readmission import config
+from readmission.train import build_pipeline
+
+pytestmark = pytest.mark.skipif(not config.DATASET_PATH.exists(), reason="dataset not available")
+
+
+def _run(cache_dir, **params):
+    pipe, stages = build_pipeline(cache_dir=cache_dir, resample="none", log=None, **params)
+    metrics = stages["evaluate"].value()
+    return metrics, {name: status for name, (status, _) in pipe.timings.items()}
+
+
+def test_a_cached_stage_skips_everything_upstream(tmp_path):
+    first, ran = _run(tmp_path)
+    assert set(ran.values()) == {"ran"} and len(ran) == 8
+
+    again, ran = _run(tmp_path)
+    assert ran == {"evaluate": "cached"}
+    assert again == first
+
+
+def test_a_changed_parameter_reruns_only_its_stage(tmp_path):
+    _run(tmp_path)
+    _, ran = _run(tmp_path, threshold=0.5)
+    assert ran == {"evaluate": "ran", "fit": "cached", "split": "cached"}
+
+    _, ran = _run(tmp_path, C=0.5)
+    assert ran == {"evaluate": "ran", "fit": "ran", "resample": "cached", "split": "cached"}
+
+
+def test_disabled_cache_reruns_every_stage(tmp_path):
+    _run(tmp_path)
+    _, ran = _run(tmp_path, use_cache=False)
+    assert set(ran.values()) == {"ran"} and len(ran) == 8
@@ -0,0 +1,66 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from readmission import config
+from readmission.scoring import LogisticScorer, check_sklearn_parity
+
+pytestmark = pytest.mark.skipif(not config.MODEL_PATH.exists() or not config.DATASET_PATH.exists(),
+                                reason="model pickles or dataset not available")
+
+FORM = {
+    "age": 50, "num_lab_procedures": 40, "num_medications": 10, "time_in_hospital": 3,
+    "num_prior_admissions": 0, "admission_type": "Emergency", "discharge_disposition": "Home",
+}
+FULL = {
+    **FORM, "gender": "Male", "primary_diagnosis_code": "E11", "has_comorbidity": 1,
+    "insurance_type": "Medicare",
+}
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    model   = joblib.load(config.MODEL_PATH)
+    scaler  = joblib.load(config.SCALER_PATH)
+    columns = joblib.load(config.COLUMNS_PATH)
+    return model, scaler, columns, LogisticScorer.from_artifacts(model, scaler, columns)
+
+
+def _notebook_proba(model, scaler, columns, record):
+    # The original app: get_dummies, add missing columns as 0, reorder, scale
+    df = pd.get_dummies(pd.DataFrame([record]))
+    for col in columns:
+        if col not in df.columns:
+            df[col] = 0
+    df = df[columns]
+    df[scaler.feature_names_in_] = scaler.transform(df[scaler.feature_names_in_])
+    return model.predict_proba(df)[0][1]
+
+
+def test_matches_sklearn_on_the_dataset(artifacts):
+    model, scaler, _, scorer = artifacts
+    df = pd.read_csv(config.DATASET_PATH).dropna(subset=list(scaler.feature_names_in_))
+    X  = scorer.encoder.transform(df)
+    assert check_sklearn_parity(scorer, model, X) < 1e-12
+    np.testing.assert_array_equal(scorer.score(df), scorer.score_matrix(X))
+
+
+@pytest.mark.parametrize("record", [
+    FULL,
+    FORM,                                                   # fields the form does not collect
+    {**FULL, "admission_type": "Walk-in"},                  # unseen categories
+    {**FULL, "gender": "Unknown", "insurance_type": "Other", "primary_diagnosis_code": "Z99"},
+    {**FULL, "admission_type": "Elective"},                 # dropped base levels
+    {k: v for k, v in FULL.items() if k != "num_lab_procedures"},     # absent numeric
+], ids=["full", "form", "unseen", "unseen-all", "base-level", "absent-numeric"])
+def test_single_record_matches_the_notebook_path(artifacts, record):
+    model, scaler, columns, scorer = artifacts
+    expected = _notebook_proba(model, scaler, columns, record)
+    assert scorer.predict_proba(record)[0][1] == pytest.approx(expected, rel=0, abs=1e-12)
+
+
+def test_null_numeric_is_unscored(artifacts):
+    scorer = artifacts[3]
+    prob = scorer.score([FULL, {**FULL, "age": None}])
+    assert not np.isnan(prob[0]) and np.isnan(prob[1])
@@ -0,0 +1,18 @@
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+from readmission.search import random_search
+from readmission.train import INTEGER_COLUMNS, resample_data
+
+
+def test_refit_resamples_like_the_cv_folds(design):
+    X, y, X_test = design
+    result = random_search(DecisionTreeClassifier(random_state=42), {"max_depth": [5]}, X, y,
+                           n_iter=1, cv=3, n_jobs=1, integer_columns=INTEGER_COLUMNS)
+
+    X_fit, y_fit = resample_data({"X_train": X.astype(np.float64), "y_train": y}, "smote", 42,
+                                 INTEGER_COLUMNS)
+    assert np.array_equal(X_fit[:, INTEGER_COLUMNS], np.trunc(X_fit[:, INTEGER_COLUMNS]))
+    expected = DecisionTreeClassifier(random_state=42, max_depth=5).fit(X_fit, y_fit)
+    np.testing.assert_array_equal(result.best_estimator_.predict_proba(X_test),
+                                  expected.predict_proba(X_test))
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+from readmission import config
+from readmission.artifacts import load_artifacts
+from readmission.results import Policy, assemble
+from readmission.service import ScoringService
+
+pytestmark = pytest.mark.skipif(not config.BUNDLE_PATH.exists() and not config.MODEL_PATH.exists(),
+                                reason="model artifacts not available")
+
+RECORD = {
+    "age": 70, "gender": "Male", "admission_type": "Emergency", "primary_diagnosis_code": "E11",
+    "num_prior_admissions": 1, "time_in_hospital": 5, "num_lab_procedures": 40,
+    "num_medications": 20, "has_comorbidity": 1, "discharge_disposition": "Home",
+    "insurance_type": "Medicare",
+}
+
+
+def _post_concurrently(*bodies, **kwargs):
+    async def run():
+        service = ScoringService(monitoring=False, **kwargs)
+        service.batcher.start()
+        try:
+            return await asyncio.gather(*(service.route("POST", "/predict", json.dumps(body).encode())
+                                          for body in bodies))
+        finally:
+            await service.batcher.stop()
+    return asyncio.run(run())
+
+
+def _post(records, **kwargs):
+    return _post_concurrently(records, **kwargs)[0]
+
+
+def test_predict_scores_a_complete_record():
+    status, result = _post(RECORD)
+    assert status == 200
+    assert 0.0 < result["probability"] < 1.0
+    assert result["risk_tier"] in ("high", "moderate", "low")
+
+
+def test_null_numeric_field_returns_all_none():
+    status, result = _post({**RECORD, "age": None})
+    assert status == 200
+    assert result == {"probability": None, "probability_pct": None, "prediction": None, "risk_tier": None}
+
+
+def test_null_field_only_blanks_its_own_row():
+    status, payload = _post([RECORD, {**RECORD, "num_medications": None}, RECORD])
+    assert status == 200
+    first, missing, last = payload["results"]
+    assert first == last and first["probability"] is not None
+    assert all(value is None for value in missing.values())
+
+
+def test_predict_applies_the_models_threshold_and_tiers():
+    status, result = _post(RECORD)
+    expected = assemble([result["probability"]], *Policy.of(load_artifacts())).to_records()[0]
+    assert result == expected
+
+
+def test_explicit_threshold_overrides_the_models():
+    status, result = _post(RECORD, threshold=1.0)
+    assert status == 200
+    assert result["prediction"] == 0
+    assert result["risk_tier"] == config.NEGATIVE_TIER
+
+
+@pytest.mark.parametrize("value", ["fifty", 200, -1])
+def test_unusable_numeric_is_unscored_like_in_batch(value):
+    status, result = _post({**RECORD, "age": value})
+    assert status == 200
+    assert result["probability"] is None
+
+
+def test_numeric_strings_are_scored_like_numbers():
+    assert _post({**RECORD, "age": "70"}) == _post(RECORD)
+
+
+def test_malformed_request_does_not_fail_the_batch_it_shares():
+    (ok_status, ok), (bad_status, bad) = _post_concurrently(RECORD, {**RECORD, "age": [1, 2]},
+                                                            max_delay_ms=50)
+    assert ok_status == 200 and ok["probability"] is not None
+    assert bad_status == 400 and "age" in bad["error"]
+
+
+def test_scoring_failure_only_fails_its_own_request(monkeypatch):
+    from readmission.service import MicroBatcher
+
+    score_records = MicroBatcher.score_records
+
+    def failing(self, records):
+        if any(r.get("gender") == "boom" for r in records):
+            raise RuntimeError("scorer exploded")
+        return score_records(self, records)
+
+    monkeypatch.setattr(MicroBatcher, "score_records", failing)
+    (ok_status, ok), (bad_status, bad) = _post_concurrently(RECORD, {**RECORD, "gender": "boom"},
+                                                            max_delay_ms=50)
+    assert ok_status == 200 and ok["probability"] is not None
+    assert bad_status == 500 and "scorer exploded" in bad["error"]
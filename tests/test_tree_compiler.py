@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from readmission.evaluation import NOTEBOOK_MODELS
+from readmission.tree_compiler import check_sklearn_parity, compile_ensemble
+
+
+@pytest.fixture(scope="module", params=["decision_tree", "random_forest", "gradient_boosting"])
+def fitted(request, design):
+    X, y, _ = design
+    return NOTEBOOK_MODELS[request.param][1]().fit(X, y)
+
+
+def test_matches_sklearn(fitted, design):
+    assert check_sklearn_parity(compile_ensemble(fitted), fitted, design[2]) < 1e-12
+
+
+def test_pointer_layout_matches_the_perfect_layout(fitted, design):
+    compiled = compile_ensemble(fitted)
+    expected = compiled.score_matrix(design[2])
+    compiled.perfect = None                    # walk the child pointers instead
+    np.testing.assert_array_equal(compiled.score_matrix(design[2]), expected)
+
+
+def test_rows_with_a_missing_feature_are_unscored(fitted, design):
+    X = design[2][:3].copy()
+    X[1, 0] = np.nan
+    prob = compile_ensemble(fitted).score_matrix(X)
+    assert np.isnan(prob[1]) and not np.isnan(prob[[0, 2]]).any()